@@ -1,15 +1,35 @@
 import streamlit as st
-from google import genai
-from google.genai import types
+import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import hashlib
+import logging
+import threading
 import time
 import uuid
 from datetime import datetime
 import PyPDF2
-from docx import Document
-import io
-from PIL import Image
+import tempfile
+import zipfile
 from supabase import create_client, Client
+from postgrest.exceptions import APIError
+import httpx
+from aequilex.pool import PooledResource
+from aequilex.engine import DOCX_MIME, Engine, generate_word_document
+from aequilex.assets import LOGIN_BRAND, SIDEBAR_BRAND, asset_hash, head_injector, minify_css, minify_html, theme_css
+from aequilex.history import ChatHistoryCache
+from aequilex.ingest import BatchIngestor, IngestJob, content_hash
+from aequilex.sync import WorkspaceSync
+from aequilex.cache import LRUCache, TTLCache
+from aequilex.extraction import iter_pdf_pages
+from aequilex.metrics import Metrics, serve_metrics
+from aequilex.storage import FEED_TABLES, CachedStorage, SQLiteStore, Storage, WriteOutcomeUnknown, next_cursors, read_feed
+from aequilex.writer import WriteBehindQueue
+from aequilex.response_cache import ResponseCache, is_standalone_query, replay_stream
+from aequilex.scheduler import AdmissionRejected
+from aequilex.streaming import BlockSplitter, coalesce
+from aequilex.statutes import render_provision
+
+log = logging.getLogger("aequilex.app")
 
 # --- 1. APP CONFIGURATION & SESSION INIT ---
 st.set_page_config(
@@ -22,6 +42,11 @@ st.set_page_config(
 # Initialize Session States
 if "user" not in st.session_state: st.session_state.user = None
 if "current_workspace" not in st.session_state: st.session_state.current_workspace = {"id": 0, "name": "General Workspace"}
+if "history_cache" not in st.session_state: st.session_state.history_cache = ChatHistoryCache()
+if "workspace_sync" not in st.session_state: st.session_state.workspace_sync = WorkspaceSync(st.session_state.history_cache, min_interval=float(st.secrets.get("WORKSPACE_SYNC_INTERVAL_S", 10)))
+if "history_window" not in st.session_state: st.session_state.history_window = {}
+if "vault_cursors" not in st.session_state: st.session_state.vault_cursors = {}
+if "vault_records" not in st.session_state: st.session_state.vault_records = LRUCache(max_entries=200)
 
 # --- 2. OBSIDIAN, LIQUID GOLD & CYBER PURPLE THEME ---
 t_bg = "#050505"
@@ -33,140 +58,27 @@ t_border_cyber = "rgba(139, 92, 246, 0.3)"
 t_input_bg = "#0F0F11"
 t_chat_bg = "rgba(255, 255, 255, 0.02)"
 
-st.markdown(f"""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Audiowide&family=Syne:wght@700;800&family=Rajdhani:wght@500;600;700&family=Inter:wght@300;400;500;600&display=swap');
-
-    /* Typography Classes */
-    .font-audiowide {{ font-family: 'Audiowide', sans-serif; letter-spacing: 0.05em; }}
-    .font-syne {{ font-family: 'Syne', sans-serif; font-weight: 800; }}
-    .font-heading {{ font-family: 'Rajdhani', sans-serif; font-weight: 700; text-transform: uppercase; letter-spacing: 1px; }}
-    
-    .cyber-text {{
-        background: linear-gradient(135deg, #D946EF 0%, #8B5CF6 50%, #4C1D95 100%);
-        -webkit-background-clip: text; -webkit-text-fill-color: transparent; color: transparent;
-        text-shadow: 0 0 20px rgba(217, 70, 239, 0.4);
-    }}
-    .gold-text {{
-        background: linear-gradient(135deg, #BF953F 0%, #FCF6BA 40%, #B38728 60%, #AA771C 100%);
-        -webkit-background-clip: text; -webkit-text-fill-color: transparent; color: transparent;
-    }}
-
-    /* =========================================
-       1. CORE UI ANIMATIONS & STREAMLIT OVERRIDES
-       ========================================= */
-    @keyframes fadeIn {{ from {{ opacity: 0; transform: translateY(10px); }} to {{ opacity: 1; transform: translateY(0); }} }}
-    @keyframes activeGlow {{ 0% {{ box-shadow: inset 0 0 10px rgba(139, 92, 246, 0.05); }} 50% {{ box-shadow: inset 0 0 20px rgba(139, 92, 246, 0.15); }} 100% {{ box-shadow: inset 0 0 10px rgba(139, 92, 246, 0.05); }} }}
-
-    /* LOGIN PAGE ANIMATIONS */
-    @keyframes spin {{ 100% {{ transform: rotate(360deg); }} }}
-    @keyframes cyberAssembleLeft {{ 0% {{ transform: translateX(-40px) translateY(-20px); opacity: 0; filter: blur(5px); }} 100% {{ transform: translateX(0) translateY(0); opacity: 1; filter: blur(0); }} }}
-    @keyframes cyberAssembleRight {{ 0% {{ transform: translateX(40px) translateY(20px); opacity: 0; filter: blur(5px); }} 100% {{ transform: translateX(0) translateY(0); opacity: 1; filter: blur(0); }} }}
-    @keyframes formCascade {{ 0% {{ opacity: 0; transform: translateY(30px); }} 100% {{ opacity: 1; transform: translateY(0); }} }}
-
-    .spin-slow {{ animation: spin 20s linear infinite; transform-origin: 50px 50px; }}
-    .anim-left {{ animation: cyberAssembleLeft 1.2s cubic-bezier(0.2, 0.8, 0.2, 1) forwards; }}
-    .anim-right {{ animation: cyberAssembleRight 1.2s cubic-bezier(0.2, 0.8, 0.2, 1) forwards; }}
-
-    /* Scope the delays ONLY to the login page to keep the main app fast */
-    body:has(#login-page-marker) .aequilex-title-container {{ animation: formCascade 0.8s ease-out 1s forwards; opacity: 0; }}
-    body:has(#login-page-marker) div[data-testid="stTabs"] {{ animation: formCascade 1s cubic-bezier(0.2, 0.8, 0.2, 1) 1.5s forwards; opacity: 0; }}
-
-    .stApp {{ animation: fadeIn 0.6s cubic-bezier(0.4, 0, 0.2, 1); }}
-    header[data-testid="stHeader"] {{ background: transparent !important; box-shadow: none !important; }}
-    [data-testid="stHeaderActionElements"], #MainMenu, .stDeployButton, footer, div[data-testid="stDecoration"] {{ display: none !important; }}
-    .block-container {{ padding-top: 2rem !important; padding-bottom: 6rem !important; }}
-    section[data-testid="stSidebar"] > div {{ padding-top: 1.5rem !important; }}
-    
-    div[data-testid="InputInstructions"] {{ display: none !important; }}
-
-    /* FORCE OBSIDIAN THEME ACROSS CONTAINERS */
-    .stApp, [data-testid="stAppViewContainer"], [data-testid="stMain"], [data-testid="stMainBlockContainer"] {{ background-color: {t_bg} !important; color: {t_text} !important; font-family: 'Inter', sans-serif; }}
-    section[data-testid="stSidebar"] {{ background-color: {t_container} !important; border-right: 1px solid {t_border} !important; }}
-    h1, h2, h3, h4, h5, h6 {{ font-family: 'Rajdhani', sans-serif !important; font-weight: 700 !important; color: {t_text} !important; transition: color 0.3s ease; text-transform: uppercase; letter-spacing: 1px; }}
-    div[data-testid="stBottom"], div[data-testid="stBottomBlockContainer"] {{ background-color: {t_bg} !important; background: {t_bg} !important; }}
-    div[data-testid="stBottom"] > div {{ background-color: transparent !important; }}
-
-    input::placeholder, textarea::placeholder, .stChatInput textarea::placeholder {{ color: {t_text} !important; opacity: 0.45 !important; transition: opacity 0.3s ease; }}
-    input:focus::placeholder, textarea:focus::placeholder {{ opacity: 0.7 !important; }}
-    
-    /* =========================================
-       2. SIDEBAR TABS - VERTICAL ROUNDED RECTANGLES
-       ========================================= */
-    div[role="radiogroup"] {{ display: flex !important; flex-direction: column !important; gap: 10px !important; width: 100% !important; }}
-    div[role="radiogroup"] label > div:first-child:not([data-testid="stMarkdownContainer"]), div[role="radiogroup"] label div[data-baseweb="radio"], div[role="radiogroup"] label input {{ display: none !important; width: 0 !important; height: 0 !important; opacity: 0 !important; position: absolute !important; }}
-    div[role="radiogroup"] label {{
-        width: 100% !important; height: 50px !important; margin: 0 !important; cursor: pointer !important; display: flex !important; align-items: center !important; justify-content: flex-start !important;
-        background-color: {t_container} !important; border: 1px solid {t_border} !important; border-radius: 12px !important; box-sizing: border-box !important; padding: 0 20px !important; transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
-    }}
-    div[role="radiogroup"] label div[data-testid="stMarkdownContainer"] {{ width: 100% !important; height: 100% !important; display: flex !important; align-items: center !important; justify-content: flex-start !important; }}
-    div[role="radiogroup"] label div[data-testid="stMarkdownContainer"] p {{
-        font-size: 0.85rem !important; font-weight: 700 !important; color: {t_subtext} !important; margin: 0 !important; padding: 0 !important; line-height: 1 !important; text-align: left !important;
-        display: flex !important; align-items: center !important; justify-content: flex-start !important; gap: 12px !important; width: 100% !important; height: 100% !important; transition: color 0.3s ease !important;
-        text-transform: uppercase; letter-spacing: 1px;
-    }}
-
-    div[role="radiogroup"] label:hover {{ background-color: rgba(139, 92, 246, 0.05) !important; border-color: {t_border_cyber} !important; transform: translateX(4px); }}
-    div[role="radiogroup"] label:hover div[data-testid="stMarkdownContainer"] p {{ color: #FFF !important; }}
-    div[role="radiogroup"] label:has(input[aria-checked="true"]) {{
-        background-color: {t_bg} !important; border-color: {t_border_cyber} !important; border-left: 5px solid #8B5CF6 !important; animation: activeGlow 3s infinite;
-    }}
-    div[role="radiogroup"] label:has(input[aria-checked="true"]) div[data-testid="stMarkdownContainer"] p {{ color: #D946EF !important; }}
-
-    /* =========================================
-       3. COMPONENT STYLING & SMOOTHING
-       ========================================= */
-    div[data-testid="stVerticalBlock"]:has(#sticky-header-marker):not(:has(div[data-testid="stVerticalBlock"]:has(#sticky-header-marker))) {{
-        position: sticky !important; top: 0rem !important; z-index: 999 !important; background-color: {t_bg} !important; padding: 15px 0px 15px 0px !important; border-bottom: 1px solid {t_border} !important; margin-bottom: 20px !important;
-    }}
-
-    .aequilex-title-container {{ width: 100%; text-align: center; padding-top: 2vh; padding-bottom: 2rem; }}
-    
-    .aequilex-subtitle {{ color: #D946EF; font-size: 0.7rem; letter-spacing: 4px; text-transform: uppercase; font-weight: bold; margin-top: 15px; }}
-    p, label, span, div {{ color: {t_text}; }}
-
-    ::-webkit-scrollbar {{ width: 6px; height: 6px; }}
-    ::-webkit-scrollbar-track {{ background: transparent; }}
-    ::-webkit-scrollbar-thumb {{ background: rgba(139, 92, 246, 0.4); border-radius: 4px; transition: background 0.3s; }}
-    ::-webkit-scrollbar-thumb:hover {{ background: rgba(139, 92, 246, 0.8); }}
-
-    /* STREAMLIT SELECTBOX FIX - HIDDEN CARET */
-    div[data-baseweb="select"] > div {{ background-color: {t_input_bg} !important; border: 1px solid {t_border} !important; color: {t_text} !important; border-radius: 6px !important; transition: all 0.3s ease !important; cursor: pointer !important; }}
-    div[data-baseweb="select"] > div:hover, div[data-baseweb="select"] > div:focus-within {{ border-color: #8B5CF6 !important; box-shadow: 0 0 10px rgba(139, 92, 246, 0.1) !important; }}
-    div[data-baseweb="select"] input {{ cursor: pointer !important; caret-color: transparent !important; }}
-    
-    div[data-baseweb="popover"] {{ 
-        background-color: {t_container} !important; border: 1px solid #8B5CF6 !important; transition: all 0.3s ease; 
-        user-select: none !important; -webkit-user-select: none !important; 
-    }}
-    div[data-baseweb="popover"] li {{ cursor: pointer !important; }}
-    div[data-baseweb="popover"] li:hover {{ background-color: rgba(139, 92, 246, 0.15) !important; color: #D946EF !important; }}
-    
-    div[data-testid="stPopover"] > button {{ min-height: 48px !important; border-radius: 8px !important; transition: all 0.3s ease !important; }}
-
-    .stTextInput > div > div > input, .stChatInput textarea, .stTextArea textarea {{
-        background-color: {t_input_bg} !important; border: 1px solid {t_border} !important; color: {t_text} !important; border-radius: 6px !important; padding: 10px !important; transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
-    }}
-    .stTextInput > div > div > input:focus, .stChatInput textarea:focus, .stTextArea textarea:focus {{ border-color: #8B5CF6 !important; box-shadow: 0 0 15px rgba(139, 92, 246, 0.2) !important; }}
-
-    .stButton > button {{
-        background: linear-gradient(135deg, #0A0A0B 0%, #111 100%) !important; color: #D4AF37 !important; font-family: 'Rajdhani', sans-serif !important; font-weight: 700 !important;
-        border: 1px solid rgba(212, 175, 55, 0.5) !important; border-radius: 8px !important; text-transform: uppercase; letter-spacing: 1.5px; width: 100%; transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
-    }}
-    .stButton > button:hover {{
-        background: linear-gradient(135deg, #111 0%, #1a1a1a 100%) !important; border-color: #D946EF !important; color: #FFF !important; box-shadow: 0 4px 15px rgba(139, 92, 246, 0.3) !important; transform: translateY(-2px);
-    }}
-    button[kind="secondary"] {{ background: transparent !important; border: 1px solid {t_subtext} !important; color: {t_subtext} !important; border-radius: 8px !important; }}
-    button[kind="secondary"]:hover {{ border-color: #8B5CF6 !important; color: #D946EF !important; background: rgba(139, 92, 246, 0.05) !important; }}
-
-    .stChatMessage {{ background-color: {t_chat_bg} !important; border: 1px solid {t_border} !important; border-radius: 12px !important; padding: 1.2rem !important; margin-bottom: 1rem !important; animation: fadeIn 0.4s ease-out; transition: transform 0.2s ease, border-color 0.3s ease; }}
-    .stChatMessage:hover {{ border-color: rgba(212, 175, 55, 0.3) !important; }}
-    .stChatMessage[data-testid="stChatMessageAvatar"] {{ background-color: #0A0A0B !important; border: 1px solid #D4AF37 !important; color: #D4AF37 !important; }}
-    div[data-testid="stContainer"] > div > div > div {{ background-color: {t_container}; border-radius: 12px; }}
-    button[data-baseweb="tab"] {{ color: {t_subtext} !important; font-weight: 600 !important; transition: all 0.3s ease !important; }}
-    button[aria-selected="true"] {{ color: #D946EF !important; border-bottom: 2px solid #D946EF !important; }}
-</style>
-""", unsafe_allow_html=True)
+# Stylesheet and brand markup are built and minified once per process. The stylesheet goes out
+# inline on a session's first run (for first paint) together with a zero-height frame that moves
+# it into the page <head>, where it survives later reruns; after that reruns send no CSS at all.
+# THEME_INJECT_ONCE = false sends the minified stylesheet inline on every rerun instead.
+@st.cache_resource
+def get_theme_assets():
+    css = minify_css(theme_css(t_bg, t_container, t_text, t_subtext, t_border, t_border_cyber, t_input_bg, t_chat_bg))
+    asset_id = f"aequilex-theme-{asset_hash(css)}"
+    return {"id": asset_id, "inline": f"<style>/*{asset_id}*/{css}</style>", "injector": head_injector(asset_id),
+            "login_brand": minify_html(LOGIN_BRAND), "sidebar_brand": minify_html(SIDEBAR_BRAND)}
+
+def inject_theme():
+    assets = get_theme_assets()
+    if not st.secrets.get("THEME_INJECT_ONCE", True):
+        st.markdown(assets["inline"], unsafe_allow_html=True)
+    elif st.session_state.get("theme_asset_id") != assets["id"]:
+        st.markdown(assets["inline"], unsafe_allow_html=True)
+        components.html(assets["injector"], height=0)
+        st.session_state.theme_asset_id = assets["id"]
+
+inject_theme()
 
 INSTITUTIONS = sorted([
     "National Law School of India University (NLSIU)", "NALSAR University of Law",
@@ -177,75 +89,222 @@ INSTITUTIONS = sorted([
     "Symbiosis Law School (SLS)", "School of Law, Christ University", "Jindal Global Law School", "Other"
 ]) 
 
+# --- 3. SHARED CLIENT POOLS (ONE PER PROCESS, REUSED ACROSS SESSIONS & RERUNS) ---
+@st.cache_resource
+def get_supabase_pool():
+    return PooledResource(
+        lambda: create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"]),
+        health_check=lambda sb: sb.table("workspaces").select("id").limit(1).execute() is not None,
+        check_interval=300, name="supabase")
+
+# Model clients, routing, scheduling, caches and the four stream builders live in aequilex.engine
+# (no Streamlit import), so `python -m aequilex.batch` runs the same engine headless. One Engine
+# per process; the thin getters below keep the UI code unchanged.
+@st.cache_resource
+def get_engine(): return Engine(st.secrets, storage=get_storage(), metrics=get_metrics())
+
 # --- 4. DATABASE MANAGER (SUPABASE CLOUD) ---
-class DBHandler:
-    def __init__(self):
-        try:
-            url: str = st.secrets["SUPABASE_URL"]
-            key: str = st.secrets["SUPABASE_KEY"]
-            self.supabase: Client = create_client(url, key)
+class DBHandler(Storage):
+    def __init__(self, pool):
+        self.pool = pool
+        try: pool.get()
         except Exception as e:
             st.error("⚠️ Supabase Credentials missing from Streamlit Secrets!")
 
+    @property
+    def supabase(self) -> Client: return self.pool.get()
+
+    def _execute(self, build, idempotent=True):
+        client = self.supabase
+        try: return build(client).execute()
+        except APIError: raise
+        except Exception as e:
+            # Stale keep-alive connection or dropped session: rebuild the shared client once and retry.
+            # An insert may already have committed when a read times out, so it is only retried
+            # if the request never reached the server.
+            self.pool.invalidate(client)
+            if not idempotent and not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)): raise WriteOutcomeUnknown(str(e)) from e
+            return build(self.supabase).execute()
+
     def register_user(self, email, password, name, inst, year):
         hashed_pw = hashlib.sha256(password.encode()).hexdigest()
         try:
-            self.supabase.table("users").insert({ "email": email, "password": hashed_pw, "name": name, "institution": inst, "year": year, "auth_token": "", "tier": "free" }).execute()
+            self._execute(lambda sb: sb.table("users").insert({ "email": email, "password": hashed_pw, "name": name, "institution": inst, "year": year, "auth_token": "", "tier": "free" }), idempotent=False)
             return True
         except Exception: return False
 
     def login(self, email, password, remember_me=False):
         hashed_pw = hashlib.sha256(password.encode()).hexdigest()
-        response = self.supabase.table("users").select("*").eq("email", email).eq("password", hashed_pw).execute()
+        response = self._execute(lambda sb: sb.table("users").select("*").eq("email", email).eq("password", hashed_pw))
         if response.data:
             user = response.data[0]
             token = ""
             if remember_me:
                 token = str(uuid.uuid4())
-                self.supabase.table("users").update({"auth_token": token}).eq("email", email).execute()
+                self._execute(lambda sb: sb.table("users").update({"auth_token": token}).eq("email", email))
             return { "email": user["email"], "name": user["name"], "institution": user["institution"], "year": user["year"], "tier": user.get("tier", "free"), "token": token }
         return None
 
     def login_with_token(self, token):
         if not token: return None
-        response = self.supabase.table("users").select("*").eq("auth_token", token).execute()
+        response = self._execute(lambda sb: sb.table("users").select("email, name, institution, year, tier").eq("auth_token", token))
         if response.data:
             user = response.data[0]
             return { "email": user["email"], "name": user["name"], "institution": user["institution"], "year": user["year"], "tier": user.get("tier", "free"), "token": token }
         return None
 
     def logout(self, email):
-        self.supabase.table("users").update({"auth_token": ""}).eq("email", email).execute()
+        self._execute(lambda sb: sb.table("users").update({"auth_token": ""}).eq("email", email))
 
     def save_message(self, email, role, content, workspace_id=0):
-        self.supabase.table("chats").insert({ "email": email, "role": role, "content": content, "workspace_id": workspace_id, "timestamp": datetime.now().isoformat() }).execute()
+        response = self._execute(lambda sb: sb.table("chats").insert({ "email": email, "role": role, "content": content, "workspace_id": workspace_id, "timestamp": datetime.now().isoformat() }), idempotent=False)
+        return response.data[0] if response.data else { "role": role, "content": content }
 
-    def get_history(self, email, workspace_id=0):
-        response = self.supabase.table("chats").select("role, content").eq("email", email).eq("workspace_id", workspace_id).order("id", desc=False).execute()
-        return response.data if response.data else []
+    def get_history(self, email, workspace_id=0, after_id=0):
+        # Paged below the PostgREST max-rows cap (see read_feed), so a long thread loads in full.
+        return read_feed(lambda after, n: self._execute(lambda sb: sb.table("chats").select("id, role, content").eq("email", email).eq("workspace_id", workspace_id).gt("id", after).order("id").limit(n)).data or [], after_id)
 
     def clear_history(self, email, workspace_id=0):
-        self.supabase.table("chats").delete().eq("email", email).eq("workspace_id", workspace_id).execute()
+        self._execute(lambda sb: sb.table("chats").delete().eq("email", email).eq("workspace_id", workspace_id))
+
+    def get_context_summary(self, email, workspace_id=0):
+        response = self._execute(lambda sb: sb.table("context_summaries").select("summary, covered_id").eq("email", email).eq("workspace_id", workspace_id).limit(1))
+        return response.data[0] if response.data else None
+
+    def save_context_summary(self, email, summary, covered_id, workspace_id=0):
+        self._execute(lambda sb: sb.table("context_summaries").upsert({ "email": email, "workspace_id": workspace_id, "summary": summary, "covered_id": covered_id, "updated_at": datetime.now().isoformat() }, on_conflict="email,workspace_id"))
+
+    def clear_context_summary(self, email, workspace_id=0):
+        self._execute(lambda sb: sb.table("context_summaries").delete().eq("email", email).eq("workspace_id", workspace_id))
 
     def save_to_space(self, email, category, query, response, workspace_id=0):
-        self.supabase.table("spaces").insert({ "email": email, "category": category, "query": query, "response": response, "workspace_id": workspace_id, "timestamp": datetime.now().isoformat() }).execute()
+        self._execute(lambda sb: sb.table("spaces").insert({ "email": email, "category": category, "query": query, "response": response, "workspace_id": workspace_id, "timestamp": datetime.now().isoformat() }), idempotent=False)
 
     def get_space_items(self, email, category, workspace_id=0):
-        response = self.supabase.table("spaces").select("id, query, response, timestamp").eq("email", email).eq("category", category).eq("workspace_id", workspace_id).order("id", desc=True).execute()
+        response = self._execute(lambda sb: sb.table("spaces").select("id, query, response, timestamp").eq("email", email).eq("category", category).eq("workspace_id", workspace_id).order("id", desc=True))
         return response.data if response.data else []
 
+    def get_space_page(self, email, category, workspace_id=0, before_id=None, limit=25, search=None):
+        # Keyset page of summary rows (newest first) plus the cursor for the next older page.
+        def build(sb):
+            q = sb.table("spaces").select("id, timestamp, query_preview").eq("email", email).eq("category", category).eq("workspace_id", workspace_id)
+            if before_id: q = q.lt("id", before_id)
+            if search: q = q.text_search("search_tsv", search, options={"type": "websearch", "config": "english"})
+            return q.order("id", desc=True).limit(limit + 1)
+        rows = self._execute(build).data or []
+        return rows[:limit], (rows[limit - 1]["id"] if len(rows) > limit else None)
+
+    def get_space_item(self, item_id):
+        response = self._execute(lambda sb: sb.table("spaces").select("id, query, response, timestamp").eq("id", item_id).limit(1))
+        return response.data[0] if response.data else None
+
+    def iter_space_items(self, email, category, workspace_id=0, page_size=100):
+        before_id = None
+        while True:
+            def build(sb):
+                q = sb.table("spaces").select("id, query, response, timestamp").eq("email", email).eq("category", category).eq("workspace_id", workspace_id)
+                return (q.lt("id", before_id) if before_id else q).order("id", desc=True).limit(page_size)
+            rows = self._execute(build).data or []
+            yield from rows
+            if len(rows) < page_size: return
+            before_id = rows[-1]["id"]
+
     def delete_space_item(self, item_id):
-        self.supabase.table("spaces").delete().eq("id", item_id).execute()
+        self._execute(lambda sb: sb.table("spaces").delete().eq("id", item_id))
 
     def create_workspace(self, email, name):
-        response = self.supabase.table("workspaces").insert({ "email": email, "name": name, "created_at": datetime.now().isoformat() }).execute()
+        response = self._execute(lambda sb: sb.table("workspaces").insert({ "email": email, "name": name, "created_at": datetime.now().isoformat() }), idempotent=False)
         return response.data[0]["id"] if response.data else 0
 
     def get_workspaces(self, email):
-        response = self.supabase.table("workspaces").select("id, name").eq("email", email).order("created_at", desc=True).execute()
-        return response.data if response.data else []
-
-db = DBHandler()
+        # Newest first; ids follow creation order, so paging by id keeps the created_at ordering.
+        rows = read_feed(lambda after, n: self._execute(lambda sb: sb.table("workspaces").select("id, name").eq("email", email).gt("id", after).order("id").limit(n)).data or [], 0)
+        return rows[::-1]
+
+    def insert_rows(self, table, rows):
+        self._execute(lambda sb: sb.table(table).insert(rows), idempotent=False)
+
+    def get_archived_hashes(self, email, workspace_id, hashes):
+        found, hashes = set(), list(hashes)
+        for i in range(0, len(hashes), 100):
+            chunk = hashes[i:i + 100]
+            found.update(r["content_hash"] for r in self._execute(lambda sb: sb.table("spaces").select("content_hash").eq("email", email).eq("workspace_id", workspace_id).in_("content_hash", chunk)).data or [])
+        return found
+
+    def get_changes(self, email, workspace_id=0, cursors=None):
+        cursors, changes, marks = cursors or {}, {t: [] for t in FEED_TABLES}, {}
+        # Each table is read in pages below the PostgREST max-rows cap (see read_feed).
+        def page(table, columns, scoped=True):
+            def query(sb, after, n):
+                q = sb.table(table).select(columns).eq("email", email)
+                return (q.eq("workspace_id", workspace_id) if scoped else q).gt("id", after).order("id").limit(n)
+            return lambda after, n: self._execute(lambda sb: query(sb, after, n)).data or []
+        def mark(table):
+            latest = self._execute(lambda sb: sb.table(table).select("id").eq("email", email).eq("workspace_id", workspace_id).order("id", desc=True).limit(1)).data
+            return latest[0]["id"] if latest else 0
+        if cursors.get("chats") is not None:
+            changes["chats"] = read_feed(page("chats", "id, role, content"), cursors["chats"])
+        if cursors.get("spaces") is not None: changes["spaces"] = read_feed(page("spaces", "id, category, timestamp, query_preview"), cursors["spaces"])
+        else: marks["spaces"] = mark("spaces")
+        changes["workspaces"] = read_feed(page("workspaces", "id, name", scoped=False), cursors.get("workspaces") or 0)
+        if cursors.get("deletions") is not None: changes["deletions"] = read_feed(page("deletions", "id, table_name, row_id"), cursors["deletions"])
+        else: marks["deletions"] = mark("deletions")
+        changes["cursors"] = next_cursors(cursors, changes, marks)
+        return changes
+
+# STORAGE_BACKEND = "sqlite" in secrets runs fully offline on a local file (SQLITE_PATH).
+@st.cache_resource
+def get_sqlite_store(): return SQLiteStore(st.secrets.get("SQLITE_PATH", "vidhidesk_users.db"))
+
+def get_storage():
+    if st.secrets.get("STORAGE_BACKEND", "supabase") == "sqlite": return get_sqlite_store()
+    return DBHandler(get_supabase_pool())
+
+# Token auto-login and workspace lists are read on nearly every page load but change rarely;
+# shared TTL caches (AUTH_CACHE_TTL_S, default 300 s) turn a reload storm into one read per key.
+@st.cache_resource
+def get_auth_caches():
+    ttl = float(st.secrets.get("AUTH_CACHE_TTL_S", 300))
+    return TTLCache(max_entries=10000, ttl=ttl), TTLCache(max_entries=10000, ttl=ttl)
+
+db = CachedStorage(get_storage(), *get_auth_caches())
+HISTORY_PAGE_SIZE = 40
+VAULT_PAGE_SIZE = 25
+
+# Stage timers, TTFT and tokens/s per module and model. Off unless METRICS_ENABLED or METRICS_PORT
+# is set; METRICS_PORT also serves Prometheus text at http://127.0.0.1:<port>/metrics (set
+# METRICS_HOST to expose it beyond the machine).
+@st.cache_resource
+def get_metrics():
+    port = st.secrets.get("METRICS_PORT")
+    metrics = Metrics(enabled=bool(st.secrets.get("METRICS_ENABLED", False) or port))
+    if port:
+        try: serve_metrics(metrics, int(port), host=st.secrets.get("METRICS_HOST", "127.0.0.1"))
+        except OSError as e: log.warning("metrics endpoint not started on port %s: %s", port, e)
+    return metrics
+
+def load_history(email, workspace_id, force_sync=False):
+    with get_metrics().timer(module="research", stage="history"):
+        return st.session_state.history_cache.get(email, workspace_id, lambda after_id: db.get_history(email, workspace_id, after_id=after_id), force_sync=force_sync)
+
+# Change-feed sync: pulls only rows above this session's cursors for the folder (new chats,
+# vault records, case folders and deletions) and merges them into the session mirrors.
+def sync_workspace(email, workspace_id, force=False):
+    with get_metrics().timer(module="sync", stage="sync"):
+        return st.session_state.workspace_sync.sync(email, workspace_id, lambda cursors: db.get_changes(email, workspace_id, cursors), force=force, load_workspaces=lambda: db.get_workspaces(email))
+
+# Research Core writes go through the write-behind queue so the turn never waits on the database;
+# the history cache shows the message at once and adopts its id on the next delta sync. The
+# storage is resolved here on the script thread; the writer thread only calls insert_rows.
+@st.cache_resource
+def get_write_queue(): return WriteBehindQueue(get_storage().insert_rows)
+
+def record_message(email, role, content, workspace_id):
+    with get_metrics().timer(module="research", stage="save"): get_write_queue().submit("chats", { "email": email, "role": role, "content": content, "workspace_id": workspace_id, "timestamp": datetime.now().isoformat() })
+    st.session_state.history_cache.append(email, workspace_id, { "role": role, "content": content })
+
+def archive_to_space(email, category, query, response, workspace_id):
+    get_write_queue().submit("spaces", { "email": email, "category": category, "query": query, "response": response, "workspace_id": workspace_id, "timestamp": datetime.now().isoformat() })
 
 if not st.session_state.user:
     saved_token = st.query_params.get("auth_token", None)
@@ -254,188 +313,170 @@ if not st.session_state.user:
         if auto_user: st.session_state.user = auto_user
 
 # --- 5. MULTIMODAL FILE EXTRACTOR (PDF + VISION OCR) ---
-def process_uploaded_file(uploaded_file):
+def get_extraction_pool(): return get_engine().extraction_pool
+
+def extract_pdf_pages(data):
+    # Yields pages as they are extracted, so the engine indexes each one while later shards
+    # are still on the process pool.
+    stats = {}
+    progress = st.progress(0.0, text="Extracting pages...")
+    for text in iter_pdf_pages(data, executor=get_extraction_pool(), stats=stats):
+        yield text
+        progress.progress(stats["pages"] / max(stats["total"], 1), text=f"Extracted and indexed {stats['pages']}/{stats['total']} pages · {stats['pages_per_sec']:.0f} pages/s")
+    progress.empty()
+    if stats["failed"]: st.warning(f"{len(stats['failed'])} page(s) timed out or could not be read and were skipped: {', '.join(map(str, stats['failed'][:20]))}")
+
+# PDFs come back as a DocumentIndex (page-aware chunks + BM25) keyed by SHA-256 of the upload,
+# so re-submitting the same file (or an associate uploading it to a shared folder) skips
+# extraction, and the stream builders send only the passages relevant to the request. Images
+# and audio are compacted once per content hash.
+def image_part(data): return get_engine().image_part(data)
+
+def audio_part(data): return get_engine().audio_part(data)
+
+def pdf_document(data, extract=extract_pdf_pages): return get_engine().pdf_document(data, extract=extract)
+
+def process_uploaded_file(uploaded_file, module="research"):
     if not uploaded_file: return None, None
+    with get_metrics().timer(module=module, stage="extract"): return _process_uploaded_file(uploaded_file)
+
+def _process_uploaded_file(uploaded_file):
     try:
-        if uploaded_file.type == "application/pdf":
-            reader = PyPDF2.PdfReader(uploaded_file)
-            text = "".join([page.extract_text() + "\n" for page in reader.pages])
-            return text, None
+        if uploaded_file.type == "application/pdf": return pdf_document(uploaded_file.getvalue()), None
         elif uploaded_file.type.startswith("image/"):
-            img = Image.open(uploaded_file)
-            return None, img
+            return None, image_part(uploaded_file.getvalue())
     except Exception as e: return f"Error reading file: {e}", None
     return None, None
 
-def generate_word_document(query, response, title="Aequilex Legal Document"):
-    doc = Document()
-    doc.add_heading(title, 0)
-    if query:
-        doc.add_heading('Context / Facts:', level=1)
-        doc.add_paragraph(query)
-    doc.add_heading('Legal Analysis:', level=1)
-    clean_response = response.replace("**", "").replace("*", "")
-    doc.add_paragraph(clean_response)
-    bio = io.BytesIO()
-    doc.save(bio)
-    return bio.getvalue()
+# Vault exports are built only when asked for, then memoized by (item id, content hash) so an
+# edited record never serves a stale file.
+@st.cache_resource
+def get_export_cache(): return LRUCache(max_entries=128)
+
+def export_cache_key(item):
+    return (item['id'], hashlib.sha256(f"{item['query']}\x00{item['response']}".encode()).hexdigest())
+
+def export_word_document(item):
+    key = export_cache_key(item)
+    doc_bytes = get_export_cache().get(key)
+    if doc_bytes is None:
+        doc_bytes = generate_word_document(item['query'], item['response'])
+        get_export_cache().put(key, doc_bytes)
+    return doc_bytes
+
+def write_workspace_zip(items, fileobj):
+    # One DOCX in memory at a time, written straight into fileobj. DOCX files are already
+    # deflated, so entries are stored rather than compressed again.
+    count = 0
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_STORED) as zf:
+        for category, item in items:
+            zf.writestr(f"{category}/Aequilex_{category}_{item['id']}.docx", generate_word_document(item['query'], item['response']))
+            count += 1
+    return count
+
+# Workspace archives are built in an anonymous temporary file (removed by the OS when closed)
+# and handed to st.download_button, so the download goes through the user's session rather than
+# a public URL and nothing is left on disk. Only the finished ZIP is read back, once.
+def export_workspace_zip(items):
+    fh = tempfile.TemporaryFile()
+    count = write_workspace_zip(items, fh)
+    fh.seek(0)
+    return count, fh
 
 # --- 6. AI ENGINE ---
-def get_gemini_stream(query, tone, difficulty, institution, chat_history, pdf_text=None, image_data=None, audio_bytes=None, enable_search=False, strict_citation=False):
-    try: client = genai.Client(api_key=st.secrets["GEMINI_API_KEY"])
-    except Exception as e:
-        yield f"❌ **System Config Error:** {str(e)}"
-        return
-    
-    sys_instruction = f"ROLE: You are AEQUILEX, an elite legal AI for {institution}.\nTONE: {tone} | DEPTH: {difficulty}\nMANDATE: Prioritize Indian Statutes (BNS, BNSS, BSA, Constitution). Cite relevant Case Laws. Use Markdown."
-    if strict_citation: sys_instruction += "\nCRITICAL RULE (STRICT CITATION MODE): You MUST ONLY cite real, verifiable Indian case laws. Provide the exact year, volume, and court. Under NO circumstances should you invent or hallucinate a case. If you cannot find a verifiable precedent, explicitly state 'No verifiable case law found for this specific query'."
-
-    config = types.GenerateContentConfig(temperature=0.1 if strict_citation else 0.3, system_instruction=sys_instruction)
-    if enable_search: config.tools = [{"google_search": {}}]
-
-    contents = []
-    for msg in chat_history:
-        role = "user" if msg["role"] == "user" else "model"
-        contents.append({"role": role, "parts": [{"text": msg["content"]}]})
-
-    current_parts = []
-    if pdf_text: current_parts.append({"text": f"[DOCUMENT CONTEXT UPLOADED BY USER]:\n{pdf_text[:15000]}\n\n(Base your answer heavily on the document above if relevant)."})
-    if image_data: current_parts.append(image_data)
-    if audio_bytes: current_parts.append(types.Part.from_bytes(data=audio_bytes, mime_type="audio/wav"))
-    if query: current_parts.append({"text": f"USER QUERY: {query}"})
-    
-    if current_parts: contents.append({"role": "user", "parts": current_parts})
-    if not contents: return
+def statute_lookup(query): return get_engine().statute_lookup(query)
 
-    models_to_try = ['gemini-2.5-flash', 'gemini-2.5-pro', 'gemini-2.0-flash']
-    for model_name in models_to_try:
-        try:
-            response_stream = client.models.generate_content_stream(model=model_name, contents=contents, config=config)
-            for chunk in response_stream:
-                if chunk.text: yield chunk.text
-            return 
-        except Exception as e:
-            if "API_KEY_INVALID" in str(e) or "not found" in str(e).lower():
-                yield "❌ **Authentication Failed:** API key invalid or revoked."
-                return
-            continue 
-    yield "❌ **System Unavailable:** Aequilex AI servers failed to respond."
-
-def get_drafting_stream(doc_type, client_info, facts, pdf_text=None, image_data=None, audio_bytes=None):
-    try: client = genai.Client(api_key=st.secrets["GEMINI_API_KEY"])
-    except Exception:
-        yield "❌ **System Config Error.**"
-        return
-        
-    sys_instruction = f"""ROLE: You are an expert Legal Draftsman. TASK: Draft a professional, court-ready '{doc_type}'. MANDATE: Use strict, formal Indian legal terminology. Format properly using clear headings and numbered paragraphs. Use placeholders like [DATE] or [AMOUNT] for missing facts. Base the entire draft strictly on the provided facts and documents. Do not include conversational filler."""
-    parts = [{"text": sys_instruction}]
-    if pdf_text: parts.append({"text": f"\n[REFERENCE DOCUMENT UPLOADED]:\n{pdf_text[:15000]}"})
-    if image_data: parts.append(image_data)
-    if client_info: parts.append({"text": f"\n[CLIENT DETAILS]:\n{client_info}"})
-    if facts: parts.append({"text": f"\n[CASE FACTS]:\n{facts}"})
-    if audio_bytes: parts.append(types.Part.from_bytes(data=audio_bytes, mime_type="audio/wav"))
-        
-    try:
-        response_stream = client.models.generate_content_stream(model='gemini-2.5-flash', contents=[{"role": "user", "parts": parts}])
-        for chunk in response_stream:
-            if chunk.text: yield chunk.text
-    except Exception as e: yield f"❌ **Drafting Engine Error:** {str(e)}"
-
-def get_translation_stream(text, target_lang, institution, pdf_text=None, image_data=None, audio_bytes=None):
-    try: client = genai.Client(api_key=st.secrets["GEMINI_API_KEY"])
-    except Exception:
-        yield "❌ **System Config Error.**"
-        return
-        
-    sys_instruction = f"ROLE: You are an expert Legal Translator at {institution}. TASK: Translate the provided legal document/text/audio accurately into highly formal {target_lang}. Preserve all legal meanings perfectly. Keep Latin maxims in Latin with translated meanings in brackets."
-    parts = [{"text": sys_instruction}]
-    if pdf_text: parts.append({"text": f"\n[DOCUMENT TO TRANSLATE]:\n{pdf_text[:15000]}"})
-    if image_data: parts.append(image_data)
-    if text: parts.append({"text": f"\n[ADDITIONAL TEXT TO TRANSLATE]:\n{text}"})
-    if audio_bytes: parts.append(types.Part.from_bytes(data=audio_bytes, mime_type="audio/wav"))
-        
-    try:
-        response_stream = client.models.generate_content_stream(model='gemini-2.5-flash', contents=[{"role": "user", "parts": parts}])
-        for chunk in response_stream:
-            if chunk.text: yield chunk.text
-    except Exception as e: yield f"❌ **Translation Engine Error:** {str(e)}"
-
-def get_vault_analysis_stream(pdf_text=None, image_data=None, audio_bytes=None):
-    try: client = genai.Client(api_key=st.secrets["GEMINI_API_KEY"])
-    except Exception:
-        yield "❌ **System Config Error.**"
-        return
-        
-    sys_instruction = "ROLE: You are an archiving assistant for Aequilex. Extract the key legal facts, summary, and core arguments from the provided document, image, or audio memo. Format it cleanly in Markdown so it can be saved to a database."
-    parts = [{"text": sys_instruction}]
-    if pdf_text: parts.append({"text": f"\n[DOCUMENT TO ARCHIVE]:\n{pdf_text[:15000]}"})
-    if image_data: parts.append(image_data)
-    if audio_bytes: parts.append(types.Part.from_bytes(data=audio_bytes, mime_type="audio/wav"))
-        
+def get_model_router(): return get_engine().router
+
+def get_context_manager(): return get_engine().context_manager
+
+def get_scheduler(): return get_engine().scheduler
+
+def get_document_sessions(): return get_engine().document_sessions
+
+def model_slot(user, **kwargs): return get_engine().model_slot(user, **kwargs)
+
+# Answers to standalone text questions, shared across the institution. Never consulted when a
+# file, image, audio clip or live web search could change the answer.
+@st.cache_resource
+def get_response_cache(): return ResponseCache()
+
+def scheduled_stream(stream, user, status=None, module="research"):
+    # Holds one scheduler slot for the whole answer (router hedges and summaries run inside it).
+    def on_wait(position, waited):
+        if status: status.caption(f"⏳ Queued for the AI engine: position {position} · {waited:.0f}s ({user.get('tier', 'free')} tier)")
+    queued_at = time.monotonic()
     try:
-        response_stream = client.models.generate_content_stream(model='gemini-2.5-flash', contents=[{"role": "user", "parts": parts}])
-        for chunk in response_stream:
-            if chunk.text: yield chunk.text
-    except Exception as e: yield f"❌ **Archiving Error:** {str(e)}"
+        with get_scheduler().slot(user['email'], user.get('tier'), on_wait=on_wait):
+            get_metrics().observe("stage_seconds", time.monotonic() - queued_at, module=module, stage="queue")
+            if status: status.empty()
+            yield from stream
+    except AdmissionRejected as e:
+        if status: status.empty()
+        yield f"❌ **Rate Limited:** {e}. Please retry in about {max(e.retry_after, 1):.0f}s."
+
+def get_gemini_stream(*args, **kwargs): return get_engine().research_stream(*args, **kwargs)
+
+def get_drafting_stream(*args, **kwargs): return get_engine().drafting_stream(*args, **kwargs)
+
+def get_translation_stream(*args, **kwargs): return get_engine().translation_stream(*args, **kwargs)
+
+def get_vault_analysis_stream(*args, **kwargs): return get_engine().vault_analysis_stream(*args, **kwargs)
+
+# Batch vault ingestion: extraction + analysis for many files on a bounded pool (VAULT_BATCH_WORKERS,
+# default 4). The batch is admitted by the scheduler once as a job and each analysis then only
+# waits for a slot, so per-call rate limits do not pace it. Rows are written VAULT_BATCH_WRITE_SIZE
+# at a time, and files already archived in the folder (same SHA-256) skipped, so re-running an
+# interrupted batch resumes it. Workers carry the script context so cached resources resolve.
+def analyze_vault_file(data, mime, name, category, workspace_id, user, engine, slot):
+    with engine.metrics.timer(module="vault", stage="extract"):
+        if mime == "application/pdf": doc, image = engine.pdf_document(data), None
+        else: doc, image = None, engine.image_part(data)
+    with slot():
+        analysis = "".join(engine.vault_analysis_stream(pdf_text=doc, image_data=image, context_key=(user['email'], workspace_id)))
+    if not analysis.strip() or analysis.lstrip().startswith("❌"): raise RuntimeError(analysis.strip() or "empty analysis")
+    return { "email": user['email'], "category": category, "query": f"Batch Archive: {name}", "response": analysis, "workspace_id": workspace_id, "timestamp": datetime.now().isoformat(), "content_hash": content_hash(data) }
+
+def ingest_vault_batch(files, category):
+    user, workspace_id = st.session_state.user, st.session_state.current_workspace['id']
+    by_hash = {content_hash(f.getvalue()): f for f in files}
+    key = (workspace_id, category, tuple(sorted(by_hash)))
+    if st.session_state.get("vault_batch", (None,))[0] != key:
+        st.session_state.vault_batch = (key, IngestJob((f.name, h) for h, f in by_hash.items()))
+    job = st.session_state.vault_batch[1]
+    ctx, engine = get_script_run_ctx(), get_engine()
+    ingestor = BatchIngestor(
+        lambda h: analyze_vault_file(by_hash[h].getvalue(), by_hash[h].type, by_hash[h].name, category, workspace_id, user, engine, slot),
+        lambda rows: db.insert_rows("spaces", rows),
+        archived_hashes=lambda hashes: db.get_archived_hashes(user['email'], workspace_id, hashes),
+        max_workers=int(st.secrets.get("VAULT_BATCH_WORKERS", 4)), batch_size=int(st.secrets.get("VAULT_BATCH_WRITE_SIZE", 8)),
+        thread_init=lambda: add_script_run_ctx(threading.current_thread(), ctx))
+    bar, table = st.progress(0.0), st.empty()
+    def on_progress(job):
+        c = job.counts()
+        bar.progress((c["archived"] + c["skipped"] + c["failed"]) / len(job.items), text=f"{c['archived']} archived · {c['skipped']} already in vault · {c['running']} in progress · {c['failed']} failed of {len(job.items)}")
+        table.dataframe(job.rows(), hide_index=True, use_container_width=True)
+    with engine.model_job(user, max_wait=300) as slot: ingestor.run(job, on_progress)
+    sync_workspace(user['email'], workspace_id, force=True)
+    return job
+
+# Drop-in for st.write_stream: renders coalesced pieces (every ~50 ms / 200 chars), freezes each
+# finished Markdown block in its own element so only the tail re-renders, and returns the full text.
+def render_stream(stream):
+    splitter, tail = BlockSplitter(), st.empty()
+    for piece in coalesce(stream):
+        block, rest = splitter.feed(piece)
+        if block:
+            tail.markdown(block)
+            tail = st.empty()
+        tail.markdown(rest + "▌")
+    tail.markdown(splitter.text[splitter.frozen:])
+    return splitter.text
 
 # --- 7. UI LOGIC ---
 def login_page():
     st.markdown("<div id='login-page-marker'></div>", unsafe_allow_html=True)
-    st.markdown("""
-<div class='aequilex-title-container'>
-<div style="display: flex; justify-content: center; margin-bottom: 25px;">
-<!-- ZODIAC DIAL SVG -->
-<svg viewBox="0 0 100 100" style="width: 140px; height: 140px; overflow: visible;">
-<defs>
-<linearGradient id="gold" x1="0%" y1="0%" x2="100%" y2="100%">
-<stop offset="0%" stop-color="#BF953F" />
-<stop offset="40%" stop-color="#FCF6BA" />
-<stop offset="100%" stop-color="#AA771C" />
-</linearGradient>
-<linearGradient id="cyber" x1="0%" y1="0%" x2="100%" y2="100%">
-<stop offset="0%" stop-color="#D946EF" />
-<stop offset="50%" stop-color="#8B5CF6" />
-<stop offset="100%" stop-color="#4C1D95" />
-</linearGradient>
-<linearGradient id="obsidian" x1="0%" y1="0%" x2="0%" y2="100%">
-<stop offset="0%" stop-color="#1A1A1A" />
-<stop offset="100%" stop-color="#050505" />
-</linearGradient>
-</defs>
-<g class="spin-slow">
-<circle cx="50" cy="50" r="40" fill="none" stroke="url(#cyber)" stroke-width="1" stroke-dasharray="1 5"/>
-<circle cx="50" cy="50" r="35" fill="none" stroke="url(#gold)" stroke-width="2" stroke-dasharray="20 10 5 10"/>
-<circle cx="50" cy="50" r="28" fill="none" stroke="url(#cyber)" stroke-width="0.5"/>
-</g>
-<g class="anim-left">
-<line x1="10" y1="50" x2="90" y2="50" stroke="url(#gold)" stroke-width="1" opacity="0.5"/>
-<line x1="50" y1="10" x2="50" y2="90" stroke="url(#gold)" stroke-width="1" opacity="0.5"/>
-</g>
-<g class="anim-right">
-<path d="M 50 20 L 25 75 H 40 L 50 50 L 60 75 H 75 Z" fill="url(#obsidian)" stroke="url(#cyber)" stroke-width="2"/>
-<polygon points="45,60 55,60 50,70" fill="url(#gold)"/>
-</g>
-</svg>
-</div>
-
-<div style="text-align: center; width: 100%; display: flex; flex-direction: column; align-items: center;">
-<div style="font-family: 'Audiowide', sans-serif; font-size: clamp(3rem, 6vw, 4.5rem); display: flex; align-items: center; justify-content: center; line-height: 1;">
-<span class="cyber-text">AE</span>
-<span class="cyber-text" style="position: relative; display: inline-flex; align-items: center; justify-content: center; margin: 0 -0.05em; font-family: 'Syne', sans-serif;">
-Q
-<svg style="position: absolute; bottom: -0.2em; left: 50%; transform: translateX(-50%); width: 0.65em; height: 0.65em; pointer-events: none; filter: drop-shadow(0 4px 6px rgba(0,0,0,0.8));" viewBox="0 0 100 100">
-<path d="M 35 15 L 65 15 L 60 25 L 40 25 Z" fill="url(#gold)"/>
-<path d="M 42 25 L 25 85 L 45 85 L 48 25 Z" fill="url(#gold)"/>
-<path d="M 58 25 L 75 85 L 55 85 L 52 25 Z" fill="url(#gold)"/>
-</svg>
-</span>
-<span class="cyber-text">UILEX</span>
-</div>
-<div style="height: 1px; width: 192px; background: linear-gradient(90deg, transparent, #8B5CF6, transparent); margin: 20px auto;"></div>
-<div class="aequilex-subtitle">Your AI-Powered Legal Assistant</div>
-</div>
-</div>
-""", unsafe_allow_html=True)
+    st.markdown(get_theme_assets()["login_brand"], unsafe_allow_html=True)
     
     c1, c2, c3 = st.columns([1, 1.2, 1])
     with c2:
@@ -476,59 +517,17 @@ Q
                     st.session_state.user = { "email": f"guest_{int(time.time())}@aequilex.local", "name": "Guest User", "institution": "Independent Researcher", "year": "N/A", "tier": "free" }
                     st.rerun()
 
+# WORKSPACE_AUTO_SYNC_S > 0 polls the change feed in the background (st.fragment) and reruns the
+# page only when an associate changed something in the open folder.
+WORKSPACE_AUTO_SYNC_S = float(st.secrets.get("WORKSPACE_AUTO_SYNC_S", 0))
+if WORKSPACE_AUTO_SYNC_S and hasattr(st, "fragment"):
+    @st.fragment(run_every=WORKSPACE_AUTO_SYNC_S)
+    def auto_sync_workspace():
+        if sync_workspace(st.session_state.user['email'], st.session_state.current_workspace['id'], force=True): st.rerun()
+
 def main_app():
     with st.sidebar:
-        st.markdown("""
-<div style='display: flex; align-items: center; margin-bottom: 10px; animation: fadeIn 0.8s ease-out;'>
-<svg viewBox="0 0 100 100" style="width: 45px; height: 45px; margin-right: 15px; flex-shrink: 0; filter: drop-shadow(0 0 8px rgba(217, 70, 239, 0.4)); overflow: visible;">
-<defs>
-<linearGradient id="gold" x1="0%" y1="0%" x2="100%" y2="100%">
-<stop offset="0%" stop-color="#BF953F" />
-<stop offset="40%" stop-color="#FCF6BA" />
-<stop offset="100%" stop-color="#AA771C" />
-</linearGradient>
-<linearGradient id="cyber" x1="0%" y1="0%" x2="100%" y2="100%">
-<stop offset="0%" stop-color="#D946EF" />
-<stop offset="50%" stop-color="#8B5CF6" />
-<stop offset="100%" stop-color="#4C1D95" />
-</linearGradient>
-<linearGradient id="obsidian" x1="0%" y1="0%" x2="0%" y2="100%">
-<stop offset="0%" stop-color="#1A1A1A" />
-<stop offset="100%" stop-color="#050505" />
-</linearGradient>
-</defs>
-<g>
-<circle cx="50" cy="50" r="40" fill="none" stroke="url(#cyber)" stroke-width="1" stroke-dasharray="1 5"/>
-<circle cx="50" cy="50" r="35" fill="none" stroke="url(#gold)" stroke-width="2" stroke-dasharray="20 10 5 10"/>
-<circle cx="50" cy="50" r="28" fill="none" stroke="url(#cyber)" stroke-width="0.5"/>
-</g>
-<g>
-<line x1="10" y1="50" x2="90" y2="50" stroke="url(#gold)" stroke-width="1" opacity="0.5"/>
-<line x1="50" y1="10" x2="50" y2="90" stroke="url(#gold)" stroke-width="1" opacity="0.5"/>
-</g>
-<g>
-<path d="M 50 20 L 25 75 H 40 L 50 50 L 60 75 H 75 Z" fill="url(#obsidian)" stroke="url(#cyber)" stroke-width="2"/>
-<polygon points="45,60 55,60 50,70" fill="url(#gold)"/>
-</g>
-</svg>
-<div style="display:flex; flex-direction:column;">
-<div style="font-family: 'Audiowide', sans-serif; font-size: 1.4rem; display: flex; align-items: center; line-height: 1; color: #E2E8F0;">
-<span>AE</span>
-<span style="position: relative; display: inline-flex; align-items: center; justify-content: center; margin: 0 -0.05em; font-family: 'Syne', sans-serif;">
-Q
-<svg style="position: absolute; bottom: -0.2em; left: 50%; transform: translateX(-50%); width: 0.55em; height: 0.55em; pointer-events: none;" viewBox="0 0 100 100">
-<path d="M 35 15 L 65 15 L 60 25 L 40 25 Z" fill="url(#gold)"/>
-<path d="M 42 25 L 25 85 L 45 85 L 48 25 Z" fill="url(#gold)"/>
-<path d="M 58 25 L 75 85 L 55 85 L 52 25 Z" fill="url(#gold)"/>
-</svg>
-</span>
-<span>UILEX</span>
-</div>
-<span style="font-size: 0.60rem; color: #D946EF; letter-spacing: 3px; font-weight: 600; text-transform: uppercase; margin-top: 2px;">Intelligence</span>
-</div>
-</div>
-<div class='temple-divider' style='margin: 15px 0 20px 0; width: 100%; height: 1px; background: linear-gradient(90deg, transparent, #8B5CF6, transparent);'></div>
-""", unsafe_allow_html=True)
+        st.markdown(get_theme_assets()["sidebar_brand"], unsafe_allow_html=True)
         
         st.markdown(f"<h3 style='margin-bottom: 0; color: {t_text} !important; font-size: 1.1rem; font-family: Inter, sans-serif !important; text-transform: none; letter-spacing: normal;'>{st.session_state.user['name'].upper()}</h3>", unsafe_allow_html=True)
         st.markdown(f"<span style='color: #8B5CF6; font-size: 0.8rem; font-weight: 500;'>{st.session_state.user['institution']}</span>", unsafe_allow_html=True)
@@ -536,7 +535,8 @@ Q
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown(f"<div style='font-size: 0.75rem; color: {t_subtext}; margin-bottom: 5px; font-weight: 600; letter-spacing: 1px;'>ACTIVE CASE FOLDER</div>", unsafe_allow_html=True)
         
-        workspaces = [{"id": 0, "name": "General Workspace"}] + db.get_workspaces(st.session_state.user['email'])
+        sync_workspace(st.session_state.user['email'], st.session_state.current_workspace['id'])
+        workspaces = [{"id": 0, "name": "General Workspace"}] + st.session_state.workspace_sync.workspaces(st.session_state.user['email'])
         ws_names = [w['name'] for w in workspaces]
         
         current_index = 0
@@ -552,8 +552,10 @@ Q
                     st.rerun()
         with wc2:
             if st.button("🔄", help="Sync Collaborative Workspace Data"):
-                st.toast("Database Synced with Associates!", icon="☁️")
+                changed = sync_workspace(st.session_state.user['email'], st.session_state.current_workspace['id'], force=True)
+                st.toast(f"Database Synced with Associates! {changed} new change(s)." if changed else "Already up to date with Associates.", icon="☁️")
                 st.rerun()
+        if WORKSPACE_AUTO_SYNC_S and hasattr(st, "fragment"): auto_sync_workspace()
         
         with st.popover("➕ Create Case Folder", use_container_width=True):
             new_ws_name = st.text_input("Client/Case Name", placeholder="e.g., State vs Sharma")
@@ -579,10 +581,30 @@ Q
 </div>
             """, unsafe_allow_html=True)
         else: st.error("Config Error: API Key missing.")
+        wq = get_write_queue().stats()
+        ds = get_document_sessions().stats() if get_document_sessions() else None
+        if ds and ds["tokens_saved"]: st.caption(f"📎 Document cache: {ds['live']} live · ~{ds['tokens_saved'] / 1000:.0f}k input tokens not re-sent")
+        if wq["depth"] or wq["failed"]: st.caption(f"💾 Saving: {wq['depth']} queued · p95 write {wq['latency_p95_ms']:.0f} ms" + (f" · ⚠️ {wq['failed']} failed" if wq["failed"] else ""))
+
+        # Admin-only latency panel (ADMIN_EMAILS in secrets, metrics enabled).
+        if get_metrics().enabled and st.session_state.user['email'] in st.secrets.get("ADMIN_EMAILS", []):
+            with st.expander("📈 Latency Metrics"):
+                rows = get_metrics().snapshot()
+                if rows: st.dataframe([{**r, "p50": round(r["p50"], 3), "p95": round(r["p95"], 3), "max": round(r["max"], 3)} for r in rows], hide_index=True, use_container_width=True)
+                else: st.caption("No samples yet.")
+                sched = get_scheduler().stats()
+                st.caption(f"Scheduler: {sched['in_flight']} in flight · {sched['queued']} queued")
+                ss = st.session_state.workspace_sync.stats()
+                tc, wc = (c.stats() for c in get_auth_caches())
+                st.caption(f"Auth cache: tokens {tc['hit_rate']:.0%} hit ({tc['entries']} live) · workspaces {wc['hit_rate']:.0%} hit ({wc['entries']} live) · {tc['loads'] + wc['loads']} reads, {tc['coalesced'] + wc['coalesced']} coalesced")
+                st.caption(f"Workspace sync: {ss['syncs']} pulls ({ss['empty']} empty) · {ss['rows']} rows · {ss['vault_rows']} vault rows mirrored")
+                st.caption(" · ".join(f"{m}: {s['breaker']}, TTFT p95 {s['ttft_p95_ms']:.0f} ms" for m, s in get_model_router().stats().items()))
         
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("TERMINATE UPLINK", type="secondary"):
             db.logout(st.session_state.user["email"])
+            st.session_state.workspace_sync.drop(st.session_state.user["email"])
+            if get_document_sessions(): get_document_sessions().drop_owner(st.session_state.user["email"])
             st.session_state.user = None
             if "auth_token" in st.query_params: del st.query_params["auth_token"]
             st.rerun()
@@ -614,8 +636,14 @@ Q
                     audio_data = st.audio_input("Record", label_visibility="collapsed")
                     submit_audio = st.button("SEND AUDIO", use_container_width=True, type="secondary")
 
-        history = db.get_history(st.session_state.user['email'], workspace_id=st.session_state.current_workspace['id'])
-        for msg in history:
+        history = load_history(st.session_state.user['email'], st.session_state.current_workspace['id'])
+        window_key = (st.session_state.user['email'], st.session_state.current_workspace['id'])
+        window = st.session_state.history_window.get(window_key, HISTORY_PAGE_SIZE)
+        if len(history) > window:
+            if st.button(f"⬆️ LOAD OLDER MESSAGES ({len(history) - window} hidden)", type="secondary"):
+                st.session_state.history_window[window_key] = window + HISTORY_PAGE_SIZE
+                st.rerun()
+        for msg in history[-window:]:
             avatar = "🧑‍⚖️" if msg['role'] == "user" else "⚡"
             with st.chat_message(msg['role'], avatar=avatar): st.markdown(msg['content'])
 
@@ -629,19 +657,30 @@ Q
                     st.audio(audio_data)
                     if not query: query = "Please analyze this audio recording."
             
-            db.save_message(st.session_state.user['email'], "user", query, workspace_id=st.session_state.current_workspace['id'])
+            prior_history = list(history)
+            record_message(st.session_state.user['email'], "user", query, st.session_state.current_workspace['id'])
             with st.chat_message("assistant", avatar="⚡"):
                 pdf_text, image_data = process_uploaded_file(uploaded_file)
                 audio_bytes = audio_data.getvalue() if is_audio_submission else None
                 
+                cache_params = (tone, diff, st.session_state.user['institution'], strict_citation)
+                cacheable = not (uploaded_file or audio_bytes or enable_search) and is_standalone_query(query, bool(prior_history))
+                cached_response = get_response_cache().lookup(query, cache_params) if cacheable else None
+                # Bare Act lookups of a named section are answered verbatim from the local index.
+                bare_text = statute_lookup(query) if diff == "Bare Act" and not (uploaded_file or audio_bytes) else None
+
+                queue_status = st.empty()
                 with st.spinner("Analyzing Query & Attached Files..."):
-                    stream = get_gemini_stream(query, tone, diff, st.session_state.user['institution'], history, pdf_text=pdf_text, image_data=image_data, audio_bytes=audio_bytes, enable_search=enable_search, strict_citation=strict_citation)
-                    full_response = st.write_stream(stream)
+                    if bare_text: stream = replay_stream(render_provision(bare_text) + "\n\n*Source: local Bare Act index.*")
+                    elif cached_response: stream = replay_stream(cached_response)
+                    else: stream = scheduled_stream(get_gemini_stream(query, tone, diff, st.session_state.user['institution'], prior_history, pdf_text=pdf_text, image_data=image_data, audio_bytes=audio_bytes, enable_search=enable_search, strict_citation=strict_citation, context_key=(st.session_state.user['email'], st.session_state.current_workspace['id'])), st.session_state.user, queue_status)
+                    full_response = render_stream(stream)
+                if cacheable and not (cached_response or bare_text) and "❌" not in full_response: get_response_cache().store(query, cache_params, full_response)
                 
-                db.save_message(st.session_state.user['email'], "assistant", full_response, workspace_id=st.session_state.current_workspace['id'])
+                record_message(st.session_state.user['email'], "assistant", full_response, st.session_state.current_workspace['id'])
 
                 if space != "None" and "❌" not in full_response:
-                    db.save_to_space(st.session_state.user['email'], space, query, full_response, workspace_id=st.session_state.current_workspace['id'])
+                    archive_to_space(st.session_state.user['email'], space, query, full_response, st.session_state.current_workspace['id'])
                     st.toast(f"Archived to {space}", icon="📂")
             st.rerun()
 
@@ -650,6 +689,9 @@ Q
             with c2:
                 if st.button("CLEAR LOGS", type="secondary"):
                     db.clear_history(st.session_state.user['email'], workspace_id=st.session_state.current_workspace['id'])
+                    st.session_state.history_cache.invalidate(st.session_state.user['email'], st.session_state.current_workspace['id'])
+                    db.clear_context_summary(st.session_state.user['email'], workspace_id=st.session_state.current_workspace['id'])
+                    get_context_manager().reset((st.session_state.user['email'], st.session_state.current_workspace['id']))
                     st.rerun()
 
     # --- DRAFTING STUDIO ---
@@ -684,13 +726,13 @@ Q
                     pdf_text, image_data = None, None
                     if uploaded_file:
                         with st.spinner("Extracting Reference Document..."): 
-                            pdf_text, image_data = process_uploaded_file(uploaded_file)
+                            pdf_text, image_data = process_uploaded_file(uploaded_file, module="drafting")
                     
                     audio_bytes = draft_audio.getvalue() if draft_audio else None
                     client_info_str = f"Client: {client_name}\nOpposing Party: {opp_name}" if (client_name or opp_name) else None
                             
-                    stream = get_drafting_stream(doc_type, client_info_str, facts, pdf_text=pdf_text, image_data=image_data, audio_bytes=audio_bytes)
-                    final_draft = st.write_stream(stream)
+                    stream = scheduled_stream(get_drafting_stream(doc_type, client_info_str, facts, pdf_text=pdf_text, image_data=image_data, audio_bytes=audio_bytes, context_key=(st.session_state.user['email'], st.session_state.current_workspace['id'])), st.session_state.user, st.empty(), module="drafting")
+                    final_draft = render_stream(stream)
                     
                     if "❌" not in final_draft:
                         context_note = f"Facts provided:\n{facts}\n\n[References were included]" 
@@ -724,12 +766,12 @@ Q
                     pdf_text, image_data = None, None
                     if uploaded_file:
                         with st.spinner("Extracting File for Translation..."):
-                            pdf_text, image_data = process_uploaded_file(uploaded_file)
+                            pdf_text, image_data = process_uploaded_file(uploaded_file, module="translate")
                     
                     audio_bytes = trans_audio.getvalue() if trans_audio else None
                             
-                    stream = get_translation_stream(source_text, target_lang, st.session_state.user['institution'], pdf_text=pdf_text, image_data=image_data, audio_bytes=audio_bytes)
-                    final_translation = st.write_stream(stream)
+                    stream = get_translation_stream(source_text, target_lang, st.session_state.user['institution'], pdf_text=pdf_text, image_data=image_data, audio_bytes=audio_bytes, user=st.session_state.user)
+                    final_translation = render_stream(stream)
                     
                     if "❌" not in final_translation:
                         context_note = f"Source Text:\n{source_text}\n\n[References Included]" 
@@ -741,6 +783,24 @@ Q
         st.markdown(f"<h2 style='margin-bottom: 0; color: {t_text} !important;'>KNOWLEDGE VAULT <span style='font-size:0.5em; color:{t_subtext}; text-transform:none; font-family: Inter, sans-serif;'>[{st.session_state.current_workspace['name']}]</span></h2>", unsafe_allow_html=True)
         st.markdown("<div class='temple-divider' style='margin: 10px 0 30px 0; width: 80px; margin-left: 0; background: linear-gradient(90deg, #D4AF37, transparent); height: 1px;'></div>", unsafe_allow_html=True)
         
+        with st.popover("📦 BATCH INGEST EXHIBITS", use_container_width=True):
+            st.markdown("Archive a whole set of documents or scans at once. Files already archived in this folder are skipped, so an interrupted batch can simply be run again.")
+            batch_files = st.file_uploader("Upload Files", type=["pdf", "png", "jpg", "jpeg"], accept_multiple_files=True, key="vault_batch_files")
+            bc1, bc2 = st.columns([1, 1])
+            with bc1: b_space = st.selectbox("Save To", ["Research", "Paper", "Study"], key="vault_batch_space")
+            with bc2:
+                st.markdown("<br>", unsafe_allow_html=True)
+                run_batch = st.button("Archive All", type="primary", use_container_width=True, disabled=not batch_files)
+            previous = st.session_state.get("vault_batch")
+            if previous and not run_batch and not previous[1].finished():
+                st.caption(f"⏸️ Last batch stopped with {len(previous[1].todo())} of {len(previous[1].items)} file(s) left. Press Archive All to resume.")
+            if run_batch and batch_files:
+                try: c = ingest_vault_batch(batch_files, b_space).counts()
+                except AdmissionRejected as e: st.error(f"Rate limited: {e}. Please retry in about {max(e.retry_after, 1):.0f}s.")
+                else:
+                    if c["failed"]: st.warning(f"Archived {c['archived']} file(s) to {b_space}; {c['failed']} failed. Press Archive All to retry them.")
+                    else: st.success(f"Archived {c['archived']} file(s) to {b_space}" + (f"; {c['skipped']} were already in the vault." if c["skipped"] else "."))
+
         with st.popover("➕ QUICK ANALYZE & ADD TO VAULT", use_container_width=True):
             st.markdown("Upload a complex legal document/image or dictate a voice memo. Aequilex will extract the core facts and archive them instantly.")
             vc1, vc2, vc3 = st.columns([1, 1, 1])
@@ -751,35 +811,73 @@ Q
                 save_vault = st.button("Extract & Archive", type="primary", use_container_width=True)
 
             if save_vault and (uploaded_file or vault_audio):
-                pdf_text, image_data = process_uploaded_file(uploaded_file)
+                pdf_text, image_data = process_uploaded_file(uploaded_file, module="vault")
                 aud_bytes = vault_audio.getvalue() if vault_audio else None
                 with st.spinner("Analyzing and Saving to Vault..."):
-                    stream = get_vault_analysis_stream(pdf_text=pdf_text, image_data=image_data, audio_bytes=aud_bytes)
+                    stream = scheduled_stream(get_vault_analysis_stream(pdf_text=pdf_text, image_data=image_data, audio_bytes=aud_bytes, context_key=(st.session_state.user['email'], st.session_state.current_workspace['id'])), st.session_state.user, module="vault")
                     analysis_result = ""
                     for chunk in stream: analysis_result += chunk
                     
                     db.save_to_space(st.session_state.user['email'], v_space, "External File / Audio Analysis", analysis_result, workspace_id=st.session_state.current_workspace['id'])
+                    sync_workspace(st.session_state.user['email'], st.session_state.current_workspace['id'], force=True)
                     st.success(f"Archived successfully to {v_space}!")
                     st.rerun()
 
+        if st.button("📦 EXPORT WHOLE WORKSPACE (ZIP)", type="secondary"):
+            with st.spinner("Packaging every vault record..."):
+                email, ws_id = st.session_state.user['email'], st.session_state.current_workspace['id']
+                items = ((cat, item) for cat in ["Research", "Paper", "Study"] for item in db.iter_space_items(email, cat, workspace_id=ws_id))
+                count, archive = export_workspace_zip(items)
+            with archive:
+                if not count: st.info("This folder has no archived records yet.", icon="ℹ️")
+                else: st.download_button(label=f"⬇️ DOWNLOAD {count} RECORDS (ZIP)", data=archive, file_name=f"Aequilex_Workspace_{ws_id}.zip", mime="application/zip", type="primary")
+
+        search = st.text_input("Search Vault", placeholder="🔍 Search archived research, papers and notes (e.g. anticipatory bail 482)", label_visibility="collapsed").strip()
+
         t1, t2, t3 = st.tabs(["📚 RESEARCH", "📝 PAPERS", "🎓 STUDY"])
         for tab, cat in zip([t1, t2, t3], ["Research", "Paper", "Study"]):
             with tab:
                 st.markdown("<br>", unsafe_allow_html=True)
-                items = db.get_space_items(st.session_state.user['email'], cat, workspace_id=st.session_state.current_workspace['id'])
-                if not items: st.info(f"Sector '{cat}' is empty in this folder.", icon="ℹ️")
+                cursors = st.session_state.vault_cursors.setdefault((cat, st.session_state.current_workspace['id'], search), [None])
+                # Listing is served from the synced mirror; only search goes to the database.
+                if search: items, next_cursor = db.get_space_page(st.session_state.user['email'], cat, workspace_id=st.session_state.current_workspace['id'], before_id=cursors[-1], limit=VAULT_PAGE_SIZE, search=search)
+                else: items, next_cursor = st.session_state.workspace_sync.vault_page(st.session_state.user['email'], st.session_state.current_workspace['id'], cat, lambda before_id, limit: db.get_space_page(st.session_state.user['email'], cat, workspace_id=st.session_state.current_workspace['id'], before_id=before_id, limit=limit),
+                                                                                         before_id=cursors[-1], limit=VAULT_PAGE_SIZE)
+                if not items: st.info(f"No records match '{search}' in '{cat}'." if search else f"Sector '{cat}' is empty in this folder.", icon="ℹ️")
                 else:
                     for item in items:
-                        with st.expander(f"📌 {item['timestamp'][:16]} | {item['query'][:60]}..."):
-                            st.markdown(item['response'])
+                        with st.expander(f"📌 {item['timestamp'][:16]} | {item['query_preview']}..."):
+                            # Full bodies are fetched only for records the user actually opens.
+                            record = st.session_state.vault_records.get(item['id'])
+                            if record is None and st.button("📖 LOAD FULL RECORD", key=f"open_{item['id']}", type="secondary"):
+                                record = db.get_space_item(item['id'])
+                                if record: st.session_state.vault_records.put(item['id'], record)
+                            if record: st.markdown(record['response'])
                             col1, col2 = st.columns([0.2, 0.8])
                             with col1:
                                 if st.button("DELETE RECORD", key=f"del_{item['id']}", type="secondary"):
                                     db.delete_space_item(item['id'])
+                                    st.session_state.workspace_sync.remove_space_item(st.session_state.user['email'], st.session_state.current_workspace['id'], item['id'])
+                                    st.session_state.vault_records.pop(item['id'])
                                     st.rerun()
                             with col2:
-                                doc_bytes = generate_word_document(item['query'], item['response'])
-                                st.download_button(label="📄 EXPORT TO WORD", data=doc_bytes, file_name=f"Aequilex_Research_{item['id']}.docx", mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document", key=f"dl_{item['id']}")
+                                if record:
+                                    doc_bytes = get_export_cache().get(export_cache_key(record))
+                                    if doc_bytes is None and st.button("📄 PREPARE WORD EXPORT", key=f"prep_{item['id']}", type="secondary"):
+                                        doc_bytes = export_word_document(record)
+                                    if doc_bytes is not None:
+                                        st.download_button(label="📄 EXPORT TO WORD", data=doc_bytes, file_name=f"Aequilex_Research_{item['id']}.docx", mime=DOCX_MIME, key=f"dl_{item['id']}")
+
+                    pc1, pc2, pc3 = st.columns([0.2, 0.6, 0.2])
+                    with pc1:
+                        if len(cursors) > 1 and st.button("◀ NEWER", key=f"newer_{cat}", type="secondary"):
+                            cursors.pop()
+                            st.rerun()
+                    with pc2: st.markdown(f"<div style='text-align:center; font-size:0.75rem; color:{t_subtext};'>PAGE {len(cursors)}</div>", unsafe_allow_html=True)
+                    with pc3:
+                        if next_cursor and st.button("OLDER ▶", key=f"older_{cat}", type="secondary"):
+                            cursors.append(next_cursor)
+                            st.rerun()
 
 if __name__ == "__main__":
     if st.session_state.user: main_app()
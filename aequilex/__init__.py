@@ -0,0 +1,2 @@
+# Aequilex support package: process-wide infrastructure shared by the Streamlit app
+# (aequilex-app.py) and headless tooling. Nothing in here imports Streamlit.
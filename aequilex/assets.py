@@ -0,0 +1,280 @@
+import hashlib
+import json
+import re
+
+
+# --- STATIC THEME & BRAND ASSETS ---
+# The theme stylesheet and brand markup used to be rebuilt and re-sent in full on every rerun.
+# They are now built once per process (minified, content-hashed) and the stylesheet is pushed
+# into the page <head> once per browser session; see inject_theme() in the app.
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = re.sub(r"\s+!important", "!important", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_html(markup):
+    markup = re.sub(r"<!--.*?-->", "", markup, flags=re.S)
+    markup = re.sub(r">\s+<", "><", markup)
+    markup = re.sub(r"\s+", " ", markup).replace(" />", "/>")
+    return re.sub(r"""style=(["'])(.*?)\1""", lambda m: f"style={m.group(1)}{minify_css(m.group(2))}{m.group(1)}", markup).strip()
+
+
+def asset_hash(text): return hashlib.sha1(text.encode("utf-8")).hexdigest()[:10]
+
+
+def head_injector(asset_id, prefix="aequilex-theme-"):
+    # Script for a zero-height components.html frame. The stylesheet itself only goes out once,
+    # inline and tagged with a leading /*asset_id*/ comment; this copies it into the parent page's
+    # <head> (dropping older versions after a redeploy), where it outlives the inline element and
+    # every later rerun. It retries briefly in case the frame loads before the inline style.
+    return ("<script>(function(){var d=window.parent.document,id=" + json.dumps(asset_id) + ",n=0;"
+            "(function copy(){if(d.getElementById(id))return;"
+            "var src=Array.prototype.find.call(d.querySelectorAll('style'),function(e){return e.textContent.indexOf('/*'+id+'*/')===0;});"
+            "if(!src){if(++n<50)setTimeout(copy,100);return;}"
+            f"d.querySelectorAll('style[id^=\"{prefix}\"]').forEach(function(e){{e.remove();}});"
+            "var s=d.createElement('style');s.id=id;s.textContent=src.textContent;d.head.appendChild(s);})();})();</script>")
+
+
+def theme_css(t_bg, t_container, t_text, t_subtext, t_border, t_border_cyber, t_input_bg, t_chat_bg):
+    return f"""    @import url('https://fonts.googleapis.com/css2?family=Audiowide&family=Syne:wght@700;800&family=Rajdhani:wght@500;600;700&family=Inter:wght@300;400;500;600&display=swap');
+
+    /* Typography Classes */
+    .font-audiowide {{ font-family: 'Audiowide', sans-serif; letter-spacing: 0.05em; }}
+    .font-syne {{ font-family: 'Syne', sans-serif; font-weight: 800; }}
+    .font-heading {{ font-family: 'Rajdhani', sans-serif; font-weight: 700; text-transform: uppercase; letter-spacing: 1px; }}
+    
+    .cyber-text {{
+        background: linear-gradient(135deg, #D946EF 0%, #8B5CF6 50%, #4C1D95 100%);
+        -webkit-background-clip: text; -webkit-text-fill-color: transparent; color: transparent;
+        text-shadow: 0 0 20px rgba(217, 70, 239, 0.4);
+    }}
+    .gold-text {{
+        background: linear-gradient(135deg, #BF953F 0%, #FCF6BA 40%, #B38728 60%, #AA771C 100%);
+        -webkit-background-clip: text; -webkit-text-fill-color: transparent; color: transparent;
+    }}
+
+    /* =========================================
+       1. CORE UI ANIMATIONS & STREAMLIT OVERRIDES
+       ========================================= */
+    @keyframes fadeIn {{ from {{ opacity: 0; transform: translateY(10px); }} to {{ opacity: 1; transform: translateY(0); }} }}
+    @keyframes activeGlow {{ 0% {{ box-shadow: inset 0 0 10px rgba(139, 92, 246, 0.05); }} 50% {{ box-shadow: inset 0 0 20px rgba(139, 92, 246, 0.15); }} 100% {{ box-shadow: inset 0 0 10px rgba(139, 92, 246, 0.05); }} }}
+
+    /* LOGIN PAGE ANIMATIONS */
+    @keyframes spin {{ 100% {{ transform: rotate(360deg); }} }}
+    @keyframes cyberAssembleLeft {{ 0% {{ transform: translateX(-40px) translateY(-20px); opacity: 0; filter: blur(5px); }} 100% {{ transform: translateX(0) translateY(0); opacity: 1; filter: blur(0); }} }}
+    @keyframes cyberAssembleRight {{ 0% {{ transform: translateX(40px) translateY(20px); opacity: 0; filter: blur(5px); }} 100% {{ transform: translateX(0) translateY(0); opacity: 1; filter: blur(0); }} }}
+    @keyframes formCascade {{ 0% {{ opacity: 0; transform: translateY(30px); }} 100% {{ opacity: 1; transform: translateY(0); }} }}
+
+    .spin-slow {{ animation: spin 20s linear infinite; transform-origin: 50px 50px; }}
+    .anim-left {{ animation: cyberAssembleLeft 1.2s cubic-bezier(0.2, 0.8, 0.2, 1) forwards; }}
+    .anim-right {{ animation: cyberAssembleRight 1.2s cubic-bezier(0.2, 0.8, 0.2, 1) forwards; }}
+
+    /* Scope the delays ONLY to the login page to keep the main app fast */
+    body:has(#login-page-marker) .aequilex-title-container {{ animation: formCascade 0.8s ease-out 1s forwards; opacity: 0; }}
+    body:has(#login-page-marker) div[data-testid="stTabs"] {{ animation: formCascade 1s cubic-bezier(0.2, 0.8, 0.2, 1) 1.5s forwards; opacity: 0; }}
+
+    .stApp {{ animation: fadeIn 0.6s cubic-bezier(0.4, 0, 0.2, 1); }}
+    header[data-testid="stHeader"] {{ background: transparent !important; box-shadow: none !important; }}
+    [data-testid="stHeaderActionElements"], #MainMenu, .stDeployButton, footer, div[data-testid="stDecoration"] {{ display: none !important; }}
+    .block-container {{ padding-top: 2rem !important; padding-bottom: 6rem !important; }}
+    section[data-testid="stSidebar"] > div {{ padding-top: 1.5rem !important; }}
+    
+    div[data-testid="InputInstructions"] {{ display: none !important; }}
+
+    /* FORCE OBSIDIAN THEME ACROSS CONTAINERS */
+    .stApp, [data-testid="stAppViewContainer"], [data-testid="stMain"], [data-testid="stMainBlockContainer"] {{ background-color: {t_bg} !important; color: {t_text} !important; font-family: 'Inter', sans-serif; }}
+    section[data-testid="stSidebar"] {{ background-color: {t_container} !important; border-right: 1px solid {t_border} !important; }}
+    h1, h2, h3, h4, h5, h6 {{ font-family: 'Rajdhani', sans-serif !important; font-weight: 700 !important; color: {t_text} !important; transition: color 0.3s ease; text-transform: uppercase; letter-spacing: 1px; }}
+    div[data-testid="stBottom"], div[data-testid="stBottomBlockContainer"] {{ background-color: {t_bg} !important; background: {t_bg} !important; }}
+    div[data-testid="stBottom"] > div {{ background-color: transparent !important; }}
+
+    input::placeholder, textarea::placeholder, .stChatInput textarea::placeholder {{ color: {t_text} !important; opacity: 0.45 !important; transition: opacity 0.3s ease; }}
+    input:focus::placeholder, textarea:focus::placeholder {{ opacity: 0.7 !important; }}
+    
+    /* =========================================
+       2. SIDEBAR TABS - VERTICAL ROUNDED RECTANGLES
+       ========================================= */
+    div[role="radiogroup"] {{ display: flex !important; flex-direction: column !important; gap: 10px !important; width: 100% !important; }}
+    div[role="radiogroup"] label > div:first-child:not([data-testid="stMarkdownContainer"]), div[role="radiogroup"] label div[data-baseweb="radio"], div[role="radiogroup"] label input {{ display: none !important; width: 0 !important; height: 0 !important; opacity: 0 !important; position: absolute !important; }}
+    div[role="radiogroup"] label {{
+        width: 100% !important; height: 50px !important; margin: 0 !important; cursor: pointer !important; display: flex !important; align-items: center !important; justify-content: flex-start !important;
+        background-color: {t_container} !important; border: 1px solid {t_border} !important; border-radius: 12px !important; box-sizing: border-box !important; padding: 0 20px !important; transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
+    }}
+    div[role="radiogroup"] label div[data-testid="stMarkdownContainer"] {{ width: 100% !important; height: 100% !important; display: flex !important; align-items: center !important; justify-content: flex-start !important; }}
+    div[role="radiogroup"] label div[data-testid="stMarkdownContainer"] p {{
+        font-size: 0.85rem !important; font-weight: 700 !important; color: {t_subtext} !important; margin: 0 !important; padding: 0 !important; line-height: 1 !important; text-align: left !important;
+        display: flex !important; align-items: center !important; justify-content: flex-start !important; gap: 12px !important; width: 100% !important; height: 100% !important; transition: color 0.3s ease !important;
+        text-transform: uppercase; letter-spacing: 1px;
+    }}
+
+    div[role="radiogroup"] label:hover {{ background-color: rgba(139, 92, 246, 0.05) !important; border-color: {t_border_cyber} !important; transform: translateX(4px); }}
+    div[role="radiogroup"] label:hover div[data-testid="stMarkdownContainer"] p {{ color: #FFF !important; }}
+    div[role="radiogroup"] label:has(input[aria-checked="true"]) {{
+        background-color: {t_bg} !important; border-color: {t_border_cyber} !important; border-left: 5px solid #8B5CF6 !important; animation: activeGlow 3s infinite;
+    }}
+    div[role="radiogroup"] label:has(input[aria-checked="true"]) div[data-testid="stMarkdownContainer"] p {{ color: #D946EF !important; }}
+
+    /* =========================================
+       3. COMPONENT STYLING & SMOOTHING
+       ========================================= */
+    div[data-testid="stVerticalBlock"]:has(#sticky-header-marker):not(:has(div[data-testid="stVerticalBlock"]:has(#sticky-header-marker))) {{
+        position: sticky !important; top: 0rem !important; z-index: 999 !important; background-color: {t_bg} !important; padding: 15px 0px 15px 0px !important; border-bottom: 1px solid {t_border} !important; margin-bottom: 20px !important;
+    }}
+
+    .aequilex-title-container {{ width: 100%; text-align: center; padding-top: 2vh; padding-bottom: 2rem; }}
+    
+    .aequilex-subtitle {{ color: #D946EF; font-size: 0.7rem; letter-spacing: 4px; text-transform: uppercase; font-weight: bold; margin-top: 15px; }}
+    p, label, span, div {{ color: {t_text}; }}
+
+    ::-webkit-scrollbar {{ width: 6px; height: 6px; }}
+    ::-webkit-scrollbar-track {{ background: transparent; }}
+    ::-webkit-scrollbar-thumb {{ background: rgba(139, 92, 246, 0.4); border-radius: 4px; transition: background 0.3s; }}
+    ::-webkit-scrollbar-thumb:hover {{ background: rgba(139, 92, 246, 0.8); }}
+
+    /* STREAMLIT SELECTBOX FIX - HIDDEN CARET */
+    div[data-baseweb="select"] > div {{ background-color: {t_input_bg} !important; border: 1px solid {t_border} !important; color: {t_text} !important; border-radius: 6px !important; transition: all 0.3s ease !important; cursor: pointer !important; }}
+    div[data-baseweb="select"] > div:hover, div[data-baseweb="select"] > div:focus-within {{ border-color: #8B5CF6 !important; box-shadow: 0 0 10px rgba(139, 92, 246, 0.1) !important; }}
+    div[data-baseweb="select"] input {{ cursor: pointer !important; caret-color: transparent !important; }}
+    
+    div[data-baseweb="popover"] {{ 
+        background-color: {t_container} !important; border: 1px solid #8B5CF6 !important; transition: all 0.3s ease; 
+        user-select: none !important; -webkit-user-select: none !important; 
+    }}
+    div[data-baseweb="popover"] li {{ cursor: pointer !important; }}
+    div[data-baseweb="popover"] li:hover {{ background-color: rgba(139, 92, 246, 0.15) !important; color: #D946EF !important; }}
+    
+    div[data-testid="stPopover"] > button {{ min-height: 48px !important; border-radius: 8px !important; transition: all 0.3s ease !important; }}
+
+    .stTextInput > div > div > input, .stChatInput textarea, .stTextArea textarea {{
+        background-color: {t_input_bg} !important; border: 1px solid {t_border} !important; color: {t_text} !important; border-radius: 6px !important; padding: 10px !important; transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
+    }}
+    .stTextInput > div > div > input:focus, .stChatInput textarea:focus, .stTextArea textarea:focus {{ border-color: #8B5CF6 !important; box-shadow: 0 0 15px rgba(139, 92, 246, 0.2) !important; }}
+
+    .stButton > button {{
+        background: linear-gradient(135deg, #0A0A0B 0%, #111 100%) !important; color: #D4AF37 !important; font-family: 'Rajdhani', sans-serif !important; font-weight: 700 !important;
+        border: 1px solid rgba(212, 175, 55, 0.5) !important; border-radius: 8px !important; text-transform: uppercase; letter-spacing: 1.5px; width: 100%; transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
+    }}
+    .stButton > button:hover {{
+        background: linear-gradient(135deg, #111 0%, #1a1a1a 100%) !important; border-color: #D946EF !important; color: #FFF !important; box-shadow: 0 4px 15px rgba(139, 92, 246, 0.3) !important; transform: translateY(-2px);
+    }}
+    button[kind="secondary"] {{ background: transparent !important; border: 1px solid {t_subtext} !important; color: {t_subtext} !important; border-radius: 8px !important; }}
+    button[kind="secondary"]:hover {{ border-color: #8B5CF6 !important; color: #D946EF !important; background: rgba(139, 92, 246, 0.05) !important; }}
+
+    .stChatMessage {{ background-color: {t_chat_bg} !important; border: 1px solid {t_border} !important; border-radius: 12px !important; padding: 1.2rem !important; margin-bottom: 1rem !important; animation: fadeIn 0.4s ease-out; transition: transform 0.2s ease, border-color 0.3s ease; }}
+    .stChatMessage:hover {{ border-color: rgba(212, 175, 55, 0.3) !important; }}
+    .stChatMessage[data-testid="stChatMessageAvatar"] {{ background-color: #0A0A0B !important; border: 1px solid #D4AF37 !important; color: #D4AF37 !important; }}
+    div[data-testid="stContainer"] > div > div > div {{ background-color: {t_container}; border-radius: 12px; }}
+    button[data-baseweb="tab"] {{ color: {t_subtext} !important; font-weight: 600 !important; transition: all 0.3s ease !important; }}
+    button[aria-selected="true"] {{ color: #D946EF !important; border-bottom: 2px solid #D946EF !important; }}
+"""
+
+
+LOGIN_BRAND = """<div class='aequilex-title-container'>
+<div style="display: flex; justify-content: center; margin-bottom: 25px;">
+<!-- ZODIAC DIAL SVG -->
+<svg viewBox="0 0 100 100" style="width: 140px; height: 140px; overflow: visible;">
+<defs>
+<linearGradient id="gold" x1="0%" y1="0%" x2="100%" y2="100%">
+<stop offset="0%" stop-color="#BF953F" />
+<stop offset="40%" stop-color="#FCF6BA" />
+<stop offset="100%" stop-color="#AA771C" />
+</linearGradient>
+<linearGradient id="cyber" x1="0%" y1="0%" x2="100%" y2="100%">
+<stop offset="0%" stop-color="#D946EF" />
+<stop offset="50%" stop-color="#8B5CF6" />
+<stop offset="100%" stop-color="#4C1D95" />
+</linearGradient>
+<linearGradient id="obsidian" x1="0%" y1="0%" x2="0%" y2="100%">
+<stop offset="0%" stop-color="#1A1A1A" />
+<stop offset="100%" stop-color="#050505" />
+</linearGradient>
+</defs>
+<g class="spin-slow">
+<circle cx="50" cy="50" r="40" fill="none" stroke="url(#cyber)" stroke-width="1" stroke-dasharray="1 5"/>
+<circle cx="50" cy="50" r="35" fill="none" stroke="url(#gold)" stroke-width="2" stroke-dasharray="20 10 5 10"/>
+<circle cx="50" cy="50" r="28" fill="none" stroke="url(#cyber)" stroke-width="0.5"/>
+</g>
+<g class="anim-left">
+<line x1="10" y1="50" x2="90" y2="50" stroke="url(#gold)" stroke-width="1" opacity="0.5"/>
+<line x1="50" y1="10" x2="50" y2="90" stroke="url(#gold)" stroke-width="1" opacity="0.5"/>
+</g>
+<g class="anim-right">
+<path d="M 50 20 L 25 75 H 40 L 50 50 L 60 75 H 75 Z" fill="url(#obsidian)" stroke="url(#cyber)" stroke-width="2"/>
+<polygon points="45,60 55,60 50,70" fill="url(#gold)"/>
+</g>
+</svg>
+</div>
+
+<div style="text-align: center; width: 100%; display: flex; flex-direction: column; align-items: center;">
+<div style="font-family: 'Audiowide', sans-serif; font-size: clamp(3rem, 6vw, 4.5rem); display: flex; align-items: center; justify-content: center; line-height: 1;">
+<span class="cyber-text">AE</span>
+<span class="cyber-text" style="position: relative; display: inline-flex; align-items: center; justify-content: center; margin: 0 -0.05em; font-family: 'Syne', sans-serif;">
+Q
+<svg style="position: absolute; bottom: -0.2em; left: 50%; transform: translateX(-50%); width: 0.65em; height: 0.65em; pointer-events: none; filter: drop-shadow(0 4px 6px rgba(0,0,0,0.8));" viewBox="0 0 100 100">
+<path d="M 35 15 L 65 15 L 60 25 L 40 25 Z" fill="url(#gold)"/>
+<path d="M 42 25 L 25 85 L 45 85 L 48 25 Z" fill="url(#gold)"/>
+<path d="M 58 25 L 75 85 L 55 85 L 52 25 Z" fill="url(#gold)"/>
+</svg>
+</span>
+<span class="cyber-text">UILEX</span>
+</div>
+<div style="height: 1px; width: 192px; background: linear-gradient(90deg, transparent, #8B5CF6, transparent); margin: 20px auto;"></div>
+<div class="aequilex-subtitle">Your AI-Powered Legal Assistant</div>
+</div>
+</div>
+"""
+
+SIDEBAR_BRAND = """<div style='display: flex; align-items: center; margin-bottom: 10px; animation: fadeIn 0.8s ease-out;'>
+<svg viewBox="0 0 100 100" style="width: 45px; height: 45px; margin-right: 15px; flex-shrink: 0; filter: drop-shadow(0 0 8px rgba(217, 70, 239, 0.4)); overflow: visible;">
+<defs>
+<linearGradient id="gold" x1="0%" y1="0%" x2="100%" y2="100%">
+<stop offset="0%" stop-color="#BF953F" />
+<stop offset="40%" stop-color="#FCF6BA" />
+<stop offset="100%" stop-color="#AA771C" />
+</linearGradient>
+<linearGradient id="cyber" x1="0%" y1="0%" x2="100%" y2="100%">
+<stop offset="0%" stop-color="#D946EF" />
+<stop offset="50%" stop-color="#8B5CF6" />
+<stop offset="100%" stop-color="#4C1D95" />
+</linearGradient>
+<linearGradient id="obsidian" x1="0%" y1="0%" x2="0%" y2="100%">
+<stop offset="0%" stop-color="#1A1A1A" />
+<stop offset="100%" stop-color="#050505" />
+</linearGradient>
+</defs>
+<g>
+<circle cx="50" cy="50" r="40" fill="none" stroke="url(#cyber)" stroke-width="1" stroke-dasharray="1 5"/>
+<circle cx="50" cy="50" r="35" fill="none" stroke="url(#gold)" stroke-width="2" stroke-dasharray="20 10 5 10"/>
+<circle cx="50" cy="50" r="28" fill="none" stroke="url(#cyber)" stroke-width="0.5"/>
+</g>
+<g>
+<line x1="10" y1="50" x2="90" y2="50" stroke="url(#gold)" stroke-width="1" opacity="0.5"/>
+<line x1="50" y1="10" x2="50" y2="90" stroke="url(#gold)" stroke-width="1" opacity="0.5"/>
+</g>
+<g>
+<path d="M 50 20 L 25 75 H 40 L 50 50 L 60 75 H 75 Z" fill="url(#obsidian)" stroke="url(#cyber)" stroke-width="2"/>
+<polygon points="45,60 55,60 50,70" fill="url(#gold)"/>
+</g>
+</svg>
+<div style="display:flex; flex-direction:column;">
+<div style="font-family: 'Audiowide', sans-serif; font-size: 1.4rem; display: flex; align-items: center; line-height: 1; color: #E2E8F0;">
+<span>AE</span>
+<span style="position: relative; display: inline-flex; align-items: center; justify-content: center; margin: 0 -0.05em; font-family: 'Syne', sans-serif;">
+Q
+<svg style="position: absolute; bottom: -0.2em; left: 50%; transform: translateX(-50%); width: 0.55em; height: 0.55em; pointer-events: none;" viewBox="0 0 100 100">
+<path d="M 35 15 L 65 15 L 60 25 L 40 25 Z" fill="url(#gold)"/>
+<path d="M 42 25 L 25 85 L 45 85 L 48 25 Z" fill="url(#gold)"/>
+<path d="M 58 25 L 75 85 L 55 85 L 52 25 Z" fill="url(#gold)"/>
+</svg>
+</span>
+<span>UILEX</span>
+</div>
+<span style="font-size: 0.60rem; color: #D946EF; letter-spacing: 3px; font-weight: 600; text-transform: uppercase; margin-top: 2px;">Intelligence</span>
+</div>
+</div>
+<div class='temple-divider' style='margin: 15px 0 20px 0; width: 100%; height: 1px; background: linear-gradient(90deg, transparent, #8B5CF6, transparent);'></div>
+"""
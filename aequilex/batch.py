@@ -0,0 +1,193 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from aequilex.engine import Engine, generate_word_document
+
+log = logging.getLogger("aequilex.batch")
+
+TASKS = ("research", "drafting", "translation", "vault")
+# Document-session scope shared by every batch job: the same PDF referenced by many jobs is
+# uploaded to the provider once per model.
+BATCH_SCOPE = ("batch", 0)
+
+
+# --- JOB FILES ---
+# One job per JSONL line or CSV row. Fields by task:
+#   research     query, tone (Casual|Professional|Academic), difficulty (Summary|Detailed), strict_citation, enable_search
+#   drafting     doc_type, facts, client_info (or client_name / opposing_party)
+#   translation  text, target_lang (a list or "Hindi;Tamil;..." fans out one job per language)
+#   vault        (attachments only)
+# plus optional id, pdf / image / audio paths (relative to the job file) and institution.
+def read_jobs(path):
+    with open(path, encoding="utf-8", newline="") as fh:
+        if path.lower().endswith(".csv"): rows = list(csv.DictReader(fh))
+        else: rows = [json.loads(line) for line in fh if line.strip()]
+    base, jobs = os.path.dirname(os.path.abspath(path)), []
+    for n, row in enumerate(rows, 1):
+        job = {k: v for k, v in row.items() if v not in (None, "")}
+        job["id"] = str(job.get("id") or f"job-{n}")
+        job["task"] = job.get("task", "research").lower()
+        if job["task"] not in TASKS: raise ValueError(f"{job['id']}: unknown task {job['task']!r}")
+        for key in ("pdf", "image", "audio"):
+            if key in job: job[key] = os.path.join(base, job[key])
+        if job["task"] == "translation":
+            langs = job.get("target_lang", "English")
+            langs = [l.strip() for l in (langs if isinstance(langs, list) else langs.split(";")) if l.strip()]
+            jobs += [{**job, "target_lang": lang, "id": f"{job['id']}-{lang.lower()}" if len(langs) > 1 else job["id"]} for lang in langs]
+        else: jobs.append(job)
+    ids = [job["id"] for job in jobs]
+    dupes = sorted({i for i in ids if ids.count(i) > 1})
+    if dupes: raise ValueError(f"duplicate job ids: {', '.join(dupes)}")
+    return jobs
+
+
+def flag(value): return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+def read_bytes(path):
+    with open(path, "rb") as fh: return fh.read()
+
+
+# --- JOB RUNNER ---
+# Streams one job to completion and returns (title, context note, text). Engines report
+# failures in-band as "❌ ..." messages; those fail the job so a rerun retries it.
+def run_job(engine, job):
+    pdf = engine.pdf_document(read_bytes(job["pdf"])) if "pdf" in job else None
+    image = engine.image_part(read_bytes(job["image"])) if "image" in job else None
+    audio = read_bytes(job["audio"]) if "audio" in job else None
+    institution = job.get("institution", "Aequilex")
+    task = job["task"]
+    if task == "research":
+        stream = engine.research_stream(job.get("query"), job.get("tone", "Academic"), job.get("difficulty", "Detailed"), institution, [], pdf_text=pdf, image_data=image, audio_bytes=audio,
+                                        enable_search=flag(job.get("enable_search", False)), strict_citation=flag(job.get("strict_citation", False)), context_key=BATCH_SCOPE)
+        title, note = "Aequilex Legal Document", job.get("query")
+    elif task == "drafting":
+        client_info = job.get("client_info")
+        if not client_info and (job.get("client_name") or job.get("opposing_party")): client_info = f"Client: {job.get('client_name', '')}\nOpposing Party: {job.get('opposing_party', '')}"
+        doc_type = job.get("doc_type", "Legal Notice (General)")
+        stream = engine.drafting_stream(doc_type, client_info, job.get("facts"), pdf_text=pdf, image_data=image, audio_bytes=audio, context_key=BATCH_SCOPE)
+        title, note = f"Draft: {doc_type}", f"Facts provided:\n{job.get('facts', '')}"
+    elif task == "translation":
+        stream = engine.translation_stream(job.get("text"), job["target_lang"], institution, pdf_text=pdf, image_data=image, audio_bytes=audio)
+        title, note = f"Aequilex Translation ({job['target_lang']})", f"Source Text:\n{job.get('text', '')}"
+    else:
+        stream = engine.vault_analysis_stream(pdf_text=pdf, image_data=image, audio_bytes=audio, context_key=BATCH_SCOPE)
+        title, note = "Aequilex Vault Record", None
+    text = "".join(stream)
+    if "❌" in text: raise RuntimeError(text[text.index("❌"):].splitlines()[0])
+    if not text.strip(): raise RuntimeError("empty response")
+    return title, note, text
+
+
+# --- CHECKPOINT ---
+# results.jsonl in the output directory, one line per finished attempt, flushed and fsynced as
+# each job ends. On startup every id whose latest line is "ok" is skipped, so an interrupted or
+# partly failed run is resumed by running the same command again.
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self.latest, torn = {}, False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    torn = not line.endswith("\n")
+                    try: record = json.loads(line)
+                    except ValueError: continue   # torn last line from a killed run
+                    self.latest[record["id"]] = record
+        self._fh = open(path, "a", encoding="utf-8")
+        if torn: self._fh.write("\n")   # so the next record starts on a line of its own
+        self._lock = threading.Lock()
+
+    def done(self, job_id): return self.latest.get(job_id, {}).get("status") == "ok"
+
+    def record(self, record):
+        with self._lock:
+            self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self.latest[record["id"]] = record
+
+    def close(self): self._fh.close()
+
+
+def execute(engine, job, out_dir):
+    started = time.monotonic()
+    record = {"id": job["id"], "task": job["task"]}
+    try:
+        title, note, text = run_job(engine, job)
+        docx_path = os.path.join(out_dir, re.sub(r"[^\w.-]+", "_", job["id"]) + ".docx")
+        with open(docx_path, "wb") as fh: fh.write(generate_word_document(note, text, title=title))
+        record.update(status="ok", docx=os.path.basename(docx_path), response=text)
+    except Exception as e:
+        log.warning("job %s failed: %s", job["id"], e)
+        record.update(status="failed", error=str(e))
+    record["seconds"] = round(time.monotonic() - started, 2)
+    return record
+
+
+def run_batch(engine, jobs, out_dir, concurrency=4, on_result=None):
+    # Returns the checkpoint records of this run's jobs (skipped ones included, from the checkpoint).
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(out_dir, "results.jsonl"))
+    try:
+        todo = [job for job in jobs if not checkpoint.done(job["id"])]
+        pool = ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="aequilex-batch")
+        try:
+            for future in as_completed([pool.submit(execute, engine, job, out_dir) for job in todo]):
+                record = future.result()
+                checkpoint.record(record)
+                if on_result: on_result(record)
+        finally:
+            # On Ctrl-C, queued jobs are dropped rather than run; they are picked up next time.
+            pool.shutdown(wait=False, cancel_futures=True)
+        return [checkpoint.latest[job["id"]] for job in jobs]
+    finally: checkpoint.close()
+
+
+# Settings come from the app's secrets file (TOML, same keys as st.secrets) with environment
+# variables of the same name taking precedence.
+def load_settings(path):
+    settings = {}
+    if path and os.path.exists(path):
+        with open(path, "rb") as fh: settings = tomllib.load(fh)
+    for key in ("GEMINI_API_KEY", "MODEL_HEDGE_AFTER_MS", "MODEL_MAX_CONCURRENCY", "TRANSLATION_RPS", "TRANSLATION_WORKERS", "DOC_CONTEXT_CACHE_TTL_S",
+                "EXTRACTION_CACHE_DIR", "EXTRACTION_CACHE_MB", "STATUTE_INDEX_PATH", "CITATION_INDEX_PATH"):
+        if os.environ.get(key): settings[key] = os.environ[key]
+    return settings
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run research, drafting, translation and vault jobs without the web UI.")
+    ap.add_argument("jobs", help="JSONL or CSV job file")
+    ap.add_argument("-o", "--out", default="batch-out")
+    ap.add_argument("-c", "--concurrency", type=int, default=4)
+    ap.add_argument("--secrets", default=".streamlit/secrets.toml")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    settings = load_settings(args.secrets)
+    if not settings.get("GEMINI_API_KEY"): sys.exit(f"GEMINI_API_KEY is not set (environment or {args.secrets})")
+    jobs = read_jobs(args.jobs)
+    engine = Engine(settings)
+    finished = [0]
+    def on_result(record):
+        finished[0] += 1
+        print(f"[{finished[0]}] {record['id']:<24} {record['task']:<12} {record['status']:<7} {record['seconds']:6.1f}s  {record.get('error', '')}", flush=True)
+    results = run_batch(engine, jobs, args.out, args.concurrency, on_result)
+    failed = [r["id"] for r in results if r["status"] != "ok"]
+    print(f"{len(results) - len(failed)}/{len(results)} jobs ok · results in {os.path.join(args.out, 'results.jsonl')}")
+    if failed:
+        print(f"failed: {', '.join(failed)} (re-run the same command to retry)")
+        sys.exit(1)
+
+
+# Guarded for the spawned PDF extraction workers, which re-import the main module.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import gzip
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# --- THREAD-SAFE LRU CACHE ---
+# Process-wide memo shared by every session (held via st.cache_resource in the app).
+class LRUCache:
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries: self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock: return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock: self._data.clear()
+
+    def __len__(self): return len(self._data)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# --- TTL CACHE WITH SINGLE-FLIGHT LOADS ---
+# LRU entries that also expire after `ttl` seconds. get_or_load() lets one caller per key run the
+# loader while concurrent callers for that key wait and reuse its result, so a burst of reloads
+# (e.g. every tab reconnecting after a deploy) costs one backend read per key. Loader results of
+# None are returned but not cached.
+class TTLCache:
+    def __init__(self, max_entries=1024, ttl=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()      # key -> (expires_at, value)
+        self._loading = {}              # key -> threading.Event while a load is in flight
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "loads": 0, "coalesced": 0, "expired": 0, "invalidated": 0}
+
+    def _lookup(self, key):
+        entry = self._data.get(key)
+        if entry is None: return False, None
+        if entry[0] <= self.clock():
+            del self._data[key]
+            self.counters["expired"] += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, entry[1]
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._lookup(key)
+            self.counters["hits" if found else "misses"] += 1
+            return value if found else default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries: self._data.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.counters["hits"] += 1
+                return value
+            self.counters["misses"] += 1
+            pending = self._loading.get(key)
+            if pending is None: self._loading[key] = threading.Event()
+        if pending is not None:
+            # Another caller is loading this key: wait for it, then read its result.
+            pending.wait()
+            with self._lock:
+                found, value = self._lookup(key)
+                if found:
+                    self.counters["coalesced"] += 1
+                    return value
+        try:
+            with self._lock: self.counters["loads"] += 1
+            value = loader()
+            if value is not None: self.put(key, value)
+            return value
+        finally:
+            if pending is None:
+                with self._lock: self._loading.pop(key).set()
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry: self.counters["invalidated"] += 1
+            return entry[1] if entry else None
+
+    def pop_where(self, predicate):
+        # Drops every entry whose value matches, e.g. all cached tokens of one account.
+        with self._lock:
+            stale = [k for k, (_, v) in self._data.items() if predicate(v)]
+            for k in stale: del self._data[k]
+            self.counters["invalidated"] += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock: self._data.clear()
+
+    def __len__(self): return len(self._data)
+
+    def hit_rate(self):
+        # Coalesced misses were served without a backend read, so they count as hits here.
+        total = self.counters["hits"] + self.counters["misses"]
+        return (self.counters["hits"] + self.counters["coalesced"]) / total if total else 0.0
+
+    def stats(self):
+        with self._lock: return {"entries": len(self._data), "hit_rate": self.hit_rate(), **self.counters}
+
+
+# --- ON-DISK CACHE TIER ---
+# Gzipped JSON files named by key (content hashes), capped at `max_bytes`. Reads refresh the
+# file mtime, so eviction drops the least recently used files first. Writes go through a temp
+# file + os.replace, so several app processes can share one directory safely.
+class DiskCache:
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    def _path(self, key): return os.path.join(self.directory, f"{key}.json.gz")
+
+    def _entries(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json.gz"):
+                try: info = entry.stat()
+                except OSError: continue
+                yield entry.path, info.st_mtime, info.st_size
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as fh: value = json.load(fh)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as fh: json.dump(value, fh)
+        size = os.path.getsize(tmp)
+        if size > self.max_bytes:
+            os.remove(tmp)
+            return
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += size
+            if self._size > self.max_bytes: self._evict()
+
+    def _evict(self):
+        # Rescan rather than trust the running total: other processes write here too.
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        self._size = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        for path, _, size in entries:
+            if self._size <= target: break
+            try: os.remove(path)
+            except OSError: continue
+            self._size -= size
@@ -0,0 +1,140 @@
+import argparse
+import gzip
+import json
+import os
+import re
+
+# One alternation, so a single regex pass finds every reporter format:
+#   (2017) 10 SCC 1 | 2021 SCC OnLine SC 123 | AIR 1973 SC 1461 | [1950] SCR 88, (1973) Supp SCR 1
+#   2023 INSC 123 | 2024:DHC:1234
+CITATION = re.compile(
+    r"\((?P<scc_y>\d{4})\)\s*(?P<scc_v>\d{1,2})\s*S\.?\s?C\.?\s?C\.?\s*(?P<scc_p>\d{1,5})"
+    r"|(?P<ol_y>\d{4})\s*S\.?C\.?C\.?\s*On\s?Line\s*(?P<ol_c>[A-Z][A-Za-z]{1,6})\s*(?P<ol_n>\d{1,6})"
+    r"|A\.?I\.?R\.?\s*(?P<air_y>\d{4})\s*(?P<air_c>S\.?C\.?|[A-Z][A-Za-z]{1,9})\s*(?P<air_p>\d{1,5})"
+    r"|[\[\(](?P<scr_y>\d{4})[\]\)]\s*(?:(?P<scr_v>\d{1,2}|Supp\.?)\s*)?S\.?\s?C\.?\s?R\.?\s*(?P<scr_p>\d{1,5})"
+    r"|(?P<insc_y>\d{4})\s*INSC\s*(?P<insc_n>\d{1,6})"
+    r"|\b(?P<nc_y>\d{4}):(?P<nc_c>[A-Z]{2,8}):(?P<nc_n>\d{1,6})\b")
+MAX_CITATION_CHARS = 48
+
+
+def normalize_match(m):
+    g = m.groupdict()
+    if g["scc_y"]: return f"SCC {g['scc_y']} {int(g['scc_v'])} {int(g['scc_p'])}"
+    if g["ol_y"]: return f"SCCOL {g['ol_y']} {g['ol_c'].upper()} {int(g['ol_n'])}"
+    if g["air_y"]: return f"AIR {g['air_y']} {g['air_c'].replace('.', '').upper()} {int(g['air_p'])}"
+    if g["scr_y"]:
+        vol = (g["scr_v"] or "").rstrip(".").upper() or "-"
+        return f"SCR {g['scr_y']} {int(vol) if vol.isdigit() else vol} {int(g['scr_p'])}"
+    if g["insc_y"]: return f"INSC {g['insc_y']} {int(g['insc_n'])}"
+    return f"NC {g['nc_y']} {g['nc_c']} {int(g['nc_n'])}"
+
+def normalize_citation(text):
+    m = CITATION.search(text)
+    return normalize_match(m) if m else None
+
+
+# --- OFFLINE CITATION INDEX ---
+# Hash of normalized citation -> (case name, year). Parallel citations of one judgment each get
+# their own key, so "(1973) 4 SCC 225" and "AIR 1973 SC 1461" both resolve to Kesavananda.
+# Built from JSONL records {"case_name", "year", "citations": [...]} with
+# `python -m aequilex.citations build cases.jsonl -o data/citations.idx.gz`.
+class CitationIndex:
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as fh: return cls(json.load(fh))
+
+    def save(self, path):
+        with gzip.open(path, "wt", encoding="utf-8") as fh: json.dump(self.entries, fh, separators=(",", ":"))
+
+    def add(self, citation, case_name, year=None):
+        key = normalize_citation(citation)
+        if key: self.entries[key] = [case_name, year]
+        return key
+
+    def get(self, key): return self.entries.get(key)
+
+    def __len__(self): return len(self.entries)
+
+
+# --- STREAMING VERIFIER ---
+# Wraps a text stream and flags citations that are not in the index, inline, as chunks arrive.
+# Only the last MAX_CITATION_CHARS of text are held back (a citation may straddle two chunks),
+# so the delay is a fraction of one chunk and each chunk costs a single regex pass.
+class CitationVerifier:
+    FLAG = " ⚠️ *[citation not found in verified index]*"
+
+    def __init__(self, index):
+        self.index = index
+        self.verified, self.unverified = [], []
+
+    def _check(self, m):
+        key = normalize_match(m)
+        if self.index.get(key) is not None:
+            self.verified.append(key)
+            return m.group(0)
+        self.unverified.append(m.group(0))
+        return m.group(0) + self.FLAG
+
+    def _emit(self, buf, final=False):
+        safe = len(buf) if final else len(buf) - MAX_CITATION_CHARS
+        out, pos = [], 0
+        for m in CITATION.finditer(buf):
+            if m.start() >= safe: break
+            out.append(buf[pos:m.start()])
+            out.append(self._check(m))
+            pos = m.end()
+        cut = max(pos, safe)
+        out.append(buf[pos:cut])
+        return "".join(out), buf[cut:]
+
+    def wrap(self, stream):
+        buf = ""
+        for chunk in stream:
+            buf += chunk
+            if len(buf) <= MAX_CITATION_CHARS: continue
+            text, buf = self._emit(buf)
+            if text: yield text
+        text, _ = self._emit(buf, final=True)
+        if text: yield text
+        if self.unverified:
+            yield f"\n\n---\n⚠️ **Citation check:** {len(self.unverified)} citation(s) could not be matched against the verified index; confirm them before relying on this answer."
+
+
+def build_index(sources):
+    index = CitationIndex()
+    for path in sources:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip(): continue
+                rec = json.loads(line)
+                for citation in rec.get("citations", []): index.add(citation, rec["case_name"], rec.get("year"))
+    return index
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile or query the offline case-citation index.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("sources", nargs="+")
+    b.add_argument("-o", "--out", default="data/citations.idx.gz")
+    q = sub.add_parser("check")
+    q.add_argument("index")
+    q.add_argument("text")
+    args = ap.parse_args()
+    if args.cmd == "build":
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        index = build_index(args.sources)
+        index.save(args.out)
+        print(f"Indexed {len(index)} citations into {args.out}")
+    else:
+        index = CitationIndex.load(args.index)
+        for m in CITATION.finditer(args.text):
+            key = normalize_match(m)
+            print(f"{'OK ' if index.get(key) else '?? '} {m.group(0)!r} -> {key} {index.get(key) or ''}")
+
+
+if __name__ == "__main__":
+    main()
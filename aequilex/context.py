@@ -0,0 +1,90 @@
+import math
+import threading
+
+
+# --- LOCAL TOKEN ESTIMATION ---
+# Cheap offline estimate (no count_tokens round trip): ~4 characters per token for Latin
+# script, while Devanagari/Tamil/etc. tokenize far denser, so non-ASCII counts almost 1:1.
+def estimate_tokens(text):
+    if not text: return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return math.ceil((len(text) - non_ascii) / 4 + non_ascii * 0.8) + 4
+
+def message_tokens(msg): return estimate_tokens(msg.get("content", ""))
+
+def extractive_summary(previous_summary, turns, max_tokens=600):
+    # Offline fallback when the summarizer model is unavailable: keep every user question and
+    # the opening of each answer, newest last, trimmed from the oldest end to fit the budget.
+    lines = [previous_summary] if previous_summary else []
+    for msg in turns:
+        text = " ".join((msg.get("content") or "").split())
+        if msg.get("role") == "user": lines.append(f"- User asked: {text[:300]}")
+        else: lines.append(f"  Answer gist: {text[:400]}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens: lines.pop(0)
+    return "\n".join(lines)
+
+
+# --- BOUNDED CONTEXT WINDOW ---
+# Keeps the newest turns verbatim within a per-model token budget and folds everything older
+# into one rolling summary. Folding drops the verbatim tail to `keep_ratio` of the budget, so the
+# summarizer runs once every few turns rather than on every turn. Summary state is cached per
+# (email, workspace_id) and persisted through `load_state`/`save_state`, so it survives restarts
+# and is shared by every session on the workspace. A key of None trims without remembering.
+class ContextManager:
+    def __init__(self, budgets, summarize, load_state=None, save_state=None, default_budget=16000, keep_ratio=0.5, min_history_budget=1000, summary_tokens=600):
+        self.budgets = budgets
+        self.summarize = summarize
+        self.load_state = load_state
+        self.save_state = save_state
+        self.default_budget = default_budget
+        self.keep_ratio = keep_ratio
+        self.min_history_budget = min_history_budget
+        self.summary_tokens = summary_tokens
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def _state(self, key):
+        if key is None: return {"summary": "", "covered_id": 0}
+        with self._lock:
+            state = self._states.get(key)
+        if state is None:
+            state = {"summary": "", "covered_id": 0}
+            if self.load_state:
+                try: state = self.load_state(key) or state
+                except Exception: pass
+            with self._lock: state = self._states.setdefault(key, state)
+        return state
+
+    def reset(self, key):
+        with self._lock: self._states.pop(key, None)
+
+    def prepare(self, key, history, model_name, reserve_tokens=0):
+        budget = max(self.budgets.get(model_name, self.default_budget) - reserve_tokens, self.min_history_budget)
+        state = self._state(key)
+        summary = state["summary"]
+        pending = [m for m in history if m.get("id") is None or m["id"] > state["covered_id"]]
+        if estimate_tokens(summary) + sum(message_tokens(m) for m in pending) <= budget: return summary, pending
+
+        # Fold the oldest turns until the verbatim tail fits keep_ratio of what the summary leaves.
+        target = max((budget - self.summary_tokens) * self.keep_ratio, 0)
+        recent, used = [], 0
+        for msg in reversed(pending):
+            cost = message_tokens(msg)
+            if recent and used + cost > target: break
+            recent.append(msg); used += cost
+        recent.reverse()
+        folded = [m for m in pending[:len(pending) - len(recent)] if m.get("id") is not None]
+        if not folded: return summary, recent
+
+        try: summary = self.summarize(summary, folded) or extractive_summary(summary, folded, self.summary_tokens)
+        except Exception: summary = extractive_summary(summary, folded, self.summary_tokens)
+        new_state = {"summary": summary, "covered_id": max(m["id"] for m in folded)}
+        if key is None: return summary, recent
+        with self._lock:
+            # Another session may have folded further meanwhile; keep whichever covers more.
+            current = self._states.get(key)
+            if current is None or new_state["covered_id"] > current["covered_id"]: self._states[key] = new_state
+        if self.save_state:
+            try: self.save_state(key, new_state)
+            except Exception: pass
+        return summary, recent
@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+
+from aequilex.context import estimate_tokens
+
+log = logging.getLogger("aequilex.doc_sessions")
+
+
+# --- DOCUMENT SESSIONS (provider-side context caching) ---
+# A document is uploaded to the model provider once per (scope, document, model) as a cached
+# context; later turns send only the handle. Handles are refreshed shortly before they expire,
+# recreated after the provider drops them (`invalidate`), and creation failures are not retried
+# for `failure_backoff` seconds so an outage does not add a failed call to every turn.
+#
+#   create(model, text, ttl) -> handle    refresh(handle, ttl) -> None    delete(handle) -> None
+class DocumentSessions:
+    def __init__(self, create, refresh=None, delete=None, ttl=3600.0, refresh_margin=300.0, min_tokens=4096, failure_backoff=120.0, clock=time.time):
+        self.create = create
+        self.refresh = refresh
+        self.delete = delete
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.min_tokens = min_tokens
+        self.failure_backoff = failure_backoff
+        self.clock = clock
+        self._entries = {}   # (scope, doc_hash, model) -> {"handle", "expires_at", "tokens"}
+        self._failed = {}    # same key -> time of last failed create
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.counters = {"created": 0, "reused": 0, "refreshed": 0, "expired": 0, "invalidated": 0, "failures": 0, "skipped_small": 0, "tokens_cached": 0, "tokens_saved": 0}
+
+    def _count(self, name, n=1):
+        with self._lock: self.counters[name] += n
+
+    def _key_lock(self, key):
+        with self._lock: return self._locks.setdefault(key, threading.Lock())
+
+    def handle(self, scope, doc_hash, model, load_text):
+        # Returns a live handle, or None when the document should be sent inline this turn.
+        key = (scope, doc_hash, model)
+        with self._key_lock(key):
+            now = self.clock()
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] - now > self.refresh_margin:
+                self._count("reused"); self._count("tokens_saved", entry["tokens"])
+                return entry["handle"]
+            if entry and entry["expires_at"] > now and self.refresh:
+                try:
+                    self.refresh(entry["handle"], self.ttl)
+                    entry["expires_at"] = now + self.ttl
+                    self._count("refreshed"); self._count("reused"); self._count("tokens_saved", entry["tokens"])
+                    return entry["handle"]
+                except Exception as e:
+                    log.info("context cache refresh failed, recreating: %s", e)
+            if entry:
+                self._count("expired")
+                self._entries.pop(key, None)
+            if now - self._failed.get(key, float("-inf")) < self.failure_backoff: return None
+            text = load_text()
+            tokens = estimate_tokens(text)
+            if tokens < self.min_tokens:
+                self._count("skipped_small")
+                return None
+            try: handle = self.create(model, text, self.ttl)
+            except Exception as e:
+                log.warning("context cache create failed for %s: %s", model, e)
+                self._failed[key] = now
+                self._count("failures")
+                return None
+            self._failed.pop(key, None)
+            self._entries[key] = {"handle": handle, "expires_at": now + self.ttl, "tokens": tokens}
+            self._count("created"); self._count("tokens_cached", tokens)
+            return handle
+
+    def invalidate(self, handle):
+        # The provider rejected the handle (expired early or deleted): forget it so the next
+        # turn uploads afresh.
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry["handle"] == handle:
+                    del self._entries[key]
+                    self.counters["invalidated"] += 1
+
+    def drop_scope(self, scope): self._drop(lambda s: s == scope)
+
+    def drop_owner(self, owner):
+        # Scopes are (owner, workspace_id): on logout every workspace's uploads go at once.
+        self._drop(lambda s: isinstance(s, tuple) and s[:1] == (owner,))
+
+    def _drop(self, match):
+        with self._lock:
+            stale = [(k, e["handle"]) for k, e in self._entries.items() if match(k[0])]
+            for k, _ in stale:
+                del self._entries[k]
+                self._failed.pop(k, None)
+        for _, handle in stale:
+            if self.delete:
+                try: self.delete(handle)
+                except Exception: pass
+
+    def stats(self):
+        with self._lock: return {"live": len(self._entries), **self.counters}
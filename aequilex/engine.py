@@ -0,0 +1,478 @@
+import contextlib
+import hashlib
+import io
+import multiprocessing
+import os
+import socket
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from docx import Document
+from google import genai
+from google.genai import errors as genai_errors
+from google.genai import types
+
+from aequilex.cache import DiskCache, LRUCache
+from aequilex.citations import CitationIndex, CitationVerifier
+from aequilex.context import ContextManager, estimate_tokens
+from aequilex.doc_sessions import DocumentSessions
+from aequilex.extraction import iter_pdf_pages
+from aequilex.media import compact_audio, compact_image
+from aequilex.metrics import Metrics
+from aequilex.pool import PooledResource
+from aequilex.ratelimit import TokenBucket
+from aequilex.retrieval import DocumentIndex, document_context
+from aequilex.router import ModelRouter, RouterExhausted, on_cancel
+from aequilex.scheduler import DEFAULT_TIERS, AdmissionRejected, ModelScheduler
+from aequilex.statutes import StatuteIndex, mentioned_acts, parse_reference, parse_references, render_provision
+from aequilex.translation import ChunkedTranslator, extract_glossary_terms, parse_glossary
+
+MODELS_TO_TRY = ['gemini-2.5-flash', 'gemini-2.5-pro', 'gemini-2.0-flash']
+# Prompt token budget per model. Deliberately far below the hard limits: beyond this, history
+# stops paying for itself in latency and cost, and older turns are folded into a summary.
+MODEL_CONTEXT_BUDGETS = {'gemini-2.5-flash': 24000, 'gemini-2.5-pro': 32000, 'gemini-2.0-flash': 16000}
+SUMMARIZER_MODEL = 'gemini-2.0-flash'
+# Whole documents are uploaded to the provider once per (user, workspace, document, model) as a
+# cached context and referenced by handle on later turns. DOC_CONTEXT_CACHE_TTL_S = 0 turns it off.
+DOC_CACHE_MAX_TOKENS = 120000
+CACHED_DOCUMENT_NOTE = {"text": "[The user's uploaded document is in the cached context above. Base your answer on it where relevant, citing page numbers.]"}
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def is_auth_error(e): return "API_KEY_INVALID" in str(e) or "not found" in str(e).lower()
+
+def is_cache_error(e): return "cachedcontent" in str(e).lower().replace(" ", "")
+
+def with_cached_document(config, handle):
+    # Cached contexts cannot be combined with a request-level system instruction.
+    return (config or types.GenerateContentConfig()).model_copy(update={"cached_content": handle, "system_instruction": None})
+
+def translation_instruction(target_lang, institution):
+    return f"ROLE: You are an expert Legal Translator at {institution}. TASK: Translate the provided legal document/text/audio accurately into highly formal {target_lang}. Preserve all legal meanings perfectly. Keep Latin maxims in Latin with translated meanings in brackets."
+
+def abort_response(response):
+    # Shut the socket down first: closing alone does not wake a thread blocked reading it.
+    if response.is_closed: return
+    stream = response.extensions.get("network_stream")
+    sock = stream.get_extra_info("socket") if stream else None
+    if sock is not None:
+        with contextlib.suppress(OSError): sock.shutdown(socket.SHUT_RDWR)
+    response.close()
+
+def generate_word_document(query, response, title="Aequilex Legal Document"):
+    doc = Document()
+    doc.add_heading(title, 0)
+    if query:
+        doc.add_heading('Context / Facts:', level=1)
+        doc.add_paragraph(query)
+    doc.add_heading('Legal Analysis:', level=1)
+    clean_response = response.replace("**", "").replace("*", "")
+    doc.add_paragraph(clean_response)
+    bio = io.BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
+
+
+# --- AI ENGINE ---
+# Every model-facing path (research, drafting, translation, vault analysis) plus the process-wide
+# resources behind them: client pool, router, scheduler, caches, statute and citation indexes and
+# document sessions. No Streamlit import: the app holds one Engine in st.cache_resource and
+# passes st.secrets as `settings`; aequilex.batch builds one from a secrets file or environment.
+# Resources are created on first use, so importing or constructing an Engine is cheap.
+# `storage` (optional) persists Research Core conversation summaries.
+class Engine:
+    def __init__(self, settings=None, storage=None, metrics=None):
+        self.settings = settings if settings is not None else {}
+        self.storage = storage
+        self.metrics = metrics or Metrics(enabled=False)
+        self._resources = {}
+        self._lock = threading.RLock()
+
+    def _resource(self, name, factory):
+        with self._lock:
+            if name not in self._resources: self._resources[name] = factory()
+            return self._resources[name]
+
+    # --- shared resources ---
+    @property
+    def gemini_pool(self):
+        # Every response opened on a router attempt thread registers an abort, so an abandoned
+        # hedge or timed-out model stops reading instead of holding its thread and connection.
+        def build():
+            http_options = types.HttpOptions(client_args={"event_hooks": {"response": [lambda response: on_cancel(lambda: abort_response(response))]}})
+            return PooledResource(lambda: genai.Client(api_key=self.settings["GEMINI_API_KEY"], http_options=http_options), name="gemini")
+        return self._resource("gemini_pool", build)
+
+    def client(self): return self.gemini_pool.get()
+
+    def release_client(self, client, error):
+        # API errors mean the server answered; only transport failures warrant a fresh client.
+        if not isinstance(error, (genai_errors.APIError, AdmissionRejected)): self.gemini_pool.invalidate(client)
+
+    @property
+    def document_cache(self): return self._resource("document_cache", lambda: LRUCache(max_entries=32))
+
+    @property
+    def extraction_disk_cache(self):
+        # Optional second tier for extracted page text (EXTRACTION_CACHE_DIR): survives restarts
+        # and is shared by every process on the host, capped at EXTRACTION_CACHE_MB.
+        def build():
+            cache_dir = self.settings.get("EXTRACTION_CACHE_DIR")
+            return DiskCache(cache_dir, max_bytes=int(self.settings.get("EXTRACTION_CACHE_MB", 512)) * 1024 * 1024) if cache_dir else None
+        return self._resource("extraction_disk_cache", build)
+
+    @property
+    def extraction_pool(self):
+        # Spawned (not forked) workers: forking a threaded server is unsafe, and the workers only
+        # need aequilex.extraction.
+        return self._resource("extraction_pool", lambda: ProcessPoolExecutor(max_workers=max((os.cpu_count() or 2) - 1, 1), mp_context=multiprocessing.get_context("spawn")))
+
+    @property
+    def media_cache(self): return self._resource("media_cache", lambda: LRUCache(max_entries=256))
+
+    @property
+    def statute_index(self):
+        # Precompiled offline index of BNS, BNSS, BSA and the Constitution, built with
+        # `python -m aequilex.statutes build <sources> -o data/statutes.idx`. Missing index = feature off.
+        path = self.settings.get("STATUTE_INDEX_PATH", "data/statutes.idx")
+        return self._resource("statute_index", lambda: StatuteIndex(path) if os.path.exists(path) else None)
+
+    @property
+    def citation_index(self):
+        # Normalized citations of verified judgments, built with
+        # `python -m aequilex.citations build <cases.jsonl> -o data/citations.idx.gz`. Checked in Strict Citation mode.
+        path = self.settings.get("CITATION_INDEX_PATH", "data/citations.idx.gz")
+        return self._resource("citation_index", lambda: CitationIndex.load(path) if os.path.exists(path) else None)
+
+    @property
+    def router(self):
+        # Breakers opened by one caller's failed call spare everyone else the timeout.
+        # MODEL_HEDGE_AFTER_MS (unset = off) launches a backup model when the primary is slow.
+        def build():
+            hedge_ms = self.settings.get("MODEL_HEDGE_AFTER_MS")
+            return ModelRouter(
+                MODELS_TO_TRY,
+                ttft_deadline={'gemini-2.5-flash': 12.0, 'gemini-2.5-pro': 25.0, 'gemini-2.0-flash': 10.0, **self.settings.get("MODEL_TTFT_DEADLINES_S", {})},
+                hedge_after=float(hedge_ms) / 1000 if hedge_ms else None,
+                is_fatal=is_auth_error)
+        return self._resource("router", build)
+
+    @property
+    def context_manager(self):
+        storage = self.storage
+        return self._resource("context_manager", lambda: ContextManager(
+            MODEL_CONTEXT_BUDGETS, self.summarize_turns,
+            load_state=(lambda key: storage.get_context_summary(key[0], workspace_id=key[1])) if storage else None,
+            save_state=(lambda key, state: storage.save_context_summary(key[0], state["summary"], state["covered_id"], workspace_id=key[1])) if storage else None))
+
+    @property
+    def scheduler(self):
+        # Per-user and per-tier token buckets, weighted fair queuing between tiers and a global
+        # concurrency cap. SCHEDULER_TIERS overrides the tier table; MODEL_MAX_CONCURRENCY sets the cap.
+        def build():
+            tiers = {name: dict(cfg) for name, cfg in self.settings.get("SCHEDULER_TIERS", DEFAULT_TIERS).items()}
+            return ModelScheduler(tiers, max_concurrent=int(self.settings.get("MODEL_MAX_CONCURRENCY", 16)), max_wait=float(self.settings.get("MODEL_QUEUE_MAX_WAIT_S", 30)))
+        return self._resource("scheduler", build)
+
+    @property
+    def document_sessions(self):
+        def build():
+            ttl = float(self.settings.get("DOC_CONTEXT_CACHE_TTL_S", 3600))
+            if ttl <= 0: return None
+            def create(model, text, ttl):
+                cache = self.client().caches.create(model=model, config=types.CreateCachedContentConfig(contents=[types.Content(role="user", parts=[types.Part(text=text)])], display_name="aequilex-document", ttl=f"{int(ttl)}s"))
+                return cache.name
+            refresh = lambda handle, ttl: self.client().caches.update(name=handle, config=types.UpdateCachedContentConfig(ttl=f"{int(ttl)}s"))
+            delete = lambda handle: self.client().caches.delete(name=handle)
+            return DocumentSessions(create, refresh, delete, ttl=ttl)
+        return self._resource("document_sessions", build)
+
+    @property
+    def translation_cache(self):
+        # Translated chunks keyed by (chunk hash, language) plus per-document glossaries.
+        return self._resource("translation_cache", lambda: LRUCache(max_entries=4000))
+
+    @property
+    def translation_limiter(self):
+        # Caps chunk requests per second across every caller (TRANSLATION_RPS).
+        def build():
+            rps = float(self.settings.get("TRANSLATION_RPS", 4))
+            return TokenBucket(rps, burst=max(rps, 1))
+        return self._resource("translation_limiter", build)
+
+    def model_slot(self, user, **kwargs):
+        return self.scheduler.slot(user['email'], user.get('tier'), **kwargs) if user else contextlib.nullcontext()
+
+    def model_job(self, user, **kwargs):
+        # One admission for a multi-call job; yields slot(**kwargs) for each of its calls.
+        if not user: return contextlib.nullcontext(lambda **_: contextlib.nullcontext())
+        return self.scheduler.job(user['email'], user.get('tier'), **kwargs)
+
+    # --- inputs ---
+    def compact_media(self, kind, data):
+        # Downsampled grayscale JPEGs and 16 kHz mono audio, memoized by content hash.
+        key = (kind, hashlib.sha256(data).hexdigest())
+        cached = self.media_cache.get(key)
+        if cached is None:
+            cached = compact_image(data) if kind == "image" else compact_audio(data)
+            self.media_cache.put(key, cached)
+        return cached
+
+    def image_part(self, data):
+        payload, mime = self.compact_media("image", data)
+        return types.Part.from_bytes(data=payload, mime_type=mime)
+
+    def audio_part(self, data):
+        payload, mime = self.compact_media("audio", data)
+        return types.Part.from_bytes(data=payload, mime_type=mime)
+
+    def pdf_document(self, data, extract=None):
+        # A DocumentIndex keyed by SHA-256 of the file, so the same PDF is extracted once.
+        # extract(data) -> iterable of page texts, in order; defaults to parallel extraction
+        # without progress reporting. Each page is chunked and indexed as it arrives, while the
+        # process pool is still extracting later shards.
+        doc_hash = hashlib.sha256(data).hexdigest()
+        doc = self.document_cache.get(doc_hash)
+        if doc is None:
+            disk_cache = self.extraction_disk_cache
+            pages = disk_cache.get(doc_hash) if disk_cache else None
+            if pages is None:
+                doc = DocumentIndex(doc_hash)
+                for text in (extract(data) if extract else iter_pdf_pages(data, executor=self.extraction_pool)): doc.add_page(text)
+                if disk_cache: disk_cache.put(doc_hash, doc.pages)
+            else: doc = DocumentIndex(doc_hash, pages)
+            self.document_cache.put(doc_hash, doc)
+        return doc
+
+    # --- grounding ---
+    def summarize_turns(self, previous_summary, turns):
+        transcript = "\n\n".join(f"{'USER' if m['role'] == 'user' else 'AEQUILEX'}: {m['content']}" for m in turns)
+        prompt = f"Update the running summary of a legal research conversation. Keep statutes, sections, case names, citations, facts, and open questions. Max 350 words, Markdown bullets.\n\n[CURRENT SUMMARY]:\n{previous_summary or '(none)'}\n\n[NEW TURNS TO FOLD IN]:\n{transcript}"
+        response = self.client().models.generate_content(model=SUMMARIZER_MODEL, contents=prompt, config=types.GenerateContentConfig(temperature=0.1, max_output_tokens=800))
+        return response.text
+
+    def statute_lookup(self, query):
+        statutes, ref = self.statute_index, parse_reference(query or "")
+        return statutes.lookup(*ref) if statutes and ref else None
+
+    def statute_grounding(self, query, k=3, token_budget=1500):
+        statutes = self.statute_index
+        if not statutes or not query: return ""
+        hits = [p for p, _ in statutes.search(query, k=k, acts=mentioned_acts(query) or None)]
+        # Every provision the query cites goes first, ahead of the ranked matches.
+        exact = [p for p in (statutes.lookup(*ref) for ref in parse_references(query) if ref[0]) if p]
+        cited = {(p["act"], p["number"]) for p in exact}
+        hits = exact + [p for p in hits if (p["act"], p["number"]) not in cited]
+        blocks, used = [], 0
+        for p in hits[:max(k, len(exact))]:
+            block = render_provision(p)
+            if used + estimate_tokens(block) > token_budget: break
+            blocks.append(block)
+            used += estimate_tokens(block)
+        return "\n\n---\n\n".join(blocks)
+
+    # --- document sessions ---
+    def document_handle(self, doc, model_name, scope):
+        sessions = self.document_sessions
+        # Documents over DOC_CACHE_MAX_TOKENS are never cached (a truncated copy would hide the
+        # later pages); they stay inline with per-request retrieval.
+        if not sessions or scope is None or not isinstance(doc, DocumentIndex) or not doc or doc.tokens > DOC_CACHE_MAX_TOKENS: return None
+        return sessions.handle(scope, doc.doc_hash, model_name, lambda: f"[DOCUMENT UPLOADED BY USER — FULL TEXT]:\n{doc.render(range(len(doc.chunks)))}")
+
+    def stream_with_document(self, client, model_name, build, handle, module):
+        yield from self.metrics.stream(self._stream_with_document(client, model_name, build, handle), module=module, model=model_name)
+
+    def _stream_with_document(self, client, model_name, build, handle):
+        # build(handle) -> (contents, config); handle (from document_handle) None means "send the
+        # document inline". If the provider has already dropped the cached context, retry inline
+        # before any text is shown.
+        yielded = False
+        try:
+            contents, config = build(handle)
+            for chunk in client.models.generate_content_stream(model=model_name, contents=contents, config=config):
+                if chunk.text:
+                    yielded = True
+                    yield chunk.text
+        except Exception as e:
+            if handle is None or yielded or not is_cache_error(e): raise
+            self.document_sessions.invalidate(handle)
+            contents, config = build(None)
+            for chunk in client.models.generate_content_stream(model=model_name, contents=contents, config=config):
+                if chunk.text: yield chunk.text
+
+    # --- engines ---
+    def research_stream(self, query, tone, difficulty, institution, chat_history, pdf_text=None, image_data=None, audio_bytes=None, enable_search=False, strict_citation=False, context_key=None):
+        try: client = self.client()
+        except Exception as e:
+            yield f"❌ **System Config Error:** {str(e)}"
+            return
+
+        sys_instruction = f"ROLE: You are AEQUILEX, an elite legal AI for {institution}.\nTONE: {tone} | DEPTH: {difficulty}\nMANDATE: Prioritize Indian Statutes (BNS, BNSS, BSA, Constitution). Cite relevant Case Laws. Use Markdown."
+        if strict_citation: sys_instruction += "\nCRITICAL RULE (STRICT CITATION MODE): You MUST ONLY cite real, verifiable Indian case laws. Provide the exact year, volume, and court. Under NO circumstances should you invent or hallucinate a case. If you cannot find a verifiable precedent, explicitly state 'No verifiable case law found for this specific query'."
+
+        config = types.GenerateContentConfig(temperature=0.1 if strict_citation else 0.3, system_instruction=sys_instruction)
+        if enable_search: config.tools = [{"google_search": {}}]
+
+        current_parts = []
+        doc_part = {"text": f"[DOCUMENT CONTEXT UPLOADED BY USER — MOST RELEVANT PASSAGES]:\n{document_context(pdf_text, query)}\n\n(Base your answer heavily on the document above if relevant, citing page numbers)."} if pdf_text else None
+        if doc_part: current_parts.append(doc_part)
+        grounding = self.statute_grounding(query)
+        if grounding: current_parts.append({"text": f"[VERBATIM STATUTORY PROVISIONS FROM THE LOCAL BARE ACT INDEX]:\n{grounding}\n\n(Quote these provisions exactly where relevant; do not paraphrase them as if quoting.)"})
+        if image_data: current_parts.append(image_data)
+        if audio_bytes: current_parts.append(self.audio_part(audio_bytes))
+        if query: current_parts.append({"text": f"USER QUERY: {query}"})
+
+        if not current_parts and not chat_history: return
+        reserve_tokens = estimate_tokens(sys_instruction) + sum(estimate_tokens(p["text"]) for p in current_parts if isinstance(p, dict) and "text" in p)
+
+        # History folding (which may call the summarizer) and the document upload run once, here,
+        # rather than in the opener: there they would count against each model's TTFT deadline
+        # and run again for every hedge. Both are sized for the primary model; the fallbacks'
+        # budgets are likewise far below their hard limits, and they get the document inline.
+        primary = MODELS_TO_TRY[0]
+        with self.metrics.timer(module="research", stage="context"): summary, recent = self.context_manager.prepare(context_key, chat_history, primary, reserve_tokens=reserve_tokens)
+        # Live web search adds tools, which cached contexts do not allow.
+        doc_handle = self.document_handle(pdf_text, primary, None if enable_search else context_key)
+        contents = []
+        if summary: contents.append({"role": "user", "parts": [{"text": f"[SUMMARY OF EARLIER CONVERSATION IN THIS CASE FOLDER]:\n{summary}"}]})
+        for msg in recent:
+            role = "user" if msg["role"] == "user" else "model"
+            contents.append({"role": role, "parts": [{"text": msg["content"]}]})
+
+        def build(handle):
+            if not handle: return contents + ([{"role": "user", "parts": current_parts}] if current_parts else []), config
+            parts = [{"text": f"[INSTRUCTIONS]:\n{sys_instruction}"}, CACHED_DOCUMENT_NOTE] + [p for p in current_parts if p is not doc_part]
+            return contents + [{"role": "user", "parts": parts}], with_cached_document(config, handle)
+
+        # Runs on a router worker thread, possibly twice at once when a hedge fires.
+        def open_model_stream(model_name):
+            try:
+                yield from self.stream_with_document(client, model_name, build, doc_handle if model_name == primary else None, "research")
+            except Exception as e:
+                self.release_client(client, e)
+                raise
+
+        stream = self.router.stream(open_model_stream)
+        citation_index = self.citation_index if strict_citation else None
+        if citation_index: stream = CitationVerifier(citation_index).wrap(stream)
+        try:
+            yield from stream
+        except RouterExhausted:
+            yield "❌ **System Unavailable:** Aequilex AI servers failed to respond."
+        except Exception as e:
+            if is_auth_error(e): yield "❌ **Authentication Failed:** API key invalid or revoked."
+            else: yield f"\n\n❌ **Stream Interrupted:** {str(e)}"
+
+    def drafting_stream(self, doc_type, client_info, facts, pdf_text=None, image_data=None, audio_bytes=None, context_key=None):
+        try: client = self.client()
+        except Exception:
+            yield "❌ **System Config Error.**"
+            return
+
+        sys_instruction = f"""ROLE: You are an expert Legal Draftsman. TASK: Draft a professional, court-ready '{doc_type}'. MANDATE: Use strict, formal Indian legal terminology. Format properly using clear headings and numbered paragraphs. Use placeholders like [DATE] or [AMOUNT] for missing facts. Base the entire draft strictly on the provided facts and documents. Do not include conversational filler."""
+        parts = [{"text": sys_instruction}]
+        doc_part = {"text": f"\n[REFERENCE DOCUMENT UPLOADED]:\n{document_context(pdf_text, ' '.join(filter(None, [doc_type, client_info, facts])))}"} if pdf_text else None
+        if doc_part: parts.append(doc_part)
+        if image_data: parts.append(image_data)
+        if client_info: parts.append({"text": f"\n[CLIENT DETAILS]:\n{client_info}"})
+        if facts: parts.append({"text": f"\n[CASE FACTS]:\n{facts}"})
+        if audio_bytes: parts.append(self.audio_part(audio_bytes))
+
+        def build(handle):
+            if not handle: return [{"role": "user", "parts": parts}], None
+            return [{"role": "user", "parts": [CACHED_DOCUMENT_NOTE if p is doc_part else p for p in parts]}], with_cached_document(None, handle)
+
+        try:
+            yield from self.stream_with_document(client, 'gemini-2.5-flash', build, self.document_handle(pdf_text, 'gemini-2.5-flash', context_key), "drafting")
+        except Exception as e:
+            self.release_client(client, e)
+            yield f"❌ **Drafting Engine Error:** {str(e)}"
+
+    def build_document_glossary(self, client, doc_text, target_lang, slot=contextlib.nullcontext):
+        terms = extract_glossary_terms(doc_text)
+        if not terms: return {}
+        key = ("glossary", hashlib.sha256(doc_text.encode()).hexdigest(), target_lang)
+        cached = self.translation_cache.get(key)
+        if cached is not None: return cached
+        prompt = f"Give the standard formal {target_lang} legal rendering for each term below, one per line as `term => rendering`. For Latin maxims keep the Latin and add the meaning in brackets.\n\n" + "\n".join(terms)
+        try:
+            with slot(): glossary = parse_glossary(client.models.generate_content(model='gemini-2.5-flash', contents=prompt, config=types.GenerateContentConfig(temperature=0.0)).text)
+        except Exception as e:
+            self.release_client(client, e)
+            return {}
+        self.translation_cache.put(key, glossary)
+        return glossary
+
+    def translation_stream(self, text, target_lang, institution, pdf_text=None, image_data=None, audio_bytes=None, user=None):
+        try: client = self.client()
+        except Exception:
+            yield "❌ **System Config Error.**"
+            return
+
+        sys_instruction = translation_instruction(target_lang, institution)
+
+        # Documents and pasted text: map-reduce over paragraph/section chunks, streamed back in order.
+        doc_text = "\n\n".join(filter(None, [pdf_text.text if isinstance(pdf_text, DocumentIndex) else pdf_text, text]))
+        if doc_text:
+            # The document is admitted once as a job; each chunk still queues for its own slot, so
+            # one bulk job cannot crowd out other users, but it is not charged per chunk.
+            with contextlib.ExitStack() as stack:
+                try: slot = stack.enter_context(self.model_job(user, max_wait=300))
+                except AdmissionRejected as e:
+                    yield f"❌ **Rate Limited:** {e}. Please retry in about {max(e.retry_after, 1):.0f}s."
+                    return
+                glossary = self.build_document_glossary(client, doc_text, target_lang, slot)
+                glossary_note = ("\n[GLOSSARY — USE THESE RENDERINGS EXACTLY]:\n" + "\n".join(f"{k} => {v}" for k, v in glossary.items())) if glossary else ""
+
+                def translate_chunk(chunk, lang, _glossary):
+                    prompt = f"{sys_instruction}{glossary_note}\n\nThis is one section of a longer document; translate it completely and output only the translation, keeping headings and numbering.\n\n[SECTION TO TRANSLATE]:\n{chunk}"
+                    try:
+                        # Streamed and joined, so TTFT and tokens/s are recorded per chunk like the other modules.
+                        with slot():
+                            pieces = (c.text for c in client.models.generate_content_stream(model='gemini-2.5-flash', contents=prompt) if c.text)
+                            return "".join(self.metrics.stream(pieces, module="translate", model='gemini-2.5-flash'))
+                    except Exception as e:
+                        self.release_client(client, e)
+                        raise
+
+                translator = ChunkedTranslator(translate_chunk, self.translation_cache, limiter=self.translation_limiter, max_workers=int(self.settings.get("TRANSLATION_WORKERS", 4)))
+                yield from translator.stream(doc_text, target_lang, glossary)
+            if not (image_data or audio_bytes): return
+            yield "\n\n---\n\n"
+
+        # Images and audio still go in one multimodal request.
+        parts = [{"text": sys_instruction}]
+        if image_data: parts.append(image_data)
+        if audio_bytes: parts.append(self.audio_part(audio_bytes))
+        if len(parts) == 1: return
+
+        try:
+            with self.model_slot(user):
+                response_stream = client.models.generate_content_stream(model='gemini-2.5-flash', contents=[{"role": "user", "parts": parts}])
+                yield from self.metrics.stream((chunk.text for chunk in response_stream if chunk.text), module="translate", model='gemini-2.5-flash')
+        except Exception as e:
+            self.release_client(client, e)
+            yield f"❌ **Translation Engine Error:** {str(e)}"
+
+    def vault_analysis_stream(self, pdf_text=None, image_data=None, audio_bytes=None, context_key=None):
+        try: client = self.client()
+        except Exception:
+            yield "❌ **System Config Error.**"
+            return
+
+        sys_instruction = "ROLE: You are an archiving assistant for Aequilex. Extract the key legal facts, summary, and core arguments from the provided document, image, or audio memo. Format it cleanly in Markdown so it can be saved to a database."
+        parts = [{"text": sys_instruction}]
+        doc_part = {"text": f"\n[DOCUMENT TO ARCHIVE]:\n{document_context(pdf_text, mode='overview')}"} if pdf_text else None
+        if doc_part: parts.append(doc_part)
+        if image_data: parts.append(image_data)
+        if audio_bytes: parts.append(self.audio_part(audio_bytes))
+
+        def build(handle):
+            if not handle: return [{"role": "user", "parts": parts}], None
+            return [{"role": "user", "parts": [CACHED_DOCUMENT_NOTE if p is doc_part else p for p in parts]}], with_cached_document(None, handle)
+
+        try:
+            yield from self.stream_with_document(client, 'gemini-2.5-flash', build, self.document_handle(pdf_text, 'gemini-2.5-flash', context_key), "vault")
+        except Exception as e:
+            self.release_client(client, e)
+            yield f"❌ **Archiving Error:** {str(e)}"
@@ -0,0 +1,83 @@
+import io
+import os
+import signal
+import tempfile
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import PyPDF2
+
+PAGE_TIMEOUT = 10.0
+SHARD_PAGES = 16
+PARALLEL_MIN_PAGES = 32
+
+
+class PageTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame): raise PageTimeout()
+
+def _extract_page(page, timeout):
+    # SIGALRM gives a true per-page limit inside the worker; without it (Windows, non-main
+    # threads) the caller's shard-level deadline is the only guard.
+    use_alarm = timeout and hasattr(signal, "setitimer")
+    if use_alarm:
+        try:
+            signal.signal(signal.SIGALRM, _on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        except ValueError: use_alarm = False
+    try: return page.extract_text() or "", None
+    except PageTimeout: return "", "timeout"
+    except Exception as e: return "", f"error: {e}"
+    finally:
+        if use_alarm: signal.setitimer(signal.ITIMER_REAL, 0)
+
+def _extract_shard(path, start, end, timeout):
+    # Runs in a worker process. The PDF is handed over as a temp-file path, not bytes, so a
+    # 50 MB upload is not pickled once per shard.
+    reader = PyPDF2.PdfReader(path)
+    return [_extract_page(reader.pages[i], timeout) for i in range(start, end)]
+
+
+# --- PAGE-LEVEL EXTRACTION PIPELINE ---
+# Yields page texts strictly in page order while later shards are still being extracted on
+# the process pool, so consumers can start on the first pages of a 500-page bundle right away.
+# `stats` is filled in as it runs: pages, seconds, pages_per_sec, failed (page numbers).
+def iter_pdf_pages(data, executor=None, page_timeout=PAGE_TIMEOUT, shard_pages=SHARD_PAGES, stats=None):
+    stats = stats if stats is not None else {}
+    stats.update({"pages": 0, "seconds": 0.0, "pages_per_sec": 0.0, "failed": []})
+    started = time.perf_counter()
+
+    def record(page_no, text, problem):
+        stats["pages"] += 1
+        if problem: stats["failed"].append(page_no)
+        stats["seconds"] = time.perf_counter() - started
+        stats["pages_per_sec"] = stats["pages"] / stats["seconds"] if stats["seconds"] else 0.0
+        return text
+
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    total = len(reader.pages)
+    stats["total"] = total
+    if executor is None or total < PARALLEL_MIN_PAGES:
+        for i, page in enumerate(reader.pages):
+            text, problem = _extract_page(page, page_timeout)
+            yield record(i + 1, text, problem)
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    futures = []
+    try:
+        with os.fdopen(fd, "wb") as fh: fh.write(data)
+        shards = [(start, min(start + shard_pages, total)) for start in range(0, total, shard_pages)]
+        futures.extend(executor.submit(_extract_shard, path, start, end, page_timeout) for start, end in shards)
+        for (start, end), future in zip(shards, futures):
+            try: results = future.result(timeout=page_timeout * (end - start) + 5)
+            except FutureTimeout: results = [("", "timeout")] * (end - start)
+            except Exception as e: results = [("", f"error: {e}")] * (end - start)
+            for offset, (text, problem) in enumerate(results):
+                yield record(start + offset + 1, text, problem)
+    finally:
+        for future in futures: future.cancel()
+        try: os.remove(path)
+        except OSError: pass
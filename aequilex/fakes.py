@@ -0,0 +1,131 @@
+import http.client
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# --- LOCAL FAKE MODEL SERVER ---
+# Stand-in for the Gemini streaming endpoint, for exercising the router, scheduler and
+# streaming UI offline. Each model's behaviour is set per name:
+#   {"ttft": 0.2, "chunk_delay": 0.02, "chunks": 20, "fail": False, "hang": False}
+# GET /stream?model=<name> answers with newline-delimited JSON chunks {"text": "..."}.
+# With `capacity` set, requests beyond that many in flight get a 429, like an exhausted quota.
+class FakeModelServer:
+    def __init__(self, behaviours=None, default=None, capacity=None):
+        self.behaviours = behaviours or {}
+        self.default = default or {"ttft": 0.05, "chunk_delay": 0.01, "chunks": 10}
+        self.capacity = capacity
+        self.requests = {}
+        self.in_flight = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        server_ref = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                model = params.get("model", ["default"])[0]
+                b = {**server_ref.default, **server_ref.behaviours.get(model, {})}
+                with server_ref._lock:
+                    server_ref.requests[model] = server_ref.requests.get(model, 0) + 1
+                    over = server_ref.capacity is not None and server_ref.in_flight >= server_ref.capacity
+                    if over: server_ref.throttled += 1
+                    else: server_ref.in_flight += 1
+                if over or b.get("fail"):
+                    status = 429 if over else 503
+                    body = json.dumps({"error": f"{status} {model} {'quota exhausted' if over else 'overloaded'}"}).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    if not over:
+                        with server_ref._lock: server_ref.in_flight -= 1
+                    return
+                try: self._stream(model, b)
+                finally:
+                    with server_ref._lock: server_ref.in_flight -= 1
+
+            def _stream(self, model, b):
+                time.sleep(3600 if b.get("hang") else b["ttft"])
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for i in range(b["chunks"]):
+                        if i: time.sleep(b["chunk_delay"])
+                        line = (json.dumps({"text": f"[{model}:{i}] "}) + "\n").encode()
+                        self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError): pass
+
+            def log_message(self, *args): pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc): self.server.shutdown()
+
+    def opener(self, model):
+        # Same contract as the app's Gemini opener: model name in, iterator of text chunks out.
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=3600)
+        try:
+            conn.request("GET", f"/stream?model={model}")
+            resp = conn.getresponse()
+            if resp.status != 200: raise RuntimeError(resp.read().decode())
+            for line in resp:
+                if line.strip(): yield json.loads(line)["text"]
+        finally:
+            conn.close()
+
+
+# --- LOCAL CONTEXT CACHE ---
+# Stand-in for the provider's cached-content API, with the same create/refresh/delete shape
+# DocumentSessions expects and an injectable clock, so expiry and refresh can be exercised offline.
+class LocalContextCache:
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.entries = {}
+        self.calls = {"create": 0, "refresh": 0, "delete": 0, "resolve": 0}
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def create(self, model, text, ttl):
+        with self._lock:
+            self._seq += 1
+            self.calls["create"] += 1
+            handle = f"cachedContents/local-{self._seq}"
+            self.entries[handle] = {"model": model, "text": text, "expires_at": self.clock() + ttl}
+            return handle
+
+    def refresh(self, handle, ttl):
+        with self._lock:
+            self.calls["refresh"] += 1
+            entry = self.entries.get(handle)
+            if not entry or entry["expires_at"] <= self.clock(): raise KeyError(f"CachedContent {handle} not found")
+            entry["expires_at"] = self.clock() + ttl
+
+    def delete(self, handle):
+        with self._lock:
+            self.calls["delete"] += 1
+            self.entries.pop(handle, None)
+
+    def resolve(self, handle):
+        # What a generate call would see: the cached text, or a not-found error once expired.
+        with self._lock:
+            self.calls["resolve"] += 1
+            entry = self.entries.get(handle)
+            if not entry or entry["expires_at"] <= self.clock(): raise KeyError(f"CachedContent {handle} not found")
+            return entry["text"]
+
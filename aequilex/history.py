@@ -0,0 +1,65 @@
+import time
+
+
+# --- SESSION-RESIDENT CHAT HISTORY CACHE ---
+# Lives in st.session_state. Each (email, workspace_id) thread is fetched in full once, then
+# kept current by appending locally written messages and pulling only rows whose id is above
+# the last synced id, so reruns no longer re-download the whole conversation.
+class ChatHistoryCache:
+    def __init__(self, sync_interval=20.0):
+        self.sync_interval = sync_interval
+        self._threads = {}
+
+    def get(self, email, workspace_id, fetch_since, force_sync=False):
+        key = (email, workspace_id)
+        thread = self._threads.get(key)
+        if thread is None:
+            thread = self._threads[key] = {"messages": [], "ids": set(), "last_id": 0, "synced_at": 0.0}
+            force_sync = True
+        if force_sync or time.monotonic() - thread["synced_at"] >= self.sync_interval:
+            self._sync(thread, fetch_since)
+        return thread["messages"]
+
+    def _sync(self, thread, fetch_since):
+        self._merge(thread, fetch_since(thread["last_id"]))
+
+    def _merge(self, thread, rows):
+        added = False
+        for row in rows:
+            row_id = row.get("id")
+            if row_id is not None:
+                thread["last_id"] = max(thread["last_id"], row_id)
+                if row_id in thread["ids"]: continue
+                thread["ids"].add(row_id)
+                # A write-behind message appended before it had an id: adopt the stored row in place.
+                pending = next((m for m in thread["messages"] if m.get("id") is None and m.get("role") == row.get("role") and m.get("content") == row.get("content")), None)
+                if pending is not None:
+                    pending["id"] = row_id
+                    added = True
+                    continue
+            thread["messages"].append(row)
+            added = True
+        # A delta can contain rows older than ones this session appended locally; keep id order.
+        if added: thread["messages"].sort(key=lambda m: m.get("id") if m.get("id") is not None else float("inf"))
+        thread["synced_at"] = time.monotonic()
+
+    def append(self, email, workspace_id, message):
+        # Local writes do not advance last_id: rows other sessions inserted in between still
+        # come through on the next delta sync, and the id set stops this one arriving twice.
+        thread = self._threads.get((email, workspace_id))
+        if thread is None: return
+        if message.get("id") is not None: thread["ids"].add(message["id"])
+        thread["messages"].append(message)
+
+    def last_id(self, email, workspace_id):
+        # None when the thread has not been loaded yet (nothing to keep current).
+        thread = self._threads.get((email, workspace_id))
+        return thread["last_id"] if thread else None
+
+    def merge(self, email, workspace_id, rows):
+        # Rows delivered by the workspace change feed instead of a fetch_since call.
+        thread = self._threads.get((email, workspace_id))
+        if thread is not None: self._merge(thread, rows)
+
+    def invalidate(self, email, workspace_id):
+        self._threads.pop((email, workspace_id), None)
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+log = logging.getLogger("aequilex.ingest")
+
+PENDING, RUNNING, ARCHIVED, SKIPPED, FAILED = "pending", "running", "archived", "skipped", "failed"
+
+
+def content_hash(data): return hashlib.sha256(data).hexdigest()
+
+
+# --- BATCH INGESTION JOB ---
+# Per-item state for one batch, keyed by content hash (so the same exhibit uploaded twice is
+# analysed once). Lives in st.session_state: after an interruption the same job is run again
+# and only items that are not yet archived or skipped are picked up.
+class IngestJob:
+    def __init__(self, items):
+        # items: iterable of (name, content_hash)
+        self.items = {}
+        for name, digest in items: self.items.setdefault(digest, {"name": name, "state": PENDING, "error": None})
+
+    def todo(self): return [h for h, item in self.items.items() if item["state"] in (PENDING, RUNNING, FAILED)]
+
+    def counts(self):
+        out = {state: 0 for state in (PENDING, RUNNING, ARCHIVED, SKIPPED, FAILED)}
+        for item in self.items.values(): out[item["state"]] += 1
+        return out
+
+    def finished(self): return not self.todo()
+
+    def rows(self): return [{"file": item["name"], "status": item["state"], "error": item["error"] or ""} for item in self.items.values()]
+
+
+# --- BATCH VAULT INGESTOR ---
+# Runs analyze(content_hash) -> row for every outstanding item on a bounded thread pool, while
+# the calling (script) thread collects results, reports progress and writes rows in batches of
+# `batch_size` with write_rows(rows). Items the vault already holds (archived_hashes(hashes) ->
+# set) are skipped before any work starts. If the caller is interrupted, e.g. by a Streamlit
+# rerun raised out of on_progress, finished rows are still written and unfinished items go back
+# to pending, so running the job again resumes it.
+class BatchIngestor:
+    def __init__(self, analyze, write_rows, archived_hashes=None, max_workers=4, batch_size=8, thread_init=None):
+        self.analyze = analyze
+        self.write_rows = write_rows
+        self.archived_hashes = archived_hashes
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.thread_init = thread_init
+
+    def run(self, job, on_progress=None):
+        todo = job.todo()
+        if todo and self.archived_hashes:
+            for digest in self.archived_hashes(todo) & set(todo): job.items[digest]["state"] = SKIPPED
+            todo = job.todo()
+        if on_progress: on_progress(job)
+        if not todo: return job
+
+        pending_rows = []
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, initializer=self.thread_init, thread_name_prefix="aequilex-ingest")
+        futures = {}
+        try:
+            for digest in todo:
+                job.items[digest].update(state=RUNNING, error=None)
+                futures[pool.submit(self.analyze, digest)] = digest
+            outstanding = set(futures)
+            while outstanding:
+                done, outstanding = wait(outstanding, return_when=FIRST_COMPLETED)
+                for future in done:
+                    digest = futures[future]
+                    try: pending_rows.append((digest, future.result()))
+                    except Exception as e:
+                        log.warning("ingest failed for %s: %s", job.items[digest]["name"], e)
+                        job.items[digest].update(state=FAILED, error=str(e))
+                if len(pending_rows) >= self.batch_size: self._flush(job, pending_rows)
+                if on_progress: on_progress(job)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._flush(job, pending_rows)
+            for item in job.items.values():
+                if item["state"] == RUNNING: item["state"] = PENDING
+        if on_progress: on_progress(job)
+        return job
+
+    def _flush(self, job, pending_rows):
+        if not pending_rows: return
+        batch = pending_rows[:]
+        del pending_rows[:]
+        try: self.write_rows([row for _, row in batch])
+        except Exception as e:
+            log.warning("ingest batch write failed (%d rows): %s", len(batch), e)
+            for digest, _ in batch: job.items[digest].update(state=FAILED, error=f"write failed: {e}")
+            return
+        for digest, _ in batch: job.items[digest]["state"] = ARCHIVED
@@ -0,0 +1,72 @@
+import io
+import shutil
+import subprocess
+import warnings
+import wave
+
+from PIL import Image, ImageOps
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try: import audioop
+    except ImportError: audioop = None  # removed in Python 3.13; ffmpeg or the raw WAV is used instead
+
+IMAGE_MAX_SIDE = 1536   # two 768px tiles per side: body text of a photographed A4 page stays legible
+IMAGE_QUALITY = 72
+AUDIO_RATE = 16000      # speech models resample to 16 kHz mono anyway
+AUDIO_BITRATE = "24k"
+
+
+# --- IMAGE PAYLOADS ---
+# Phone photos of documents arrive as 12+ MP colour JPEG/PNG; the model reads them no better
+# than a ~1.5k grayscale JPEG, which is typically 20-50x smaller on the wire.
+def compact_image(data, max_side=IMAGE_MAX_SIDE, quality=IMAGE_QUALITY, grayscale=True):
+    src = Image.open(io.BytesIO(data))
+    fmt, size = src.format, src.size
+    # JPEGs can be decoded straight at 1/2-1/8 scale, skipping most of the 12 MP decode.
+    if fmt == "JPEG": src.draft("L" if grayscale else "RGB", (max_side, max_side))
+    img = ImageOps.exif_transpose(src)
+    img.thumbnail((max_side, max_side), Image.LANCZOS)
+    img = img.convert("L" if grayscale else "RGB")
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=quality, optimize=True, progressive=True)
+    # Already small (a screenshot or a scan saved for the web): keep the original bytes.
+    if out.tell() >= len(data) and max(size) <= max_side: return data, Image.MIME.get(fmt, "image/jpeg")
+    return out.getvalue(), "image/jpeg"
+
+
+# --- AUDIO PAYLOADS ---
+# st.audio_input records 44.1/48 kHz WAV. With ffmpeg on PATH the clip becomes mono 16 kHz
+# Opus (~3 KB/s); without it, audioop downmixes and resamples to 16 kHz 16-bit WAV (~32 KB/s).
+def _ffmpeg_opus(data, rate):
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg: return None
+    try:
+        proc = subprocess.run([ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-ac", "1", "-ar", str(rate), "-c:a", "libopus", "-b:a", AUDIO_BITRATE, "-f", "ogg", "pipe:1"],
+                              input=data, capture_output=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired): return None
+    return proc.stdout if proc.returncode == 0 and proc.stdout else None
+
+def _resample_wav(data, rate):
+    if audioop is None: return None
+    try:
+        with wave.open(io.BytesIO(data)) as src:
+            channels, width, src_rate = src.getnchannels(), src.getsampwidth(), src.getframerate()
+            frames = src.readframes(src.getnframes())
+    except (wave.Error, EOFError): return None
+    if channels == 2: frames = audioop.tomono(frames, width, 0.5, 0.5)
+    elif channels != 1: return None
+    if width != 2: frames, width = audioop.lin2lin(frames, width, 2), 2
+    if src_rate != rate: frames, _ = audioop.ratecv(frames, width, 1, src_rate, rate, None)
+    out = io.BytesIO()
+    with wave.open(out, "wb") as dst:
+        dst.setnchannels(1); dst.setsampwidth(2); dst.setframerate(rate)
+        dst.writeframes(frames)
+    return out.getvalue()
+
+def compact_audio(data, rate=AUDIO_RATE):
+    encoded = _ffmpeg_opus(data, rate)
+    if encoded and len(encoded) < len(data): return encoded, "audio/ogg"
+    resampled = _resample_wav(data, rate)
+    if resampled and len(resampled) < len(data): return resampled, "audio/wav"
+    return data, "audio/wav"
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from aequilex.context import estimate_tokens
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (5, 10, 20, 50, 100, 200, 500, 1000)
+_OFF = nullcontext()
+
+
+class _Series:
+    def __init__(self, buckets, window):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]: i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+
+# --- STAGE METRICS ---
+# In-memory histograms keyed by (metric, labels): cumulative Prometheus buckets for scraping plus
+# a rolling window of recent samples for the admin panel's percentiles. When disabled every
+# call returns immediately (timer() hands back one shared no-op context manager).
+class Metrics:
+    def __init__(self, enabled=True, window=1000):
+        self.enabled = enabled
+        self.window = window
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS, **labels):
+        if not self.enabled: return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None: series = self._series[key] = _Series(buckets, self.window)
+            series.observe(value)
+
+    def timer(self, name="stage_seconds", **labels):
+        return self._timer(name, labels) if self.enabled else _OFF
+
+    @contextmanager
+    def _timer(self, name, labels):
+        start = time.monotonic()
+        try: yield
+        finally: self.observe(name, time.monotonic() - start, **labels)
+
+    def stream(self, stream, **labels):
+        # Records time to first token, streaming time and output tokens/s for a text stream.
+        if not self.enabled:
+            yield from stream
+            return
+        start, first, text = time.monotonic(), None, []
+        for chunk in stream:
+            if first is None:
+                first = time.monotonic()
+                self.observe("ttft_seconds", first - start, **labels)
+            text.append(chunk)
+            yield chunk
+        end = time.monotonic()
+        self.observe("stream_seconds", end - start, **labels)
+        if first is not None and end > first:
+            self.observe("output_tokens_per_second", estimate_tokens("".join(text)) / (end - first), buckets=RATE_BUCKETS, **labels)
+
+    def snapshot(self):
+        pct = lambda xs, p: xs[min(int(p * len(xs)), len(xs) - 1)] if xs else 0.0
+        with self._lock: items = [(k, sorted(s.recent), s.count) for k, s in self._series.items()]
+        return [{"metric": name, **dict(labels), "count": count, "p50": pct(recent, 0.5), "p95": pct(recent, 0.95), "max": recent[-1] if recent else 0.0}
+                for (name, labels), recent, count in sorted(items)]
+
+    def render_prometheus(self, prefix="aequilex_"):
+        fmt = lambda labels, extra=(): "{" + ",".join(f'{k}="{v}"' for k, v in (*labels, *extra)) + "}" if labels or extra else ""
+        lines, typed = [], set()
+        with self._lock:
+            for (name, labels), s in sorted(self._series.items(), key=lambda kv: kv[0]):
+                if name not in typed: lines.append(f"# TYPE {prefix}{name} histogram"); typed.add(name)
+                running = 0
+                for bound, n in zip((*s.buckets, "+Inf"), s.counts):
+                    running += n
+                    lines.append(f"{prefix}{name}_bucket{fmt(labels, (('le', bound),))} {running}")
+                lines.append(f"{prefix}{name}_sum{fmt(labels)} {s.sum:.6f}")
+                lines.append(f"{prefix}{name}_count{fmt(labels)} {s.count}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(metrics, port, host="127.0.0.1"):
+    # Plain-text /metrics endpoint for Prometheus, on its own port beside the Streamlit server.
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args): pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="aequilex-metrics", daemon=True).start()
+    return server
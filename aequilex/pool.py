@@ -0,0 +1,45 @@
+import threading
+import time
+
+
+# --- PROCESS-WIDE POOLED RESOURCES ---
+# One instance per process (held via st.cache_resource in the app) wraps a long-lived
+# client such as the Supabase or Gemini client so every session and rerun reuses the
+# same keep-alive HTTP connection pool instead of paying a fresh handshake.
+class PooledResource:
+    def __init__(self, factory, health_check=None, check_interval=300.0, name="resource"):
+        self.name = name
+        self._factory = factory
+        self._health_check = health_check
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._resource = None
+        self._last_check = 0.0
+        self.stats = {"creations": 0, "health_failures": 0, "invalidations": 0}
+
+    def _create(self):
+        self._resource = self._factory()
+        self._last_check = time.monotonic()
+        self.stats["creations"] += 1
+
+    def get(self):
+        with self._lock:
+            if self._resource is None:
+                self._create()
+            elif self._health_check and time.monotonic() - self._last_check >= self._check_interval:
+                self._last_check = time.monotonic()
+                try: healthy = self._health_check(self._resource)
+                except Exception: healthy = False
+                if not healthy:
+                    self.stats["health_failures"] += 1
+                    self._create()
+            return self._resource
+
+    def invalidate(self, resource=None):
+        # Drop the current client (only if it is still the one the caller saw fail) so the
+        # next get() lazily rebuilds it. The old client is left for GC rather than closed, so
+        # concurrent callers still holding it finish their request normally.
+        with self._lock:
+            if self._resource is not None and (resource is None or resource is self._resource):
+                self.stats["invalidations"] += 1
+                self._resource = None
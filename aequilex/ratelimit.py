@@ -0,0 +1,44 @@
+import threading
+import time
+
+
+# --- TOKEN BUCKET ---
+# `rate` permits per second with bursts up to `burst`. acquire() blocks until a permit is free
+# (or `timeout` passes, returning False); try_acquire() never blocks.
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, n=1.0):
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= n:
+                self.tokens -= n
+                return True
+            return False
+
+    def wait_time(self, n=1.0):
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(n - self.tokens, 0.0) / self.rate if self.rate > 0 else float("inf")
+
+    def refund(self, n=1.0):
+        # Returns tokens taken for a call that was then turned away elsewhere.
+        with self._lock: self.tokens = min(self.burst, self.tokens + n)
+
+    def acquire(self, n=1.0, timeout=None):
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.try_acquire(n): return True
+            wait = self.wait_time(n)
+            if end is not None:
+                if time.monotonic() + wait > end: return False
+            time.sleep(min(wait, 0.25) or 0.001)
@@ -0,0 +1,123 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+FILLER = frozenset("a an the of in on to for and or under u s sec section explain explained explanation what is are me please tell about describe give define meaning brief briefly detail details".split())
+# Words that make a question lean on the previous turn; such queries are never served from cache.
+ANAPHORA = frozenset("this that these those it its above previous same earlier again more further elaborate continue".split())
+# Words that flip or date the legal question ("non bailable", "a crime now", "as amended"). Like
+# numbers, a near match must carry exactly the same ones. "t" is the tail of "isn't", "can't".
+QUALIFIERS = frozenset("no not non nor never t without except unless cannot now currently current still today latest recent new old amended amendment repealed omitted substituted".split())
+NEGATING_PREFIXES = ("non", "un", "anti")
+_PRIME = (1 << 61) - 1
+
+
+def query_terms(query):
+    return re.findall(r"[a-z0-9]+", query.lower())
+
+def normalize_query(query):
+    # "Explain Section 103 of BNS?" and "section 103 bns" normalise to the same key; numbers are
+    # always kept, since they carry the section being asked about.
+    return " ".join(t for t in query_terms(query) if t.isdigit() or t not in FILLER)
+
+def guard_terms(norm):
+    return frozenset(t for t in norm.split() if t.isdigit() or t in QUALIFIERS or t.startswith(NEGATING_PREFIXES))
+
+def is_standalone_query(query, has_history):
+    if not has_history: return True
+    terms = query_terms(query)
+    return len(terms) >= 3 and not any(t in ANAPHORA for t in terms)
+
+def replay_stream(text, chunk_chars=48):
+    # Re-emit a cached answer in stream-sized pieces so the UI renders it the same way.
+    for i in range(0, len(text), chunk_chars): yield text[i:i + chunk_chars]
+
+
+# --- SEMANTIC RESPONSE CACHE ---
+# Exact lookup on (answer-shaping params, normalized query), then near-duplicate lookup through
+# MinHash signatures over word and character shingles, bucketed with LSH bands. A near match
+# also needs the same numbers and qualifiers, so "Section 103 BNS" can never answer "Section 104
+# BNS" and "is dowry death bailable" never answers "is dowry death non bailable".
+# Entries expire after `ttl` seconds and the least recently used are evicted past `max_entries`.
+class ResponseCache:
+    def __init__(self, max_entries=5000, ttl=7 * 24 * 3600, threshold=0.75, num_perm=64, bands=16):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(1729)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.counters = {"exact_hits": 0, "near_hits": 0, "misses": 0, "stores": 0}
+
+    def _shingles(self, norm):
+        # Whole words plus per-word character trigrams: insensitive to word order ("ingredients
+        # of 138 NI Act" vs "138 NI Act ingredients") and tolerant of inflection and typos.
+        grams = set()
+        for word in norm.split():
+            grams.add(word)
+            padded = f"<{word}>"
+            grams |= {padded[i:i + 3] for i in range(len(padded) - 2)}
+        return grams
+
+    def _signature(self, norm):
+        hashes = [int.from_bytes(hashlib.blake2b(g.encode(), digest_size=8).digest(), "big") for g in self._shingles(norm)]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms)
+
+    def _band_keys(self, params, sig):
+        return [(params, i, sig[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None: return
+        for bk in self._band_keys(key[0], entry["sig"]):
+            bucket = self._buckets.get(bk)
+            if bucket:
+                bucket.discard(key)
+                if not bucket: del self._buckets[bk]
+
+    def lookup(self, query, params):
+        norm = normalize_query(query)
+        if not norm: return None
+        key, now = (params, norm), time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry["at"] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.counters["exact_hits"] += 1
+                return entry["response"]
+        sig = self._signature(norm)
+        guard = guard_terms(norm)
+        with self._lock:
+            candidates = set()
+            for bk in self._band_keys(params, sig): candidates |= self._buckets.get(bk, set())
+            best, best_sim = None, self.threshold
+            for cand in candidates:
+                entry = self._entries.get(cand)
+                if not entry or now - entry["at"] > self.ttl or entry["guard"] != guard: continue
+                sim = sum(x == y for x, y in zip(sig, entry["sig"])) / self.num_perm
+                if sim >= best_sim: best, best_sim = cand, sim
+            if best is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(best)
+            self.counters["near_hits"] += 1
+            return self._entries[best]["response"]
+
+    def store(self, query, params, response):
+        norm = normalize_query(query)
+        if not norm or not response: return
+        key, sig = (params, norm), self._signature(norm)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = {"response": response, "at": time.time(), "sig": sig, "guard": guard_terms(norm)}
+            for bk in self._band_keys(params, sig): self._buckets.setdefault(bk, set()).add(key)
+            self.counters["stores"] += 1
+            while len(self._entries) > self.max_entries: self._drop(next(iter(self._entries)))
@@ -0,0 +1,150 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+from aequilex.context import estimate_tokens
+
+DOCUMENT_TOKEN_BUDGET = 5000
+STOPWORDS = frozenset("a an and are as at be by for from has have in is it its of on or that the this to was were which with shall under any such".split())
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS]
+
+
+# --- PAGE-AWARE CHUNKING ---
+# Chunks never straddle pages, so every passage sent to the model can be cited as "[Page N]".
+# Consecutive chunks on a page share a short line overlap so a clause split at a boundary
+# is still retrievable as a whole.
+def chunk_page(page_no, page_text, chunk_tokens=350, overlap_tokens=50):
+    chunks, lines = [], []
+    for line in (page_text or "").splitlines():
+        line = line.strip()
+        if not line: continue
+        words = line.split()
+        # PDFs without line breaks yield one giant "line"; cut it into chunk-sized runs.
+        step = chunk_tokens * 3
+        lines.extend(" ".join(words[i:i + step]) for i in range(0, len(words), step))
+    current, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line)
+        if current and used + cost > chunk_tokens:
+            chunks.append({"page": page_no, "text": "\n".join(current)})
+            carry, carried = [], 0
+            for prev in reversed(current):
+                carried += estimate_tokens(prev)
+                if carried > overlap_tokens: break
+                carry.insert(0, prev)
+            current, used = carry, sum(estimate_tokens(c) for c in carry)
+        current.append(line); used += cost
+    if current: chunks.append({"page": page_no, "text": "\n".join(current)})
+    return chunks
+
+def chunk_pages(pages, chunk_tokens=350, overlap_tokens=50):
+    return [chunk for page_no, text in enumerate(pages, start=1) for chunk in chunk_page(page_no, text, chunk_tokens, overlap_tokens)]
+
+
+# --- BM25 INDEX ---
+# Texts can be added one at a time (as pages come out of extraction); the corpus statistics are
+# recomputed on the first search after a change.
+class BM25Index:
+    def __init__(self, texts=(), k1=1.5, b=0.75):
+        self.k1, self.b = k1, b
+        self.postings = defaultdict(list)
+        self.lengths = []
+        self.idf, self.avg_len = {}, 0.0
+        for text in texts: self.add(text)
+        self._refresh()
+
+    def add(self, text):
+        idx, terms = len(self.lengths), Counter(tokenize(text))
+        self.lengths.append(sum(terms.values()))
+        for term, tf in terms.items(): self.postings[term].append((idx, tf))
+        self._stale = True
+
+    def _refresh(self):
+        n = len(self.lengths)
+        self.avg_len = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for term, p in self.postings.items()}
+        self._stale = False
+
+    def search(self, query, k=8):
+        if self._stale: self._refresh()
+        scores = defaultdict(float)
+        for term in set(tokenize(query or "")):
+            idf = self.idf.get(term)
+            if idf is None: continue
+            for idx, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[idx] / (self.avg_len or 1))
+                scores[idx] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+
+# --- INDEXED DOCUMENT ---
+# What process_uploaded_file hands to the stream builders for PDFs. It is cached by content
+# hash, so a follow-up question on the same file only pays for one BM25 lookup. add_page lets
+# the index be built page by page while later pages are still being extracted.
+class DocumentIndex:
+    def __init__(self, doc_hash, pages=()):
+        self.doc_hash = doc_hash
+        self.pages, self.chunks = [], []
+        self.index = BM25Index()
+        for text in pages: self.add_page(text)
+
+    def add_page(self, text):
+        self.pages.append(text)
+        for chunk in chunk_page(len(self.pages), text):
+            self.chunks.append(chunk)
+            self.index.add(chunk["text"])
+
+    @property
+    def text(self): return "\n".join(self.pages)
+
+    @property
+    def tokens(self): return sum(estimate_tokens(c["text"]) for c in self.chunks)
+
+    def __bool__(self): return bool(self.chunks)
+
+    def _fit(self, order, token_budget):
+        picked, used = [], 0
+        for idx in order:
+            cost = estimate_tokens(self.chunks[idx]["text"]) + 6
+            if used + cost > token_budget: continue
+            picked.append(idx); used += cost
+        return sorted(picked)
+
+    def relevant(self, query, token_budget=DOCUMENT_TOKEN_BUDGET, top_k=24):
+        hits = [idx for idx, _ in self.index.search(query, k=top_k)]
+        if not hits: return self.overview(token_budget)
+        return self._fit(hits, token_budget)
+
+    def overview(self, token_budget=DOCUMENT_TOKEN_BUDGET):
+        # No query to rank against (archiving, summaries): sample evenly across the whole
+        # document instead of only reading its first pages.
+        n = len(self.chunks)
+        if not n: return []
+        per_chunk = max(sum(estimate_tokens(c["text"]) for c in self.chunks) / n, 1)
+        slots = max(int(token_budget / (per_chunk + 6)), 1)
+        stride = max(n / slots, 1)
+        return self._fit(sorted({int(i * stride) for i in range(min(slots, n))}), token_budget)
+
+    def leading(self, token_budget=DOCUMENT_TOKEN_BUDGET):
+        return self._fit(range(len(self.chunks)), token_budget) if self.chunks else []
+
+    def render(self, chunk_ids):
+        parts, last_page = [], None
+        for idx in chunk_ids:
+            chunk = self.chunks[idx]
+            if chunk["page"] != last_page: parts.append(f"[Page {chunk['page']} of {len(self.pages)}]")
+            parts.append(chunk["text"])
+            last_page = chunk["page"]
+        return "\n".join(parts)
+
+
+def document_context(doc, query=None, token_budget=DOCUMENT_TOKEN_BUDGET, mode="relevant"):
+    if not doc: return ""
+    if isinstance(doc, str): return doc[:token_budget * 4]
+    if mode == "leading": ids = doc.leading(token_budget)
+    elif mode == "overview" or not query: ids = doc.overview(token_budget)
+    else: ids = doc.relevant(query, token_budget)
+    return doc.render(ids)
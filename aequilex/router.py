@@ -0,0 +1,232 @@
+import queue
+import threading
+import time
+from collections import deque
+
+
+class RouterExhausted(Exception):
+    pass
+
+
+# --- CIRCUIT BREAKER ---
+# Closed -> open after `failure_threshold` consecutive failures; open models are skipped by every
+# session until `cooldown` passes, then one half-open probe decides whether to close again.
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed": return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.failures, self._probing = "closed", 0, False
+
+    def release(self):
+        # An attempt abandoned because a hedged sibling won proves nothing either way.
+        with self._lock: self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state, self.opened_at = "open", time.monotonic()
+
+
+class ModelStats:
+    def __init__(self, window=500):
+        self.attempts = 0
+        self.successes = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.ttft = deque(maxlen=window)
+        self.latency = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # 1 = error/timeout, for a rolling error rate
+
+    def snapshot(self):
+        pct = lambda xs, p: sorted(xs)[min(int(p * len(xs)), len(xs) - 1)] * 1000 if xs else 0.0
+        return {"attempts": self.attempts, "successes": self.successes, "errors": self.errors, "timeouts": self.timeouts, "hedges": self.hedges,
+                "error_rate": sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0,
+                "ttft_p50_ms": pct(self.ttft, 0.5), "ttft_p95_ms": pct(self.ttft, 0.95),
+                "latency_p50_ms": pct(self.latency, 0.5), "latency_p95_ms": pct(self.latency, 0.95)}
+
+
+_current = threading.local()
+
+def on_cancel(close):
+    # Called from inside an opener: close() runs if this attempt is abandoned (deadline passed,
+    # hedge lost, caller gone), e.g. to shut the HTTP response the attempt thread is blocked on.
+    # A no-op outside a router attempt.
+    attempt = getattr(_current, "attempt", None)
+    if attempt is not None: attempt.on_cancel(close)
+
+
+class _Attempt:
+    def __init__(self, model, opener, events):
+        self.model = model
+        self.started = time.monotonic()
+        self.first_chunk_at = None
+        self.cancelled = threading.Event()
+        self._closers = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._pump, args=(opener, events), name=f"model-{model}", daemon=True)
+        self._thread.start()
+
+    def on_cancel(self, close):
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._closers.append(close)
+                return
+        close()
+
+    def cancel(self):
+        # Without a registered closer a blocked attempt only notices at its next chunk.
+        with self._lock:
+            if self.cancelled.is_set(): return
+            self.cancelled.set()
+            closers, self._closers = self._closers, []
+        for close in closers:
+            try: close()
+            except Exception: pass
+
+    def _pump(self, opener, events):
+        _current.attempt = self
+        stream = None
+        try:
+            stream = iter(opener(self.model))
+            for chunk in stream:
+                if self.cancelled.is_set(): break
+                events.put((self, "chunk", chunk))
+            events.put((self, "done", None))
+        except Exception as e:
+            events.put((self, "error", e))
+        finally:
+            close = getattr(stream, "close", None)
+            if callable(close):
+                try: close()
+                except Exception: pass
+
+
+# --- MODEL ROUTER ---
+# Replaces the strict one-after-another fallback loop. Models whose breaker is open are skipped;
+# a model that has not produced its first chunk within its TTFT deadline is abandoned; with
+# `hedge_after` set, a backup request starts once the primary is that late and whichever
+# stream produces a chunk first wins. Breakers and stats are process-wide, so one session's
+# discovery of an outage protects every other session.
+class ModelRouter:
+    def __init__(self, models, ttft_deadline=15.0, hedge_after=None, stall_timeout=60.0, is_fatal=None, failure_threshold=3, cooldown=30.0):
+        self.models = list(models)
+        self.ttft_deadline = ttft_deadline  # seconds, or {model: seconds}
+        self.hedge_after = hedge_after
+        self.stall_timeout = stall_timeout
+        self.is_fatal = is_fatal or (lambda e: False)
+        self.breakers = {m: CircuitBreaker(failure_threshold, cooldown) for m in self.models}
+        self.model_stats = {m: ModelStats() for m in self.models}
+        self._lock = threading.Lock()
+
+    def _deadline(self, model):
+        return self.ttft_deadline.get(model, 15.0) if isinstance(self.ttft_deadline, dict) else self.ttft_deadline
+
+    def _finish(self, attempt, ok, timeout=False):
+        with self._lock:
+            stats = self.model_stats[attempt.model]
+            if ok:
+                stats.successes += 1
+                stats.latency.append(time.monotonic() - attempt.started)
+            elif timeout: stats.timeouts += 1
+            else: stats.errors += 1
+            stats.outcomes.append(0 if ok else 1)
+        if ok: self.breakers[attempt.model].record_success()
+        else: self.breakers[attempt.model].record_failure()
+
+    def stats(self):
+        with self._lock: snap = {m: s.snapshot() for m, s in self.model_stats.items()}
+        for m, b in self.breakers.items(): snap[m]["breaker"] = b.state
+        return snap
+
+    def stream(self, opener):
+        events = queue.Queue()
+        pending = [m for m in self.models]
+        live = []
+        winner = None
+
+        def launch(hedge=False):
+            while pending:
+                model = pending.pop(0)
+                if not self.breakers[model].allow(): continue
+                with self._lock:
+                    self.model_stats[model].attempts += 1
+                    if hedge: self.model_stats[model].hedges += 1
+                live.append(_Attempt(model, opener, events))
+                return True
+            return False
+
+        try:
+            if not launch(): raise RouterExhausted("all models are unavailable (circuits open)")
+            hedged = False
+            # Phase 1: race for the first chunk.
+            while winner is None:
+                if not live and not launch(): raise RouterExhausted("no model produced a response")
+                now = time.monotonic()
+                deadlines = [a.started + self._deadline(a.model) for a in live]
+                wake = min(deadlines)
+                if self.hedge_after is not None and not hedged and len(live) == 1: wake = min(wake, live[0].started + self.hedge_after)
+                try: attempt, kind, payload = events.get(timeout=max(wake - now, 0))
+                except queue.Empty:
+                    now = time.monotonic()
+                    for a in [a for a in live if now >= a.started + self._deadline(a.model)]:
+                        a.cancel(); live.remove(a); self._finish(a, ok=False, timeout=True)
+                    if self.hedge_after is not None and not hedged and len(live) == 1 and now >= live[0].started + self.hedge_after:
+                        hedged = launch(hedge=True)
+                    continue
+                if attempt not in live: continue  # late event from an abandoned attempt
+                if kind == "chunk":
+                    attempt.first_chunk_at = time.monotonic()
+                    with self._lock: self.model_stats[attempt.model].ttft.append(attempt.first_chunk_at - attempt.started)
+                    winner = attempt
+                    for loser in live:
+                        if loser is not attempt:
+                            loser.cancel()
+                            self.breakers[loser.model].release()
+                    yield payload
+                elif kind == "done":
+                    # Finished without any text: count as success, nothing to relay.
+                    self._finish(attempt, ok=True)
+                    return
+                else:
+                    live.remove(attempt)
+                    self._finish(attempt, ok=False)
+                    if self.is_fatal(payload): raise payload
+
+            # Phase 2: relay the winner; stalls and mid-stream errors cannot fall back cleanly
+            # (text was already shown), so they surface to the caller.
+            while True:
+                try: attempt, kind, payload = events.get(timeout=self.stall_timeout)
+                except queue.Empty:
+                    winner.cancel(); self._finish(winner, ok=False, timeout=True)
+                    raise TimeoutError(f"{winner.model} stalled mid-stream")
+                if attempt is not winner: continue
+                if kind == "chunk": yield payload
+                elif kind == "done":
+                    self._finish(winner, ok=True)
+                    return
+                else:
+                    self._finish(winner, ok=False)
+                    raise payload
+        finally:
+            for a in live: a.cancel()
@@ -0,0 +1,137 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from aequilex.ratelimit import TokenBucket
+
+DEFAULT_TIERS = {
+    # weight: share of contended slots; rate/burst: tier-wide calls per second; user_*: per user.
+    "free": {"weight": 1, "rate": 0.5, "burst": 10, "user_rate": 0.1, "user_burst": 4},
+    "pro": {"weight": 3, "rate": 2.0, "burst": 30, "user_rate": 0.5, "user_burst": 10},
+    "enterprise": {"weight": 6, "rate": 5.0, "burst": 60, "user_rate": 1.0, "user_burst": 20},
+}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# --- MODEL CALL SCHEDULER ---
+# Process-wide gate in front of every model call:
+#   1. admission: per-user and per-tier token buckets; a caller waits for its permit if that
+#      takes at most `max_wait` seconds and is rejected (with retry_after) otherwise;
+#   2. weighted fair queuing for one of `max_concurrent` slots: each waiter gets a virtual
+#      finish tag (start + cost / tier weight) and the smallest tag is served first, so a
+#      flood from one tier cannot starve the others and heavier tiers get a larger share.
+# `on_wait(position, waited_s)` is called about every `feedback_interval` seconds while queued.
+# Multi-call jobs (a chunked translation, a batch vault ingest) are admitted once through `job`
+# and their calls then only queue for slots; the job's own worker pool caps its concurrency.
+class ModelScheduler:
+    def __init__(self, tiers=None, max_concurrent=8, max_wait=30.0, default_tier="free", feedback_interval=0.5):
+        self.tiers = {name: dict(cfg) for name, cfg in (tiers or DEFAULT_TIERS).items()}
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.default_tier = default_tier if default_tier in self.tiers else next(iter(self.tiers))
+        self.feedback_interval = feedback_interval
+        self._tier_buckets = {name: TokenBucket(cfg["rate"], cfg["burst"]) for name, cfg in self.tiers.items()}
+        self._user_buckets = {}
+        self._cond = threading.Condition()
+        self._waiting = []          # heap of (finish_tag, seq, tier)
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish = {name: 0.0 for name in self.tiers}
+        self.in_flight = 0
+        self._waits = {name: deque(maxlen=2000) for name in self.tiers}
+        self.counters = {name: {"admitted": 0, "rejected": 0, "completed": 0} for name in self.tiers}
+
+    def _tier(self, tier): return tier if tier in self.tiers else self.default_tier
+
+    def _user_bucket(self, user, tier):
+        cfg = self.tiers[tier]
+        with self._cond:
+            bucket = self._user_buckets.get((tier, user))
+            if bucket is None:
+                bucket = self._user_buckets[(tier, user)] = TokenBucket(cfg["user_rate"], cfg["user_burst"])
+            return bucket
+
+    def _admit(self, user, tier, cost, max_wait):
+        # A user permit is handed back when the tier bucket then rejects the call, so a busy
+        # tier does not also drain that user's own allowance.
+        taken = []
+        for bucket, scope in ((self._user_bucket(user, tier), "your account"), (self._tier_buckets[tier], f"the {tier} tier")):
+            wait = bucket.wait_time(cost)
+            if wait > max_wait or not bucket.acquire(cost, timeout=max_wait):
+                for held in taken: held.refund(cost)
+                with self._cond: self.counters[tier]["rejected"] += 1
+                raise AdmissionRejected(f"rate limit reached for {scope}", retry_after=wait)
+            taken.append(bucket)
+
+    def _queue_position(self, entry):
+        return sum(1 for other in self._waiting if other < entry) + 1
+
+    @contextmanager
+    def job(self, user, tier=None, cost=1.0, max_wait=None):
+        # Yields slot(**kwargs) for the job's individual calls, none of which is charged again.
+        tier = self._tier(tier)
+        self._admit(user, tier, cost, self.max_wait if max_wait is None else max_wait)
+        yield lambda **kwargs: self.slot(user, tier, admitted=True, **kwargs)
+
+    @contextmanager
+    def slot(self, user, tier=None, cost=1.0, on_wait=None, max_wait=None, admitted=False):
+        # max_wait overrides the admission wait limit; admitted skips it (calls inside a job).
+        tier = self._tier(tier)
+        queued_at = time.monotonic()
+        if not admitted: self._admit(user, tier, cost, self.max_wait if max_wait is None else max_wait)
+        with self._cond:
+            start = max(self._virtual_time, self._last_finish[tier])
+            finish = start + cost / self.tiers[tier]["weight"]
+            self._last_finish[tier] = finish
+            entry = (finish, next(self._seq), tier)
+            heapq.heappush(self._waiting, entry)
+            last_feedback = queued_at
+            try:
+                while not (self.in_flight < self.max_concurrent and self._waiting[0] is entry):
+                    self._cond.wait(self.feedback_interval)
+                    now = time.monotonic()
+                    if on_wait and now - last_feedback >= self.feedback_interval:
+                        last_feedback, position = now, self._queue_position(entry)
+                        self._cond.release()
+                        try: on_wait(position, now - queued_at)
+                        finally: self._cond.acquire()
+            except BaseException:
+                # on_wait raised (e.g. the session went away): leave the queue so the callers
+                # behind this entry are not blocked on it forever.
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self._virtual_time = max(self._virtual_time, finish - cost / self.tiers[tier]["weight"])
+            self.in_flight += 1
+            self.counters[tier]["admitted"] += 1
+            self._waits[tier].append(time.monotonic() - queued_at)
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self.counters[tier]["completed"] += 1
+                self._cond.notify_all()
+
+    def queue_depth(self):
+        with self._cond: return len(self._waiting)
+
+    def stats(self):
+        pct = lambda xs, p: xs[min(int(p * len(xs)), len(xs) - 1)] * 1000 if xs else 0.0
+        with self._cond:
+            out = {"in_flight": self.in_flight, "queued": len(self._waiting), "tiers": {}}
+            for name in self.tiers:
+                waits = sorted(self._waits[name])
+                out["tiers"][name] = {**self.counters[name], "wait_p50_ms": pct(waits, 0.5), "wait_p99_ms": pct(waits, 0.99)}
+        return out
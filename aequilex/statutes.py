@@ -0,0 +1,168 @@
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import struct
+from collections import Counter, defaultdict
+
+from aequilex.retrieval import tokenize
+
+MAGIC = b"AQSTAT01"
+HEADER = struct.Struct("<8sQQ")  # magic, directory offset, directory length
+
+ACTS = {
+    "BNS": ("Bharatiya Nyaya Sanhita, 2023", ["bns", "bharatiya nyaya sanhita", "nyaya sanhita"]),
+    "BNSS": ("Bharatiya Nagarik Suraksha Sanhita, 2023", ["bnss", "bharatiya nagarik suraksha sanhita", "nagarik suraksha sanhita"]),
+    "BSA": ("Bharatiya Sakshya Adhiniyam, 2023", ["bsa", "bharatiya sakshya adhiniyam", "sakshya adhiniyam"]),
+    "COI": ("Constitution of India", ["constitution", "coi"]),
+}
+HEADING = re.compile(r"^\s*(\d+[A-Z]{0,3})\.\s+(.{3,200}?)\.?\s*[—–-]{1,2}\s*(.*)$")
+REFERENCE = re.compile(r"\b(?:section|sec\.?|s\.|article|art\.?)\s*(\d+[a-z]{0,3})\b", re.I)
+ALIASES = {alias: code for code, (_, aliases) in ACTS.items() for alias in aliases}
+_ALIAS = "|".join(re.escape(a) for a in sorted(ALIASES, key=len, reverse=True))
+ACT_AFTER = re.compile(rf"\s*,?\s*(?:of\s+)?(?:the\s+)?({_ALIAS})\b", re.I)
+ACT_BEFORE = re.compile(rf"\b({_ALIAS})\s*,?\s*$", re.I)
+
+
+# --- COMPILER (offline, run once per statute update) ---
+# Sources are per-act files named by act code (BNS.txt, BNSS.txt, BSA.txt, COI.txt) holding the
+# official text, where each provision starts "103. Punishment for murder.—(1) Whoever ...", or
+# .jsonl files of {"act", "number", "title", "text"} records.
+def parse_source(path):
+    act = os.path.splitext(os.path.basename(path))[0].upper()
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    rec = json.loads(line)
+                    yield rec.get("act", act).upper(), str(rec["number"]).upper(), rec["title"].strip(), rec["text"].strip()
+        return
+    current = None
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            match = HEADING.match(line)
+            if match:
+                if current: yield current[0], current[1], current[2], "\n".join(current[3]).strip()
+                current = [act, match.group(1).upper(), match.group(2).strip(), [match.group(3).strip()]]
+            elif current: current[3].append(line.rstrip())
+    if current: yield current[0], current[1], current[2], "\n".join(current[3]).strip()
+
+def build_index(sources, out_path):
+    body, sections, postings, lengths = bytearray(), [], defaultdict(list), []
+    for path in sources:
+        for act, number, title, text in parse_source(path):
+            sid = len(sections)
+            encoded = text.encode("utf-8")
+            sections.append([act, number, title, HEADER.size + len(body), len(encoded)])
+            body += encoded
+            terms = Counter(tokenize(f"{title} {text}"))
+            lengths.append(sum(terms.values()))
+            for term, tf in terms.items(): postings[term].append([sid, tf])
+    directory = json.dumps({"sections": sections, "lengths": lengths, "postings": postings}, separators=(",", ":")).encode("utf-8")
+    with open(out_path, "wb") as fh:
+        fh.write(HEADER.pack(MAGIC, HEADER.size + len(body), len(directory)))
+        fh.write(body)
+        fh.write(directory)
+    return len(sections)
+
+
+# --- MEMORY-MAPPED STATUTE INDEX ---
+# Only the directory (section table + postings) is parsed into memory; provision texts stay in
+# the mapped file and are decoded on demand, so every app process shares one page-cache copy.
+class StatuteIndex:
+    def __init__(self, path):
+        self._fh = open(path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, offset, length = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC: raise ValueError(f"{path} is not an Aequilex statute index")
+        directory = json.loads(self._mm[offset:offset + length].decode("utf-8"))
+        self.sections = directory["sections"]
+        self.lengths = directory["lengths"]
+        self.postings = directory["postings"]
+        self.by_number = {(act, number): sid for sid, (act, number, *_) in enumerate(self.sections)}
+        self.avg_len = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def provision(self, sid):
+        act, number, title, offset, length = self.sections[sid]
+        return {"act": act, "act_title": ACTS.get(act, (act,))[0], "number": number, "title": title, "text": self._mm[offset:offset + length].decode("utf-8")}
+
+    def lookup(self, act, number):
+        sid = self.by_number.get((act, str(number).upper()))
+        return self.provision(sid) if sid is not None else None
+
+    def search(self, query, k=5, acts=None, k1=1.2, b=0.75):
+        n = len(self.sections)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist: continue
+            idf = math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for sid, tf in plist:
+                if acts and self.sections[sid][0] not in acts: continue
+                scores[sid] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * self.lengths[sid] / (self.avg_len or 1)))
+        return [(self.provision(sid), score) for sid, score in sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]]
+
+    def close(self):
+        self._mm.close()
+        self._fh.close()
+
+
+def mentioned_acts(query):
+    q = f" {query.lower()} "
+    return [code for code, (_, aliases) in ACTS.items() if any(re.search(rf"\b{re.escape(a)}\b", q) for a in aliases)]
+
+def parse_references(query):
+    # Every "Section 103 BNS", "s. 480 of the BNSS", "BSA s. 63", "Article 21" in the query as
+    # (act, number), in order. The act is the one named right after the reference, else right
+    # before it; articles default to the Constitution, and a section with no act of its own takes
+    # the only act the query names, else None.
+    acts = mentioned_acts(query)
+    refs = []
+    for match in REFERENCE.finditer(query):
+        after = ACT_AFTER.match(query, match.end())
+        before = ACT_BEFORE.search(query[:match.start()])
+        if after: act = ALIASES[after.group(1).lower()]
+        elif before: act = ALIASES[before.group(1).lower()]
+        elif match.group(0).lower().startswith("art"): act = "COI"
+        else: act = acts[0] if len(acts) == 1 else None
+        refs.append((act, match.group(1).upper()))
+    return refs
+
+def parse_reference(query):
+    # The single provision a query asks for verbatim, or None: a query citing several provisions,
+    # or naming an act other than the one cited, needs an answer rather than a bare quote.
+    refs = parse_references(query)
+    if len(refs) != 1 or refs[0][0] is None: return None
+    return refs[0] if set(mentioned_acts(query)) <= {refs[0][0]} else None
+
+def render_provision(p):
+    label = "Article" if p["act"] == "COI" else "Section"
+    return f"**{p['act_title']} — {label} {p['number']}: {p['title']}**\n\n{p['text']}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile or query the offline statute index.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("sources", nargs="+")
+    b.add_argument("-o", "--out", default="data/statutes.idx")
+    q = sub.add_parser("query")
+    q.add_argument("index")
+    q.add_argument("text")
+    args = ap.parse_args()
+    if args.cmd == "build":
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        print(f"Indexed {build_index(args.sources, args.out)} provisions into {args.out}")
+    else:
+        idx = StatuteIndex(args.index)
+        ref = parse_reference(args.text)
+        hit = idx.lookup(*ref) if ref else None
+        if hit: print(render_provision(hit))
+        else:
+            for p, score in idx.search(args.text): print(f"{score:6.2f}  {p['act']} {p['number']}  {p['title']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+import hashlib
+import itertools
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+
+# Raised by a backend when an insert failed in transit after it may already have been applied.
+# Retrying could duplicate the row, so callers record it as failed instead.
+class WriteOutcomeUnknown(Exception): pass
+
+
+# --- STORAGE INTERFACE ---
+# Every persistence backend (DBHandler for Supabase in the app, SQLiteStore below) implements
+# these methods with the same arguments and return shapes, so the UI never branches on backend.
+class Storage:
+    def register_user(self, email, password, name, inst, year): raise NotImplementedError
+    def login(self, email, password, remember_me=False): raise NotImplementedError
+    def login_with_token(self, token): raise NotImplementedError
+    def logout(self, email): raise NotImplementedError
+    def save_message(self, email, role, content, workspace_id=0): raise NotImplementedError
+    def get_history(self, email, workspace_id=0, after_id=0): raise NotImplementedError
+    def clear_history(self, email, workspace_id=0): raise NotImplementedError
+    def get_context_summary(self, email, workspace_id=0): raise NotImplementedError
+    def save_context_summary(self, email, summary, covered_id, workspace_id=0): raise NotImplementedError
+    def clear_context_summary(self, email, workspace_id=0): raise NotImplementedError
+    def save_to_space(self, email, category, query, response, workspace_id=0): raise NotImplementedError
+    def get_space_items(self, email, category, workspace_id=0): raise NotImplementedError
+    def get_space_page(self, email, category, workspace_id=0, before_id=None, limit=25, search=None): raise NotImplementedError
+    def get_space_item(self, item_id): raise NotImplementedError
+    def iter_space_items(self, email, category, workspace_id=0, page_size=100): raise NotImplementedError
+    def delete_space_item(self, item_id): raise NotImplementedError
+    def create_workspace(self, email, name): raise NotImplementedError
+    def get_workspaces(self, email): raise NotImplementedError
+    def insert_rows(self, table, rows): raise NotImplementedError
+    def get_archived_hashes(self, email, workspace_id, hashes): raise NotImplementedError
+    def get_changes(self, email, workspace_id=0, cursors=None): raise NotImplementedError
+
+
+# Change feed: each backend returns the rows above the caller's cursor per table, plus the new
+# cursors. A chats cursor of None means the thread is not loaded, so chats are skipped (the
+# history cache fetches them itself). A spaces or deletions cursor of None only reports the
+# current high-water mark: a new session starts from "now" and loads vault pages on demand
+# (get_space_page) instead of pulling the whole archive, and has nothing to undo yet.
+# Rows are read in id order, FEED_PAGE_SIZE at a time, until a short page: PostgREST caps a
+# response at max-rows (1000 by default), so a single unbounded read of a large folder returns
+# only its oldest rows.
+FEED_TABLES = ("chats", "spaces", "workspaces", "deletions")
+FEED_PAGE_SIZE = 1000
+
+def read_feed(fetch, after):
+    # fetch(after_id, limit) -> rows with id > after_id, ascending.
+    rows = []
+    while True:
+        page = fetch(after, FEED_PAGE_SIZE)
+        rows += page
+        if len(page) < FEED_PAGE_SIZE: return rows
+        after = page[-1]["id"]
+
+def next_cursors(cursors, changes, marks=None):
+    out = {t: max([cursors.get(t) or 0] + [r["id"] for r in changes[t]]) for t in FEED_TABLES}
+    if cursors.get("chats") is None: out["chats"] = None
+    for t in ("spaces", "deletions"):
+        if cursors.get(t) is None: out[t] = (marks or {}).get(t) or 0
+    return out
+
+
+def user_record(row, token):
+    return { "email": row["email"], "name": row["name"], "institution": row["institution"], "year": row["year"], "tier": row["tier"] or "free", "token": token }
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (email TEXT PRIMARY KEY, password TEXT, name TEXT, institution TEXT, year TEXT);
+CREATE TABLE IF NOT EXISTS chats (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT, role TEXT, content TEXT, timestamp DATETIME);
+CREATE TABLE IF NOT EXISTS spaces (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT, category TEXT, query TEXT, response TEXT, timestamp DATETIME);
+CREATE TABLE IF NOT EXISTS workspaces (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT NOT NULL, name TEXT NOT NULL, created_at DATETIME);
+CREATE TABLE IF NOT EXISTS deletions (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT NOT NULL, workspace_id INTEGER DEFAULT 0, table_name TEXT NOT NULL, row_id INTEGER NOT NULL, deleted_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE IF NOT EXISTS context_summaries (email TEXT NOT NULL, workspace_id INTEGER NOT NULL DEFAULT 0, summary TEXT, covered_id INTEGER DEFAULT 0, updated_at DATETIME, PRIMARY KEY (email, workspace_id));
+"""
+
+# Columns added after the original vidhidesk_users.db layout; applied with ALTER TABLE on open.
+MIGRATIONS = [
+    ("users", "auth_token", "TEXT DEFAULT ''"),
+    ("users", "tier", "TEXT DEFAULT 'free'"),
+    ("chats", "workspace_id", "INTEGER DEFAULT 0"),
+    ("spaces", "workspace_id", "INTEGER DEFAULT 0"),
+    ("spaces", "content_hash", "TEXT"),
+]
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS chats_thread_idx ON chats (email, workspace_id, id);
+CREATE INDEX IF NOT EXISTS spaces_keyset_idx ON spaces (email, category, workspace_id, id);
+CREATE INDEX IF NOT EXISTS workspaces_email_idx ON workspaces (email, created_at);
+CREATE INDEX IF NOT EXISTS users_auth_token_idx ON users (auth_token);
+CREATE INDEX IF NOT EXISTS spaces_hash_idx ON spaces (email, workspace_id, content_hash);
+CREATE INDEX IF NOT EXISTS spaces_feed_idx ON spaces (email, workspace_id, id);
+CREATE INDEX IF NOT EXISTS workspaces_feed_idx ON workspaces (email, id);
+CREATE INDEX IF NOT EXISTS deletions_feed_idx ON deletions (email, workspace_id, id);
+"""
+
+# Tombstones for the change feed, written by the database itself so deletes from any client show up.
+DELETION_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS chats_record_deletion AFTER DELETE ON chats BEGIN
+    INSERT INTO deletions (email, workspace_id, table_name, row_id) VALUES (old.email, old.workspace_id, 'chats', old.id);
+END;
+CREATE TRIGGER IF NOT EXISTS spaces_record_deletion AFTER DELETE ON spaces BEGIN
+    INSERT INTO deletions (email, workspace_id, table_name, row_id) VALUES (old.email, old.workspace_id, 'spaces', old.id);
+END;
+"""
+
+# External-content FTS5 index over the vault, kept in sync by triggers (mirrors search_tsv on Postgres).
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS spaces_fts USING fts5(query, response, content='spaces', content_rowid='id', tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS spaces_fts_ai AFTER INSERT ON spaces BEGIN
+    INSERT INTO spaces_fts(rowid, query, response) VALUES (new.id, new.query, new.response);
+END;
+CREATE TRIGGER IF NOT EXISTS spaces_fts_ad AFTER DELETE ON spaces BEGIN
+    INSERT INTO spaces_fts(spaces_fts, rowid, query, response) VALUES ('delete', old.id, old.query, old.response);
+END;
+CREATE TRIGGER IF NOT EXISTS spaces_fts_au AFTER UPDATE ON spaces BEGIN
+    INSERT INTO spaces_fts(spaces_fts, rowid, query, response) VALUES ('delete', old.id, old.query, old.response);
+    INSERT INTO spaces_fts(rowid, query, response) VALUES (new.id, new.query, new.response);
+END;
+"""
+
+_memory_ids = itertools.count()
+WRITABLE_COLUMNS = {
+    "chats": ("email", "role", "content", "workspace_id", "timestamp"),
+    "spaces": ("email", "category", "query", "response", "workspace_id", "timestamp", "content_hash"),
+}
+
+
+# --- CACHED HOT READS ---
+# Wraps any backend so token auto-login and per-user workspace lists are served from shared
+# TTLCaches (held via st.cache_resource in the app). Writes that change those answers (logout,
+# a new remember-me token, create_workspace) invalidate them in this process; the TTL bounds how
+# stale another process's copy can get, including a tier changed directly in the users table.
+# Every other method passes straight through.
+class CachedStorage(Storage):
+    def __init__(self, store, tokens, workspaces):
+        self.store = store
+        self.tokens = tokens
+        self.workspaces = workspaces
+
+    def __getattr__(self, name): return getattr(self.store, name)
+
+    def login(self, email, password, remember_me=False):
+        user = self.store.login(email, password, remember_me=remember_me)
+        if user and remember_me: self.tokens.pop_where(lambda u: u["email"] == email)
+        return user
+
+    def login_with_token(self, token):
+        if not token: return None
+        user = self.tokens.get_or_load(token, lambda: self.store.login_with_token(token))
+        return dict(user) if user else None
+
+    def logout(self, email):
+        self.store.logout(email)
+        self.tokens.pop_where(lambda u: u["email"] == email)
+
+    def create_workspace(self, email, name):
+        workspace_id = self.store.create_workspace(email, name)
+        self.workspaces.pop(email)
+        return workspace_id
+
+    def get_workspaces(self, email):
+        return [dict(w) for w in self.workspaces.get_or_load(email, lambda: self.store.get_workspaces(email))]
+
+
+# --- LOCAL SQLITE BACKEND ---
+# Offline, single-node storage. WAL lets readers run alongside the writer, each thread gets its
+# own connection, and every query is a fixed parameterized string so sqlite3's statement cache
+# reuses the prepared statement instead of re-parsing SQL on each call.
+class SQLiteStore(Storage):
+    def __init__(self, path="vidhidesk_users.db"):
+        self._uri = path.startswith("file:")
+        if path == ":memory:":
+            # Per-thread connections must all see the same in-memory database.
+            path, self._uri = f"file:aequilex_mem_{next(_memory_ids)}?mode=memory&cache=shared", True
+        self.path = path
+        self._local = threading.local()
+        self._anchor = self._connect()  # keeps a shared in-memory DB alive; also runs the setup
+        self.fts_enabled = True
+        with self._anchor:
+            self._anchor.executescript(SCHEMA)
+            for table, column, decl in MIGRATIONS:
+                if column not in {r["name"] for r in self._anchor.execute(f"PRAGMA table_info({table})")}:
+                    self._anchor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+            self._anchor.executescript(INDEXES)
+            self._anchor.executescript(DELETION_TRIGGERS)
+            try:
+                self._anchor.executescript(FTS_SCHEMA)
+                if not self._anchor.execute("SELECT 1 FROM spaces_fts LIMIT 1").fetchone() and self._anchor.execute("SELECT 1 FROM spaces LIMIT 1").fetchone():
+                    self._anchor.execute("INSERT INTO spaces_fts(spaces_fts) VALUES ('rebuild')")
+            except sqlite3.OperationalError:
+                self.fts_enabled = False  # sqlite built without FTS5: search falls back to LIKE
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, uri=self._uri, timeout=30, isolation_level=None, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None: conn = self._local.conn = self._connect()
+        return conn
+
+    def _rows(self, sql, params=()): return [dict(r) for r in self.conn.execute(sql, params)]
+
+    def register_user(self, email, password, name, inst, year):
+        hashed_pw = hashlib.sha256(password.encode()).hexdigest()
+        try:
+            self.conn.execute("INSERT INTO users (email, password, name, institution, year, auth_token, tier) VALUES (?, ?, ?, ?, ?, '', 'free')", (email, hashed_pw, name, inst, year))
+            return True
+        except sqlite3.IntegrityError: return False
+
+    def login(self, email, password, remember_me=False):
+        hashed_pw = hashlib.sha256(password.encode()).hexdigest()
+        row = self.conn.execute("SELECT * FROM users WHERE email = ? AND password = ?", (email, hashed_pw)).fetchone()
+        if not row: return None
+        token = ""
+        if remember_me:
+            token = str(uuid.uuid4())
+            self.conn.execute("UPDATE users SET auth_token = ? WHERE email = ?", (token, email))
+        return user_record(row, token)
+
+    def login_with_token(self, token):
+        if not token: return None
+        row = self.conn.execute("SELECT email, name, institution, year, tier FROM users WHERE auth_token = ?", (token,)).fetchone()
+        return user_record(row, token) if row else None
+
+    def logout(self, email):
+        self.conn.execute("UPDATE users SET auth_token = '' WHERE email = ?", (email,))
+
+    def save_message(self, email, role, content, workspace_id=0):
+        cur = self.conn.execute("INSERT INTO chats (email, role, content, workspace_id, timestamp) VALUES (?, ?, ?, ?, ?)", (email, role, content, workspace_id, datetime.now().isoformat()))
+        return { "id": cur.lastrowid, "role": role, "content": content }
+
+    def get_history(self, email, workspace_id=0, after_id=0):
+        return self._rows("SELECT id, role, content FROM chats WHERE email = ? AND workspace_id = ? AND id > ? ORDER BY id", (email, workspace_id, after_id))
+
+    def clear_history(self, email, workspace_id=0):
+        self.conn.execute("DELETE FROM chats WHERE email = ? AND workspace_id = ?", (email, workspace_id))
+
+    def get_context_summary(self, email, workspace_id=0):
+        row = self.conn.execute("SELECT summary, covered_id FROM context_summaries WHERE email = ? AND workspace_id = ?", (email, workspace_id)).fetchone()
+        return dict(row) if row else None
+
+    def save_context_summary(self, email, summary, covered_id, workspace_id=0):
+        self.conn.execute("INSERT INTO context_summaries (email, workspace_id, summary, covered_id, updated_at) VALUES (?, ?, ?, ?, ?) "
+                          "ON CONFLICT (email, workspace_id) DO UPDATE SET summary = excluded.summary, covered_id = excluded.covered_id, updated_at = excluded.updated_at",
+                          (email, workspace_id, summary, covered_id, datetime.now().isoformat()))
+
+    def clear_context_summary(self, email, workspace_id=0):
+        self.conn.execute("DELETE FROM context_summaries WHERE email = ? AND workspace_id = ?", (email, workspace_id))
+
+    def save_to_space(self, email, category, query, response, workspace_id=0):
+        self.conn.execute("INSERT INTO spaces (email, category, query, response, workspace_id, timestamp) VALUES (?, ?, ?, ?, ?, ?)", (email, category, query, response, workspace_id, datetime.now().isoformat()))
+
+    def get_space_items(self, email, category, workspace_id=0):
+        return self._rows("SELECT id, query, response, timestamp FROM spaces WHERE email = ? AND category = ? AND workspace_id = ? ORDER BY id DESC", (email, category, workspace_id))
+
+    def get_space_page(self, email, category, workspace_id=0, before_id=None, limit=25, search=None):
+        # A handful of fixed SQL variants (rather than "? IS NULL OR ..." tricks) keeps each one a
+        # cached prepared statement that can still range-scan spaces_keyset_idx on id.
+        keyset = " AND s.id < ?" if before_id else ""
+        params = [email, category, workspace_id] + ([before_id] if before_id else [])
+        if search and self.fts_enabled:
+            terms = re.findall(r"\w+", search)
+            if not terms: return [], None
+            # CROSS JOIN pins spaces_fts as the outer loop: FTS5 yields matches newest-first and the
+            # scan stops at LIMIT. Left to the planner, it walks the keyset index instead and
+            # re-evaluates MATCH for every row in the category.
+            sql = ("SELECT s.id, s.timestamp, substr(s.query, 1, 80) AS query_preview FROM spaces_fts CROSS JOIN spaces s ON s.id = spaces_fts.rowid "
+                   f"WHERE spaces_fts MATCH ? AND s.email = ? AND s.category = ? AND s.workspace_id = ?{keyset.replace('s.id', 'spaces_fts.rowid')} ORDER BY spaces_fts.rowid DESC LIMIT ?")
+            params.insert(0, " ".join(f'"{t}"' for t in terms))
+        elif search:
+            sql = ("SELECT s.id, s.timestamp, substr(s.query, 1, 80) AS query_preview FROM spaces s "
+                   f"WHERE s.email = ? AND s.category = ? AND s.workspace_id = ?{keyset} AND (s.query LIKE ? OR s.response LIKE ?) ORDER BY s.id DESC LIMIT ?")
+            params += [f"%{search}%", f"%{search}%"]
+        else:
+            sql = ("SELECT s.id, s.timestamp, substr(s.query, 1, 80) AS query_preview FROM spaces s "
+                   f"WHERE s.email = ? AND s.category = ? AND s.workspace_id = ?{keyset} ORDER BY s.id DESC LIMIT ?")
+        rows = self._rows(sql, params + [limit + 1])
+        return rows[:limit], (rows[limit - 1]["id"] if len(rows) > limit else None)
+
+    def get_space_item(self, item_id):
+        row = self.conn.execute("SELECT id, query, response, timestamp FROM spaces WHERE id = ?", (item_id,)).fetchone()
+        return dict(row) if row else None
+
+    def iter_space_items(self, email, category, workspace_id=0, page_size=100):
+        rows = self._rows("SELECT id, query, response, timestamp FROM spaces WHERE email = ? AND category = ? AND workspace_id = ? ORDER BY id DESC LIMIT ?",
+                          (email, category, workspace_id, page_size))
+        while rows:
+            yield from rows
+            if len(rows) < page_size: return
+            rows = self._rows("SELECT id, query, response, timestamp FROM spaces WHERE email = ? AND category = ? AND workspace_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                              (email, category, workspace_id, rows[-1]["id"], page_size))
+
+    def delete_space_item(self, item_id):
+        self.conn.execute("DELETE FROM spaces WHERE id = ?", (item_id,))
+
+    def create_workspace(self, email, name):
+        return self.conn.execute("INSERT INTO workspaces (email, name, created_at) VALUES (?, ?, ?)", (email, name, datetime.now().isoformat())).lastrowid
+
+    def get_workspaces(self, email):
+        return self._rows("SELECT id, name FROM workspaces WHERE email = ? ORDER BY created_at DESC", (email,))
+
+    def insert_rows(self, table, rows):
+        # Multi-row insert in one transaction for the write-behind queue.
+        columns = WRITABLE_COLUMNS[table]
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(sql, [tuple(row.get(c) for c in columns) for row in rows])
+
+    def get_archived_hashes(self, email, workspace_id, hashes):
+        # Content hashes (SHA-256 of the uploaded file) already archived in this folder.
+        found = set()
+        hashes = list(hashes)
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            found.update(r[0] for r in self.conn.execute(f"SELECT content_hash FROM spaces WHERE email = ? AND workspace_id = ? AND content_hash IN ({', '.join('?' * len(chunk))})", (email, workspace_id, *chunk)))
+        return found
+
+    def get_changes(self, email, workspace_id=0, cursors=None):
+        cursors, changes, marks = cursors or {}, {t: [] for t in FEED_TABLES}, {}
+        if cursors.get("chats") is not None:
+            changes["chats"] = read_feed(lambda after, n: self._rows("SELECT id, role, content FROM chats WHERE email = ? AND workspace_id = ? AND id > ? ORDER BY id LIMIT ?", (email, workspace_id, after, n)), cursors["chats"])
+        if cursors.get("spaces") is not None:
+            changes["spaces"] = read_feed(lambda after, n: self._rows("SELECT id, category, timestamp, substr(query, 1, 80) AS query_preview FROM spaces WHERE email = ? AND workspace_id = ? AND id > ? ORDER BY id LIMIT ?",
+                                                                       (email, workspace_id, after, n)), cursors["spaces"])
+        else:
+            marks["spaces"] = self.conn.execute("SELECT max(id) FROM spaces WHERE email = ? AND workspace_id = ?", (email, workspace_id)).fetchone()[0]
+        changes["workspaces"] = read_feed(lambda after, n: self._rows("SELECT id, name FROM workspaces WHERE email = ? AND id > ? ORDER BY id LIMIT ?", (email, after, n)), cursors.get("workspaces") or 0)
+        if cursors.get("deletions") is not None:
+            changes["deletions"] = read_feed(lambda after, n: self._rows("SELECT id, table_name, row_id FROM deletions WHERE email = ? AND workspace_id = ? AND id > ? ORDER BY id LIMIT ?", (email, workspace_id, after, n)), cursors["deletions"])
+        else:
+            marks["deletions"] = self.conn.execute("SELECT max(id) FROM deletions WHERE email = ? AND workspace_id = ?", (email, workspace_id)).fetchone()[0]
+        changes["cursors"] = next_cursors(cursors, changes, marks)
+        return changes
@@ -0,0 +1,45 @@
+import re
+import time
+
+
+# --- CHUNK COALESCING ---
+# Model streams arrive as many small pieces; re-rendering on each one is what makes long drafts
+# slow. Pieces are joined until `max_chars` are pending or `interval` seconds have passed since
+# the last flush (checked as pieces arrive, so a slow stream still flushes every piece).
+def coalesce(stream, interval=0.05, max_chars=200, clock=time.monotonic):
+    pending, size, last = [], 0, clock()
+    for piece in stream:
+        if not piece: continue
+        pending.append(piece)
+        size += len(piece)
+        now = clock()
+        if size >= max_chars or now - last >= interval:
+            yield "".join(pending)
+            pending, size, last = [], 0, now
+    if pending: yield "".join(pending)
+
+
+# --- MARKDOWN BLOCK FREEZING ---
+# Everything before the last blank line that is outside a code fence is complete Markdown and
+# never changes again, so it can be rendered once into its own element; only the tail after it
+# is re-rendered as text streams in.
+def block_boundary(text, start=0):
+    cut, in_fence = start, False
+    for m in re.finditer(r"\n\s*\n|^\s{0,3}(?:```|~~~)", text[start:], re.M):
+        if m.group(0).lstrip().startswith(("```", "~~~")): in_fence = not in_fence
+        elif not in_fence: cut = start + m.end()
+    return cut
+
+
+class BlockSplitter:
+    def __init__(self):
+        self.text = ""
+        self.frozen = 0
+
+    def feed(self, piece):
+        # Returns (newly completed block or "", current unfinished tail).
+        self.text += piece
+        cut = block_boundary(self.text, self.frozen)
+        block = self.text[self.frozen:cut] if cut > self.frozen else ""
+        self.frozen = max(cut, self.frozen)
+        return block, self.text[self.frozen:]
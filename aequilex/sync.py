@@ -0,0 +1,86 @@
+import time
+
+
+# --- INCREMENTAL WORKSPACE SYNC ---
+# Lives in st.session_state next to the ChatHistoryCache. Each (email, workspace_id) keeps a
+# mirror of the vault summary rows plus one cursor per feed table, and each sync asks the
+# backend only for rows above those cursors (fetch_changes(cursors) -> Storage.get_changes).
+# New chat rows are merged into the history cache, tombstones drop rows from the mirrors, and
+# the workspace list is mirrored per user. Sync cost follows the number of changes, not the
+# size of the folder: the vault feed starts at the folder's high-water mark, and a category's
+# mirror is seeded from its newest page the first time the Vault lists it.
+class WorkspaceSync:
+    def __init__(self, history=None, min_interval=10.0, clock=time.monotonic):
+        self.history = history
+        self.min_interval = min_interval
+        self.clock = clock
+        self._mirrors = {}      # (email, workspace_id) -> {"spaces": {id: row}, "floors": {category: id}, "cursors", "synced_at"}
+        self._workspaces = {}   # email -> {"rows": {id: row}, "cursor"}
+        self.counters = {"syncs": 0, "skipped": 0, "empty": 0, "rows": 0}
+
+    def _mirror(self, email, workspace_id):
+        key = (email, workspace_id)
+        if key not in self._mirrors: self._mirrors[key] = {"spaces": {}, "floors": {}, "cursors": {}, "synced_at": None}
+        return self._mirrors[key]
+
+    def sync(self, email, workspace_id, fetch_changes, force=False, load_workspaces=None):
+        # Returns the number of changed rows applied (0 when skipped or nothing changed).
+        # load_workspaces() seeds the workspace mirror (e.g. from a shared cache) so the feed
+        # only has to send folders newer than that snapshot.
+        mirror = self._mirror(email, workspace_id)
+        now = self.clock()
+        if not force and mirror["synced_at"] is not None and now - mirror["synced_at"] < self.min_interval:
+            self.counters["skipped"] += 1
+            return 0
+        ws = self._workspaces.get(email)
+        if ws is None:
+            rows = {w["id"]: w for w in load_workspaces()} if load_workspaces else {}
+            ws = self._workspaces[email] = {"rows": rows, "cursor": max(rows, default=0)}
+        cursors = {**mirror["cursors"], "workspaces": ws["cursor"],
+                   "chats": self.history.last_id(email, workspace_id) if self.history else None}
+        changes = fetch_changes(cursors)
+        for row in changes["spaces"]: mirror["spaces"][row["id"]] = row
+        for row in changes["workspaces"]: ws["rows"][row["id"]] = row
+        for row in changes["deletions"]:
+            if row["table_name"] == "spaces": mirror["spaces"].pop(row["row_id"], None)
+            elif row["table_name"] == "chats" and self.history: self.history.invalidate(email, workspace_id)
+        if self.history and cursors["chats"] is not None: self.history.merge(email, workspace_id, changes["chats"])
+        ws["cursor"] = changes["cursors"]["workspaces"]
+        mirror["cursors"] = {t: c for t, c in changes["cursors"].items() if t not in ("chats", "workspaces")}
+        mirror["synced_at"] = now
+        applied = sum(len(changes[t]) for t in ("chats", "spaces", "workspaces", "deletions"))
+        self.counters["syncs"] += 1
+        self.counters["rows"] += applied
+        if not applied: self.counters["empty"] += 1
+        return applied
+
+    def workspaces(self, email):
+        rows = self._workspaces.get(email, {"rows": {}})["rows"]
+        return [rows[i] for i in sorted(rows, reverse=True)]
+
+    def vault_page(self, email, workspace_id, category, load_page, before_id=None, limit=25):
+        # Same (rows, next_cursor) shape as Storage.get_space_page; load_page(before_id, limit)
+        # is that call. The mirror holds every row of the category from its floor up (the seeded
+        # newest page plus everything the feed has brought since); older pages come from the
+        # database.
+        mirror = self._mirror(email, workspace_id)
+        spaces, floors = mirror["spaces"], mirror["floors"]
+        if category not in floors:
+            rows, next_cursor = load_page(None, limit)
+            for row in rows: spaces[row["id"]] = {**row, "category": category}
+            floors[category] = rows[-1]["id"] if next_cursor else 0
+        floor = floors[category]
+        ids = sorted((i for i, r in spaces.items() if r["category"] == category and i >= floor and (not before_id or i < before_id)), reverse=True)
+        if floor and len(ids) < limit: return load_page(before_id, limit)
+        rows = [spaces[i] for i in ids[:limit]]
+        return rows, (rows[-1]["id"] if len(ids) > limit or floor else None)
+
+    def remove_space_item(self, email, workspace_id, item_id):
+        self._mirror(email, workspace_id)["spaces"].pop(item_id, None)
+
+    def drop(self, email):
+        self._workspaces.pop(email, None)
+        for key in [k for k in self._mirrors if k[0] == email]: del self._mirrors[key]
+
+    def stats(self):
+        return {"mirrors": len(self._mirrors), "vault_rows": sum(len(m["spaces"]) for m in self._mirrors.values()), **self.counters}
@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from aequilex.context import estimate_tokens
+
+log = logging.getLogger("aequilex.translation")
+
+LATIN_MAXIMS = ("res judicata", "res sub judice", "sub judice", "mens rea", "actus reus", "habeas corpus", "ultra vires", "intra vires", "prima facie",
+                "inter alia", "bona fide", "mala fide", "locus standi", "ratio decidendi", "obiter dicta", "obiter dictum", "audi alteram partem",
+                "nemo judex in causa sua", "stare decisis", "suo motu", "suo moto", "ex parte", "pari passu", "de novo", "in limine", "mutatis mutandis",
+                "ad interim", "status quo", "amicus curiae", "certiorari", "mandamus", "quo warranto", "per incuriam", "sine qua non", "ipso facto",
+                "de facto", "de jure", "caveat emptor", "ejusdem generis", "noscitur a sociis", "in personam", "in rem", "lis pendens", "restitutio in integrum")
+# Defined terms: '"Agreement" means ...', '“Licensee” shall mean ...'.
+DEFINED_TERM = re.compile(r"[\"“']([A-Z][\w\- ]{1,48})[\"”']\s+(?:shall\s+)?(?:means?|includes?|refers?\s+to)\b")
+# Case matters here: only the keywords are case-insensitive, so ordinary wrapped lines of prose
+# ("the agreement shall be", "section in accordance") are not taken for headings.
+SECTION_BREAK = re.compile(r"^\s*(?:(?i:section|article|clause|schedule|chapter|part)\s+(?:\d+[A-Z]{0,3}|[IVXLC]+)\b|\d{1,3}[A-Z]?\.\s+[A-Z(\"“]|\([a-zA-Z0-9]{1,4}\)\s|[A-Z][A-Z \-]{6,}$)")
+CAPS_HEADING = re.compile(r"^\s*[A-Z][A-Z \-]{6,}$")
+SENTENCE_END = re.compile(r"(?<=[.;:?!])\s+")
+
+
+# --- SEGMENTATION ---
+# Chunks end at paragraph or section boundaries; only a paragraph larger than the whole budget
+# is cut further, at sentence ends. Chunk boundaries depend only on the text, so an edited
+# document keeps the same boundaries (and cache keys) everywhere except around the edit.
+# A heading-like line only starts a new paragraph after a line that ends one (or a heading), so
+# PDF text wrapped mid-sentence ("... under\nSection 3 of the Act ...") stays in one piece.
+def ends_block(line):
+    return line.rstrip()[-1:] in tuple(".;:?!)\"”—") or bool(CAPS_HEADING.match(line))
+
+def split_paragraphs(text):
+    paras, current = [], []
+    for line in text.splitlines():
+        if not line.strip() or (current and SECTION_BREAK.match(line) and ends_block(current[-1])):
+            if current: paras.append("\n".join(current))
+            current = []
+        if line.strip(): current.append(line.rstrip())
+    if current: paras.append("\n".join(current))
+    return paras
+
+def split_for_translation(text, chunk_tokens=1200):
+    chunks, current, used = [], [], 0
+    def close():
+        nonlocal current, used
+        if current: chunks.append("\n\n".join(current))
+        current, used = [], 0
+    for para in split_paragraphs(text or ""):
+        cost = estimate_tokens(para)
+        if cost > chunk_tokens:
+            close()
+            piece, piece_used = [], 0
+            for sentence in SENTENCE_END.split(para):
+                c = estimate_tokens(sentence)
+                if piece and piece_used + c > chunk_tokens:
+                    chunks.append(" ".join(piece)); piece, piece_used = [], 0
+                piece.append(sentence); piece_used += c
+            if piece: chunks.append(" ".join(piece))
+            continue
+        if current and used + cost > chunk_tokens: close()
+        current.append(para); used += cost
+    close()
+    return chunks
+
+def extract_glossary_terms(text, limit=60):
+    lowered = text.lower()
+    terms = [m for m in LATIN_MAXIMS if re.search(rf"\b{re.escape(m)}\b", lowered)]
+    seen = set(terms)
+    for m in DEFINED_TERM.finditer(text):
+        term = m.group(1).strip()
+        if term.lower() not in seen:
+            seen.add(term.lower())
+            terms.append(term)
+    return terms[:limit]
+
+def parse_glossary(text):
+    # "term => rendering" lines, as requested from the glossary prompt.
+    glossary = {}
+    for line in (text or "").splitlines():
+        if "=>" in line:
+            term, rendering = line.split("=>", 1)
+            if term.strip(" -*") and rendering.strip(): glossary[term.strip(" -*")] = rendering.strip()
+    return glossary
+
+
+# --- MAP-REDUCE TRANSLATION ---
+# Map: every chunk is translated independently on a bounded pool, behind a shared rate limiter,
+# with the same document glossary so terminology agrees across chunks. Reduce: results are
+# yielded strictly in document order as soon as each next chunk is ready. Translated chunks are
+# cached by (chunk hash, target language), so re-translating an edited document only resends
+# the chunks that changed.
+class ChunkedTranslator:
+    def __init__(self, translate_chunk, cache, limiter=None, max_workers=4, retries=1):
+        self.translate_chunk = translate_chunk  # (chunk_text, target_lang, glossary) -> str
+        self.cache = cache                      # get/put, e.g. LRUCache
+        self.limiter = limiter                  # TokenBucket shared by every document, or None
+        self.max_workers = max_workers
+        self.retries = retries
+        self.counters = {"chunks": 0, "cached": 0, "translated": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name, n=1):
+        with self._lock: self.counters[name] += n
+
+    @staticmethod
+    def chunk_key(chunk, target_lang):
+        return (hashlib.sha256(chunk.encode("utf-8")).hexdigest(), target_lang)
+
+    def _translate(self, chunk, target_lang, glossary):
+        for attempt in range(self.retries + 1):
+            if self.limiter: self.limiter.acquire()
+            try:
+                result = self.translate_chunk(chunk, target_lang, glossary)
+                self.cache.put(self.chunk_key(chunk, target_lang), result)
+                self._count("translated")
+                return result
+            except Exception as e:
+                if attempt == self.retries:
+                    log.warning("translation chunk failed after %d attempt(s): %s", attempt + 1, e)
+                    self._count("failed")
+                    raise
+
+    def stream(self, text, target_lang, glossary=None, separator="\n\n"):
+        chunks = split_for_translation(text)
+        self._count("chunks", len(chunks))
+        results = [self.cache.get(self.chunk_key(c, target_lang)) for c in chunks]
+        self._count("cached", sum(r is not None for r in results))
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="translate") as pool:
+            futures = {i: pool.submit(self._translate, c, target_lang, glossary or {}) for i, c in enumerate(chunks) if results[i] is None}
+            try:
+                for i, chunk in enumerate(chunks):
+                    if i: yield separator
+                    if results[i] is not None:
+                        yield results[i]
+                        continue
+                    try: yield futures[i].result()
+                    except Exception as e:
+                        # Keep the source visible rather than silently dropping part of the document.
+                        yield f"❌ **[Section {i + 1} of {len(chunks)} could not be translated: {e}]**\n\n{chunk}"
+            finally:
+                for f in futures.values(): f.cancel()
@@ -0,0 +1,110 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from aequilex.storage import WriteOutcomeUnknown
+
+log = logging.getLogger("aequilex.writer")
+_STOP = object()
+
+
+# --- WRITE-BEHIND PERSISTENCE ---
+# Callers enqueue rows and return immediately; one background thread drains the queue, groups
+# rows per table into multi-row inserts (`insert_rows(table, rows)`), retries failures with
+# exponential backoff (except WriteOutcomeUnknown, which may already have been applied) and
+# flushes whatever is left when the process exits.
+class WriteBehindQueue:
+    def __init__(self, insert_rows, max_queue=5000, batch_size=50, max_delay=0.25, max_retries=5, backoff=0.5, put_timeout=2.0):
+        self.insert_rows = insert_rows
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._latencies = deque(maxlen=500)
+        self._lock = threading.Lock()
+        self.counters = {"enqueued": 0, "written": 0, "batches": 0, "retries": 0, "failed": 0, "sync_fallbacks": 0}
+        self.dead_letters = deque(maxlen=500)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="aequilex-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, table, row):
+        if self._closed:
+            self._write(table, [(row, time.monotonic())])
+            return
+        try:
+            self._queue.put((table, row, time.monotonic()), timeout=self.put_timeout)
+            with self._lock: self.counters["enqueued"] += 1
+        except queue.Full:
+            # Database far behind: apply backpressure by writing inline rather than dropping data.
+            with self._lock: self.counters["sync_fallbacks"] += 1
+            self._write(table, [(row, time.monotonic())])
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                try: nxt = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty: break
+                if nxt is _STOP:
+                    self._queue.put(_STOP)  # handled after this batch is written
+                    self._queue.task_done()
+                    break
+                batch.append(nxt)
+            by_table = {}
+            for table, row, queued_at in batch: by_table.setdefault(table, []).append((row, queued_at))
+            for table, rows in by_table.items(): self._write(table, rows)
+            for _ in batch: self._queue.task_done()
+
+    def _write(self, table, rows):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.insert_rows(table, [row for row, _ in rows])
+                break
+            except Exception as e:
+                if attempt == self.max_retries or isinstance(e, WriteOutcomeUnknown):
+                    log.error("write-behind: dropping %d %s row(s) after %d attempts: %s", len(rows), table, attempt + 1, e)
+                    with self._lock:
+                        self.counters["failed"] += len(rows)
+                        self.dead_letters.extend((table, row) for row, _ in rows)
+                    return
+                with self._lock: self.counters["retries"] += 1
+                time.sleep(self.backoff * (2 ** attempt))
+        done = time.monotonic()
+        with self._lock:
+            self.counters["written"] += len(rows)
+            self.counters["batches"] += 1
+            self._latencies.extend(done - queued_at for _, queued_at in rows)
+
+    def flush(self, timeout=None):
+        # Blocks until every row enqueued so far is written (or given up on).
+        if timeout is None:
+            self._queue.join()
+            return True
+        end = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < end: time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def close(self, timeout=30.0):
+        if self._closed: return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            lat = sorted(self._latencies)
+            counters = dict(self.counters)
+        pct = lambda p: lat[min(int(p * len(lat)), len(lat) - 1)] * 1000 if lat else 0.0
+        return {"depth": self._queue.qsize(), "latency_p50_ms": pct(0.5), "latency_p95_ms": pct(0.95), **counters}
@@ -0,0 +1,110 @@
+# Reruns/sec with a client rebuilt on every rerun (old `db = DBHandler()` behaviour) versus
+# one process-wide PooledResource, measured against a local stand-in HTTP server.
+#
+#   python benchmarks/bench_client_pool.py --sessions 50 --reruns 40 --handshake-ms 15
+#
+# The stand-in charges --handshake-ms on the first request of every new connection to model
+# the TCP+TLS setup a real Supabase/Gemini endpoint costs; each rerun issues --queries requests
+# (workspaces, history, vault ...), just like a Streamlit script pass.
+import argparse
+import http.client
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from aequilex.pool import PooledResource
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = 64 * 1024  # one write per response; avoids Nagle/delayed-ACK stalls skewing the numbers
+    handshake_s = 0.0
+
+    def setup(self):
+        super().setup()
+        time.sleep(self.handshake_s)
+
+    def do_GET(self):
+        body = b'[{"id": 1, "name": "General Workspace"}]'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args): pass
+
+
+class StandInClient:
+    # Mirrors an httpx-backed SDK client: a small keep-alive connection pool shared by callers.
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self._idle = queue.LifoQueue()
+        self.connections_opened = 0
+
+    def get(self, path):
+        try: conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=10)
+            self.connections_opened += 1
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            data = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        self._idle.put(conn)
+        return data
+
+    def close(self):
+        while not self._idle.empty(): self._idle.get_nowait().close()
+
+
+def run(label, sessions, reruns, queries, client_for_rerun, finish_rerun):
+    def session(_):
+        for _ in range(reruns):
+            client = client_for_rerun()
+            for q in range(queries): client.get(f"/rest/v1/table_{q}")
+            finish_rerun(client)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool: list(pool.map(session, range(sessions)))
+    elapsed = time.perf_counter() - start
+    total = sessions * reruns
+    print(f"{label:<28} {total:>6} reruns in {elapsed:7.3f}s  ->  {total / elapsed:9.1f} reruns/s")
+    return total / elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=50)
+    ap.add_argument("--reruns", type=int, default=40)
+    ap.add_argument("--queries", type=int, default=3)
+    ap.add_argument("--handshake-ms", type=float, default=15.0)
+    args = ap.parse_args()
+
+    StandInHandler.handshake_s = args.handshake_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+
+    before = run("per-rerun client (before)", args.sessions, args.reruns, args.queries,
+                 lambda: StandInClient(host, port), lambda c: c.close())
+
+    pool = PooledResource(lambda: StandInClient(host, port), name="stand-in")
+    after = run("pooled client (after)", args.sessions, args.reruns, args.queries,
+                pool.get, lambda c: None)
+    print(f"speed-up x{after / before:.1f}; pooled client opened {pool.get().connections_opened} connections, "
+          f"{pool.stats['creations']} client creation(s)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Payload bytes and upload+first-byte latency for raw versus compacted media, measured against
+# a local stand-in model endpoint that receives at --uplink-mbps (a typical mobile/office uplink).
+#
+#   python benchmarks/bench_media_payload.py --uplink-mbps 10 --audio-seconds 60
+#   python benchmarks/bench_media_payload.py --image scan.jpg --audio memo.wav
+#
+# Without --image/--audio it synthesises a 12 MP colour "phone photo" of a typed page and a
+# 48 kHz stereo WAV, the format st.audio_input records.
+import argparse
+import http.client
+import io
+import math
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from aequilex.media import compact_audio, compact_image
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = 64 * 1024
+    bytes_per_s = 10e6 / 8
+
+    def do_POST(self):
+        remaining = int(self.headers["Content-Length"])
+        while remaining:
+            block = self.rfile.read(min(remaining, 64 * 1024))
+            remaining -= len(block)
+            time.sleep(len(block) / self.bytes_per_s)  # paced like a constrained uplink
+        body = b'{"text": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args): pass
+
+
+def sample_photo():
+    rng = random.Random(7)
+    img = Image.new("RGB", (4032, 3024), (228, 222, 208))
+    draw = ImageDraw.Draw(img)
+    for y in range(200, 2900, 46):
+        x = 300
+        while x < 3700:
+            w = rng.randint(40, 220)
+            draw.rectangle([x, y, x + w, y + 22], fill=(rng.randint(20, 60),) * 3)
+            x += w + rng.randint(18, 30)
+    noise = Image.effect_noise((4032, 3024), 24).convert("RGB")
+    img = Image.blend(img, noise, 0.12).filter(ImageFilter.GaussianBlur(0.6))
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=92)
+    return out.getvalue()
+
+def sample_wav(seconds, rate=48000):
+    rng = random.Random(7)
+    frames = bytearray()
+    for i in range(seconds * rate):
+        v = int(6000 * math.sin(2 * math.pi * 220 * i / rate) + rng.randint(-800, 800))
+        frames += struct.pack("<hh", v, v)
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(2); w.setsampwidth(2); w.setframerate(rate)
+        w.writeframes(bytes(frames))
+    return out.getvalue()
+
+
+def upload(host, port, payload):
+    conn = http.client.HTTPConnection(host, port, timeout=600)
+    start = time.perf_counter()
+    conn.request("POST", "/generate", body=payload, headers={"Content-Type": "application/octet-stream"})
+    conn.getresponse().read()
+    conn.close()
+    return time.perf_counter() - start
+
+
+def report(label, raw, compact_fn, host, port):
+    start = time.perf_counter()
+    small, mime = compact_fn(raw)
+    prep = time.perf_counter() - start
+    before = upload(host, port, raw)
+    after = prep + upload(host, port, small)
+    print(f"{label:<6} raw {len(raw) / 1e6:8.2f} MB  ->  {mime:<10} {len(small) / 1e6:7.3f} MB  (x{len(raw) / len(small):5.1f} smaller)   "
+          f"latency {before * 1000:8.0f} ms -> {after * 1000:7.0f} ms  (prep {prep * 1000:.0f} ms)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--image")
+    ap.add_argument("--audio")
+    ap.add_argument("--audio-seconds", type=int, default=60)
+    ap.add_argument("--uplink-mbps", type=float, default=10.0)
+    args = ap.parse_args()
+
+    StandInHandler.bytes_per_s = args.uplink_mbps * 1e6 / 8
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+
+    image = open(args.image, "rb").read() if args.image else sample_photo()
+    audio = open(args.audio, "rb").read() if args.audio else sample_wav(args.audio_seconds)
+    report("image", image, compact_image, host, port)
+    report("audio", audio, compact_audio, host, port)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
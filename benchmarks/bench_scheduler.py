@@ -0,0 +1,98 @@
+# Load test for the model-call scheduler: replays a synthetic mix of traffic (a burst of bulk
+# free-tier calls, steady pro and enterprise traffic) against the fake model backend, whose
+# quota admits --capacity concurrent streams and answers 429 beyond that.
+#
+#   python benchmarks/bench_scheduler.py --capacity 8 --free-users 30 --seconds 6
+#
+# "direct" is today's behaviour (every session calls the backend straight away); "scheduled"
+# routes the same traffic through ModelScheduler with max_concurrent = capacity.
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from aequilex.fakes import FakeModelServer
+from aequilex.scheduler import AdmissionRejected, ModelScheduler
+
+
+def traffic(args):
+    rng = random.Random(11)
+    calls = []
+    # Bulk translation burst: every free user fires several chunk calls within the first second.
+    for u in range(args.free_users):
+        for _ in range(args.free_calls):
+            calls.append((rng.uniform(0, 1.0), "free", f"free-{u}"))
+    for tier, users, rate in (("pro", args.pro_users, 0.8), ("enterprise", args.enterprise_users, 1.0)):
+        for u in range(users):
+            t = rng.expovariate(rate)
+            while t < args.seconds:
+                calls.append((t, tier, f"{tier}-{u}"))
+                t += rng.expovariate(rate)
+    return sorted(calls)
+
+
+def run(label, calls, server, scheduler=None):
+    waits, latencies, outcomes = defaultdict(list), defaultdict(list), defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    start = time.monotonic()
+
+    def one(at, tier, user):
+        time.sleep(max(at - (time.monotonic() - start), 0))
+        t0 = time.monotonic()
+        try:
+            if scheduler:
+                with scheduler.slot(user, tier):
+                    waited = time.monotonic() - t0
+                    for _ in server.opener("gemini-2.5-flash"): pass
+            else:
+                waited = 0.0
+                for _ in server.opener("gemini-2.5-flash"): pass
+            outcome = "ok"
+        except AdmissionRejected: outcome, waited = "rejected", None
+        except Exception: outcome, waited = "error", None
+        with lock:
+            outcomes[tier][outcome] += 1
+            if outcome == "ok":
+                waits[tier].append(waited)
+                latencies[tier].append(time.monotonic() - t0)
+
+    threads = [threading.Thread(target=one, args=c, daemon=True) for c in calls]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    pct = lambda xs, p: sorted(xs)[min(int(p * len(xs)), len(xs) - 1)] * 1000 if xs else 0.0
+    print(f"\n{label}")
+    print(f"  {'tier':<11} {'ok':>5} {'429/err':>8} {'rejected':>9} {'wait p50':>9} {'wait p99':>9} {'e2e p50':>9} {'e2e p99':>9}")
+    for tier in ("free", "pro", "enterprise"):
+        o = outcomes[tier]
+        print(f"  {tier:<11} {o['ok']:>5} {o['error']:>8} {o['rejected']:>9} {pct(waits[tier], .5):>7.0f}ms {pct(waits[tier], .99):>7.0f}ms "
+              f"{pct(latencies[tier], .5):>7.0f}ms {pct(latencies[tier], .99):>7.0f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--capacity", type=int, default=8)
+    ap.add_argument("--free-users", type=int, default=30)
+    ap.add_argument("--free-calls", type=int, default=6)
+    ap.add_argument("--pro-users", type=int, default=6)
+    ap.add_argument("--enterprise-users", type=int, default=3)
+    ap.add_argument("--seconds", type=float, default=6.0)
+    ap.add_argument("--ttft-ms", type=float, default=150)
+    args = ap.parse_args()
+
+    calls = traffic(args)
+    print(f"{len(calls)} calls over ~{args.seconds:.0f}s; backend quota {args.capacity} concurrent streams")
+    with FakeModelServer(default={"ttft": args.ttft_ms / 1000, "chunk_delay": 0.02, "chunks": 10}, capacity=args.capacity) as server:
+        run("direct (no scheduler)", calls, server)
+        tiers = {"free": {"weight": 1, "rate": 20, "burst": 60, "user_rate": 1, "user_burst": 6},
+                 "pro": {"weight": 3, "rate": 20, "burst": 40, "user_rate": 2, "user_burst": 10},
+                 "enterprise": {"weight": 6, "rate": 20, "burst": 40, "user_rate": 4, "user_burst": 20}}
+        run("scheduled (token buckets + WFQ)", calls, server, ModelScheduler(tiers, max_concurrent=args.capacity, max_wait=20))
+
+
+if __name__ == "__main__":
+    main()
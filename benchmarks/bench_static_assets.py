@@ -0,0 +1,55 @@
+# Bytes the theme and brand assets add to each Streamlit rerun, and the server time spent
+# building them, before (f-string CSS + raw SVG markup re-sent on every rerun) and after
+# (minified once per process, stylesheet moved into <head> on the session's first run).
+#
+#   python benchmarks/bench_static_assets.py --reruns 50
+#
+# Streamlit sends every st.markdown body over the websocket on each rerun (compression is off
+# by default), so payload size here is what crosses the wire per interaction.
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from aequilex.assets import LOGIN_BRAND, SIDEBAR_BRAND, asset_hash, head_injector, minify_css, minify_html, theme_css
+
+PALETTE = ("#050505", "#0A0A0B", "#E2E8F0", "#94A3B8", "rgba(212, 175, 55, 0.15)", "rgba(139, 92, 246, 0.3)", "#0F0F11", "rgba(255, 255, 255, 0.02)")
+
+
+def before(first):
+    # Every rerun rebuilt the f-string and sent the whole stylesheet plus the brand markup.
+    css = f"<style>\n{theme_css(*PALETTE)}</style>\n"
+    return [css, LOGIN_BRAND if first else SIDEBAR_BRAND]
+
+
+_built = {}
+def after(first):
+    if not _built:
+        css = minify_css(theme_css(*PALETTE))
+        asset_id = f"aequilex-theme-{asset_hash(css)}"
+        _built.update(inline=f"<style>/*{asset_id}*/{css}</style>", injector=head_injector(asset_id), login=minify_html(LOGIN_BRAND), sidebar=minify_html(SIDEBAR_BRAND))
+    if first: return [_built["inline"], _built["injector"], _built["login"]]
+    return [_built["sidebar"]]
+
+
+def run(label, build, reruns):
+    first_bytes, rerun_bytes, start = 0, 0, time.perf_counter()
+    for i in range(reruns):
+        size = sum(len(part.encode("utf-8")) for part in build(i == 0))
+        if i == 0: first_bytes = size
+        else: rerun_bytes += size
+    elapsed = (time.perf_counter() - start) / reruns
+    print(f"{label:<8} first run {first_bytes / 1024:6.1f} KB   per later rerun {rerun_bytes / max(reruns - 1, 1) / 1024:6.1f} KB   build {elapsed * 1e6:7.1f} µs/rerun")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reruns", type=int, default=50)
+    args = ap.parse_args()
+    run("before", before, args.reruns)
+    run("after", after, args.reruns)
+
+
+if __name__ == "__main__":
+    main()
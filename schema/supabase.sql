@@ -0,0 +1,87 @@
+-- Aequilex schema for the Supabase (Postgres) backend.
+-- Safe to re-run: every statement is idempotent.
+
+create table if not exists users (
+    email text primary key,
+    password text not null,
+    name text,
+    institution text,
+    year text,
+    auth_token text default '',
+    tier text default 'free'
+);
+create index if not exists users_auth_token_idx on users (auth_token) where auth_token <> '';
+
+create table if not exists workspaces (
+    id bigserial primary key,
+    email text not null,
+    name text not null,
+    created_at timestamptz default now()
+);
+create index if not exists workspaces_email_idx on workspaces (email, created_at desc);
+
+create table if not exists chats (
+    id bigserial primary key,
+    email text not null,
+    role text not null,
+    content text,
+    workspace_id bigint default 0,
+    timestamp timestamptz default now()
+);
+create index if not exists chats_thread_idx on chats (email, workspace_id, id);
+
+create table if not exists spaces (
+    id bigserial primary key,
+    email text not null,
+    category text not null,
+    query text,
+    response text,
+    workspace_id bigint default 0,
+    timestamp timestamptz default now()
+);
+-- Vault listing reads only this summary projection, never the full response bodies.
+alter table spaces add column if not exists query_preview text
+    generated always as (left(coalesce(query, ''), 80)) stored;
+-- Full-text search over both the question and the archived analysis.
+alter table spaces add column if not exists search_tsv tsvector
+    generated always as (to_tsvector('english', coalesce(query, '') || ' ' || coalesce(response, ''))) stored;
+create index if not exists spaces_keyset_idx on spaces (email, category, workspace_id, id desc);
+create index if not exists spaces_search_idx on spaces using gin (search_tsv);
+-- SHA-256 of the source file for batch-ingested records, so re-running a batch skips them.
+alter table spaces add column if not exists content_hash text;
+create index if not exists spaces_hash_idx on spaces (email, workspace_id, content_hash) where content_hash is not null;
+
+-- Rolling conversation summaries used to bound Research Core prompts.
+create table if not exists context_summaries (
+    email text not null,
+    workspace_id bigint not null default 0,
+    summary text,
+    covered_id bigint default 0,
+    updated_at timestamptz default now(),
+    primary key (email, workspace_id)
+);
+
+-- Change feed for incremental workspace sync: clients poll for rows above their last-seen id,
+-- and deletes leave a tombstone here so other sessions can drop the row from their mirror.
+create table if not exists deletions (
+    id bigserial primary key,
+    email text not null,
+    workspace_id bigint default 0,
+    table_name text not null,
+    row_id bigint not null,
+    deleted_at timestamptz default now()
+);
+create index if not exists deletions_feed_idx on deletions (email, workspace_id, id);
+create index if not exists spaces_feed_idx on spaces (email, workspace_id, id);
+create index if not exists workspaces_feed_idx on workspaces (email, id);
+
+create or replace function record_deletion() returns trigger language plpgsql as $$
+begin
+    insert into deletions (email, workspace_id, table_name, row_id) values (old.email, old.workspace_id, tg_table_name, old.id);
+    return old;
+end;
+$$;
+drop trigger if exists chats_record_deletion on chats;
+create trigger chats_record_deletion after delete on chats for each row execute function record_deletion();
+drop trigger if exists spaces_record_deletion on spaces;
+create trigger spaces_record_deletion after delete on spaces for each row execute function record_deletion();
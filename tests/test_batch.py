@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+pytest.importorskip("docx")
+pytest.importorskip("google.genai")
+
+from aequilex.batch import Checkpoint, read_jobs, run_batch
+
+
+class FakeEngine:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+
+    def research_stream(self, query, *args, **kwargs):
+        self.calls.append(query)
+        yield f"❌ model error for {query}" if query in self.fail else f"answer to {query}"
+
+
+def write_jobs(tmp_path, rows):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in rows), encoding="utf-8")
+    return str(path)
+
+
+def test_translation_jobs_fan_out_per_language(tmp_path):
+    jobs = read_jobs(write_jobs(tmp_path, [{"id": "t", "task": "translation", "text": "x", "target_lang": "Hindi; Tamil"}]))
+    assert [(j["id"], j["target_lang"]) for j in jobs] == [("t-hindi", "Hindi"), ("t-tamil", "Tamil")]
+
+
+def test_rerun_resumes_only_failed_jobs(tmp_path):
+    jobs = read_jobs(write_jobs(tmp_path, [{"id": f"j{i}", "query": f"q{i}"} for i in range(4)]))
+    out = str(tmp_path / "out")
+    first = run_batch(FakeEngine(fail={"q2"}), jobs, out, concurrency=2)
+    assert [r["status"] for r in first] == ["ok", "ok", "failed", "ok"]
+    engine = FakeEngine()
+    second = run_batch(engine, jobs, out, concurrency=2)
+    assert engine.calls == ["q2"] and all(r["status"] == "ok" for r in second)
+    assert (tmp_path / "out" / "j2.docx").exists()
+
+
+def test_checkpoint_ignores_a_torn_last_line(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text('{"id": "a", "status": "ok"}\n{"id": "b", "sta', encoding="utf-8")
+    checkpoint = Checkpoint(str(path))
+    assert checkpoint.done("a") and not checkpoint.done("b")
+    checkpoint.record({"id": "b", "status": "ok"})
+    checkpoint.close()
+    assert Checkpoint(str(path)).done("b")
@@ -0,0 +1,37 @@
+from aequilex.citations import MAX_CITATION_CHARS, CitationIndex, CitationVerifier, normalize_citation
+
+
+def index():
+    idx = CitationIndex()
+    idx.add("(1973) 4 SCC 225", "Kesavananda Bharati v. State of Kerala", 1973)
+    idx.add("AIR 1973 SC 1461", "Kesavananda Bharati v. State of Kerala", 1973)
+    return idx
+
+
+def test_reporter_formats_normalize():
+    assert normalize_citation("(1973) 4 S.C.C. 225") == "SCC 1973 4 225"
+    assert normalize_citation("A.I.R. 1973 S.C. 1461") == "AIR 1973 SC 1461"
+    assert normalize_citation("2021 SCC OnLine SC 123") == "SCCOL 2021 SC 123"
+    assert normalize_citation("2023 INSC 45") == "INSC 2023 45"
+    assert normalize_citation("no citation here") is None
+
+
+def test_citation_split_across_chunks_is_still_checked():
+    verifier = CitationVerifier(index())
+    text = "As held in Kesavananda, (1973) 4 SCC 225, and in a made-up case, (2019) 3 SCC 999, the basic structure stands."
+    pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+    out = "".join(verifier.wrap(iter(pieces)))
+    assert verifier.verified == ["SCC 1973 4 225"] and verifier.unverified == ["(2019) 3 SCC 999"]
+    assert "(2019) 3 SCC 999" + CitationVerifier.FLAG in out
+    assert out.startswith(text.replace("(2019) 3 SCC 999", "(2019) 3 SCC 999" + CitationVerifier.FLAG))
+    assert "Citation check" in out
+
+
+def test_holdback_is_bounded():
+    verifier = CitationVerifier(index())
+    chunks = ["word " * 40] * 5
+    emitted = []
+    for out in verifier.wrap(iter(chunks)):
+        emitted.append(out)
+        if len(emitted) == 1: assert len(out) >= len(chunks[0]) - MAX_CITATION_CHARS
+    assert "".join(emitted) == "".join(chunks) and not verifier.unverified
@@ -0,0 +1,42 @@
+from aequilex.context import ContextManager, estimate_tokens, extractive_summary
+
+
+def thread(n, words=60):
+    return [{"id": i + 1, "role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "word " * words} for i in range(n)]
+
+
+def test_estimate_counts_non_ascii_densely():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("नमस्ते दुनिया") > estimate_tokens("hello world")
+
+
+def test_short_history_passes_through_untouched():
+    cm = ContextManager({"m": 16000}, summarize=lambda summary, turns: "unused")
+    history = thread(4)
+    assert cm.prepare(("a", 0), history, "m") == ("", history)
+
+
+def test_long_history_folds_oldest_turns_into_a_persisted_summary():
+    saved = {}
+    cm = ContextManager({"m": 2000}, summarize=lambda summary, turns: f"summary of {len(turns)}", save_state=lambda key, state: saved.update({key: state}), min_history_budget=100, summary_tokens=200)
+    history = thread(40)
+    summary, recent = cm.prepare(("a", 0), history, "m")
+    assert summary.startswith("summary of") and recent == history[-len(recent):]
+    assert estimate_tokens(summary) + sum(estimate_tokens(m["content"]) for m in recent) <= 2000
+    assert saved[("a", 0)]["covered_id"] == history[-len(recent) - 1]["id"]
+    # The next turn reuses the summary instead of folding again.
+    calls = []
+    cm.summarize = lambda summary, turns: calls.append(turns) or "again"
+    assert cm.prepare(("a", 0), history + thread(1), "m")[0] == summary and not calls
+
+
+def test_summarizer_failure_falls_back_to_extractive_summary():
+    def broken(summary, turns): raise RuntimeError("model down")
+    cm = ContextManager({"m": 1500}, summarize=broken, min_history_budget=100, summary_tokens=200)
+    summary, recent = cm.prepare(None, thread(40), "m")
+    assert summary.startswith("- User asked:") and estimate_tokens(summary) <= 200
+    assert recent[-1]["id"] == 40
+
+
+def test_extractive_summary_fits_its_budget():
+    assert estimate_tokens(extractive_summary("", thread(50), max_tokens=300)) <= 300
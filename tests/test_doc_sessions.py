@@ -0,0 +1,47 @@
+from aequilex.doc_sessions import DocumentSessions
+from aequilex.fakes import LocalContextCache
+
+TEXT = "the lessee shall pay the rent on the first day of each month " * 400
+
+
+class Clock:
+    def __init__(self): self.now = 1000.0
+
+    def __call__(self): return self.now
+
+
+def sessions_with(cache, clock):
+    return DocumentSessions(cache.create, cache.refresh, cache.delete, ttl=600, refresh_margin=60, min_tokens=100, clock=clock)
+
+
+def test_handle_is_reused_then_refreshed_then_recreated():
+    clock = Clock()
+    cache = LocalContextCache(clock)
+    sessions = sessions_with(cache, clock)
+    handle = sessions.handle(("a@x", 1), "doc", "m", lambda: TEXT)
+    assert cache.resolve(handle) == TEXT
+    assert sessions.handle(("a@x", 1), "doc", "m", lambda: TEXT) == handle
+    clock.now += 570   # inside the refresh margin
+    assert sessions.handle(("a@x", 1), "doc", "m", lambda: TEXT) == handle
+    assert cache.calls["refresh"] == 1
+    clock.now += 700   # expired at the provider
+    fresh = sessions.handle(("a@x", 1), "doc", "m", lambda: TEXT)
+    assert fresh != handle and cache.calls["create"] == 2
+    assert sessions.stats()["expired"] == 1
+
+
+def test_small_documents_are_sent_inline():
+    clock = Clock()
+    cache = LocalContextCache(clock)
+    assert sessions_with(cache, clock).handle(("a@x", 1), "doc", "m", lambda: "short") is None
+    assert cache.calls["create"] == 0
+
+
+def test_drop_owner_deletes_every_workspace_of_that_user():
+    clock = Clock()
+    cache = LocalContextCache(clock)
+    sessions = sessions_with(cache, clock)
+    for scope in (("a@x", 1), ("a@x", 2), ("b@x", 1)): sessions.handle(scope, "doc", "m", lambda: TEXT)
+    sessions.drop_owner("a@x")
+    assert cache.calls["delete"] == 2 and len(cache.entries) == 1
+    assert sessions.stats()["live"] == 1
@@ -0,0 +1,39 @@
+from aequilex.history import ChatHistoryCache
+
+
+def test_first_load_then_delta_sync():
+    rows = [{"id": 1, "role": "user", "content": "q"}, {"id": 2, "role": "assistant", "content": "a"}]
+    seen = []
+    def fetch(after_id):
+        seen.append(after_id)
+        return [r for r in rows if r["id"] > after_id]
+    cache = ChatHistoryCache(sync_interval=3600)
+    assert cache.get("a", 0, fetch) == rows
+    rows.append({"id": 3, "role": "user", "content": "q2"})
+    assert len(cache.get("a", 0, fetch)) == 2   # within the sync interval
+    assert [m["id"] for m in cache.get("a", 0, fetch, force_sync=True)] == [1, 2, 3]
+    assert seen == [0, 2]
+
+
+def test_pending_write_behind_message_adopts_its_stored_id():
+    cache = ChatHistoryCache()
+    cache.get("a", 0, lambda after_id: [])
+    cache.append("a", 0, {"role": "user", "content": "bail in 302?"})
+    cache.merge("a", 0, [{"id": 7, "role": "user", "content": "bail in 302?"}])
+    messages = cache.get("a", 0, lambda after_id: [])
+    assert messages == [{"id": 7, "role": "user", "content": "bail in 302?"}]
+    assert cache.last_id("a", 0) == 7
+
+
+def test_rows_from_other_sessions_are_kept_in_id_order():
+    cache = ChatHistoryCache()
+    cache.get("a", 0, lambda after_id: [{"id": 5, "role": "user", "content": "mine"}])
+    cache.append("a", 0, {"id": 9, "role": "assistant", "content": "local"})
+    cache.merge("a", 0, [{"id": 6, "role": "user", "content": "other tab"}, {"id": 9, "role": "assistant", "content": "local"}])
+    assert [m["id"] for m in cache.get("a", 0, lambda after_id: [])] == [5, 6, 9]
+
+
+def test_unloaded_threads_are_not_tracked():
+    cache = ChatHistoryCache()
+    cache.merge("a", 0, [{"id": 1, "role": "user", "content": "x"}])
+    assert cache.last_id("a", 0) is None
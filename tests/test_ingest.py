@@ -0,0 +1,44 @@
+import threading
+
+from aequilex.ingest import ARCHIVED, FAILED, PENDING, SKIPPED, BatchIngestor, IngestJob
+
+
+def job(n): return IngestJob((f"file{i}.pdf", f"h{i}") for i in range(n))
+
+
+def test_duplicates_collapse_and_archived_items_are_skipped():
+    j = IngestJob([("a.pdf", "h1"), ("copy of a.pdf", "h1"), ("b.pdf", "h2")])
+    assert len(j.items) == 2
+    written = []
+    BatchIngestor(lambda h: {"hash": h}, written.extend, archived_hashes=lambda hashes: {"h1"}).run(j)
+    assert j.items["h1"]["state"] == SKIPPED and written == [{"hash": "h2"}] and j.finished()
+
+
+def test_rows_are_written_in_batches_and_failures_recorded():
+    batches = []
+    def analyze(h):
+        if h == "h3": raise ValueError("unreadable PDF")
+        return {"hash": h}
+    j = job(10)
+    BatchIngestor(analyze, lambda rows: batches.append(rows), batch_size=4).run(j)
+    assert sorted(r["hash"] for b in batches for r in b) == [f"h{i}" for i in range(10) if i != 3]
+    assert j.counts()[ARCHIVED] == 9 and j.items["h3"] == {"name": "file3.pdf", "state": FAILED, "error": "unreadable PDF"}
+    assert j.todo() == ["h3"]
+
+
+def test_interrupted_run_resumes_only_unfinished_items():
+    class Interrupted(Exception): pass
+    done = threading.Event()
+    def analyze(h):
+        if h != "h0": done.wait(2)
+        return {"hash": h}
+    def on_progress(j):
+        if j.items["h0"]["state"] == ARCHIVED: raise Interrupted   # e.g. a Streamlit rerun
+    j, written = job(4), []
+    ingestor = BatchIngestor(analyze, written.extend, batch_size=1)
+    try: ingestor.run(j, on_progress)
+    except Interrupted: pass
+    done.set()
+    assert j.items["h0"]["state"] == ARCHIVED and all(j.items[h]["state"] == PENDING for h in ("h1", "h2", "h3"))
+    ingestor.run(j)
+    assert j.finished() and sorted(r["hash"] for r in written) == ["h0", "h1", "h2", "h3"]
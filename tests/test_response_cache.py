@@ -0,0 +1,45 @@
+from aequilex.response_cache import ResponseCache, is_standalone_query, normalize_query, replay_stream
+
+PARAMS = ("Academic", "Detailed", False)
+
+
+def test_filler_words_and_case_share_one_key():
+    assert normalize_query("Explain Section 103 of BNS?") == normalize_query("section 103 bns")
+
+
+def test_exact_and_near_duplicate_hits():
+    cache = ResponseCache()
+    cache.store("what are the ingredients of section 138 NI Act", PARAMS, "answer")
+    assert cache.lookup("What are the ingredients of Section 138 NI Act?", PARAMS) == "answer"
+    assert cache.lookup("138 NI Act ingredients", PARAMS) == "answer"
+    assert cache.counters["exact_hits"] == 1 and cache.counters["near_hits"] == 1
+
+
+def test_numbers_negations_and_params_must_match():
+    cache = ResponseCache()
+    cache.store("is dowry death under section 80 bns bailable", PARAMS, "answer")
+    assert cache.lookup("is dowry death under section 81 bns bailable", PARAMS) is None
+    assert cache.lookup("is dowry death under section 80 bns non bailable", PARAMS) is None
+    assert cache.lookup("is dowry death under section 80 bns not bailable", PARAMS) is None
+    assert cache.lookup("is dowry death under section 80 bns bailable", ("Casual", "Summary", False)) is None
+
+
+def test_expired_and_evicted_entries_miss():
+    cache = ResponseCache(max_entries=2, ttl=0)
+    cache.store("first question about bail", PARAMS, "a")
+    assert cache.lookup("first question about bail", PARAMS) is None
+    cache = ResponseCache(max_entries=2)
+    for i, q in enumerate(["anticipatory bail", "regular bail conditions", "default bail timeline"]): cache.store(q, PARAMS, str(i))
+    assert cache.lookup("anticipatory bail", PARAMS) is None
+    assert cache.lookup("default bail timeline", PARAMS) == "2"
+
+
+def test_follow_ups_are_not_standalone():
+    assert is_standalone_query("explain this further", has_history=False)
+    assert not is_standalone_query("explain this further", has_history=True)
+    assert is_standalone_query("punishment for cheating under bns", has_history=True)
+
+
+def test_replay_reassembles_the_answer():
+    text = "x" * 100
+    assert "".join(replay_stream(text, chunk_chars=30)) == text
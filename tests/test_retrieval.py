@@ -0,0 +1,28 @@
+from aequilex.retrieval import BM25Index, DocumentIndex, chunk_pages, document_context
+
+PAGES = [
+    "THE INDIAN CONTRACT ACT\nAn agreement made without consideration is void.",
+    "Section 73. Compensation for loss or damage caused by breach of contract.\n" + "The party who suffers by such breach is entitled to receive compensation. " * 40,
+    "Section 74. Compensation for breach of contract where penalty stipulated for.",
+]
+
+
+def test_incremental_build_matches_a_one_shot_build():
+    whole = DocumentIndex("h", PAGES)
+    streamed = DocumentIndex("h")
+    for text in PAGES: streamed.add_page(text)
+    assert streamed.chunks == whole.chunks == chunk_pages(PAGES)
+    assert streamed.index.search("penalty stipulated") == whole.index.search("penalty stipulated")
+
+
+def test_search_sees_pages_added_after_an_earlier_search():
+    index = BM25Index(["breach of contract"])
+    assert index.search("penalty") == []
+    index.add("penalty stipulated for breach")
+    assert [idx for idx, _ in index.search("penalty")] == [1]
+
+
+def test_context_cites_the_page_of_each_passage():
+    doc = DocumentIndex("h", PAGES)
+    context = document_context(doc, "penalty stipulated", token_budget=200)
+    assert "[Page 3 of 3]" in context and "Section 74" in context
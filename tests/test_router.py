@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from aequilex.fakes import FakeModelServer
+from aequilex.router import ModelRouter, RouterExhausted, on_cancel
+
+
+def models_of(chunks): return {c.split(":")[0].lstrip("[") for c in chunks}
+
+
+def test_primary_streams_when_healthy():
+    with FakeModelServer(default={"ttft": 0.01, "chunk_delay": 0.0, "chunks": 5}) as server:
+        router = ModelRouter(["a", "b"], ttft_deadline=2.0)
+        chunks = list(router.stream(server.opener))
+    assert len(chunks) == 5 and models_of(chunks) == {"a"}
+    assert server.requests == {"a": 1}
+    assert router.stats()["a"]["successes"] == 1
+
+
+def test_hedge_wins_over_a_slow_primary_and_releases_it():
+    with FakeModelServer({"a": {"ttft": 1.0}, "b": {"ttft": 0.01}}) as server:
+        router = ModelRouter(["a", "b"], ttft_deadline=5.0, hedge_after=0.05)
+        router.breakers["a"].state, router.breakers["a"].opened_at = "open", 0.0   # next call is a half-open probe
+        chunks = list(router.stream(server.opener))
+    assert models_of(chunks) == {"b"}
+    stats = router.stats()
+    assert stats["b"]["hedges"] == 1 and stats["a"]["errors"] == stats["a"]["timeouts"] == 0
+    assert router.breakers["a"].allow()   # the losing probe was released, not left in flight
+
+
+def test_ttft_deadline_falls_back_to_the_next_model():
+    with FakeModelServer({"a": {"hang": True}, "b": {"ttft": 0.01}}) as server:
+        router = ModelRouter(["a", "b"], ttft_deadline={"a": 0.1, "b": 5.0})
+        started = time.monotonic()
+        chunks = list(router.stream(server.opener))
+    assert models_of(chunks) == {"b"} and time.monotonic() - started < 2.0
+    assert router.stats()["a"]["timeouts"] == 1
+
+
+def test_breaker_opens_then_half_open_probe_closes_it():
+    with FakeModelServer({"a": {"fail": True}, "b": {"ttft": 0.01}}) as server:
+        router = ModelRouter(["a", "b"], ttft_deadline=2.0, failure_threshold=2, cooldown=0.2)
+        for _ in range(2): assert models_of(router.stream(server.opener)) == {"b"}
+        assert router.breakers["a"].state == "open"
+        list(router.stream(server.opener))
+        assert server.requests["a"] == 2   # skipped while open
+        time.sleep(0.25)
+        server.behaviours["a"] = {"ttft": 0.01}
+        assert models_of(router.stream(server.opener)) == {"a"}
+        assert router.breakers["a"].state == "closed"
+
+
+def test_mid_stream_stall_surfaces_to_the_caller():
+    with FakeModelServer({"a": {"ttft": 0.01, "chunk_delay": 2.0, "chunks": 3}}) as server:
+        router = ModelRouter(["a"], ttft_deadline=2.0, stall_timeout=0.1)
+        received = []
+        with pytest.raises(TimeoutError, match="stalled"):
+            for chunk in router.stream(server.opener): received.append(chunk)
+    assert len(received) == 1 and router.stats()["a"]["timeouts"] == 1
+
+
+def test_fatal_error_is_raised_without_falling_back():
+    with FakeModelServer({"a": {"fail": True}}) as server:
+        router = ModelRouter(["a", "b"], ttft_deadline=2.0, is_fatal=lambda e: "503" in str(e))
+        with pytest.raises(RuntimeError, match="503"): list(router.stream(server.opener))
+    assert "b" not in server.requests
+
+
+def test_exhausted_when_every_model_fails():
+    with FakeModelServer(default={"fail": True}) as server:
+        router = ModelRouter(["a", "b"], ttft_deadline=2.0)
+        with pytest.raises(RouterExhausted): list(router.stream(server.opener))
+    assert server.requests == {"a": 1, "b": 1}
+
+
+def test_abandoned_attempt_runs_its_closer():
+    closed = threading.Event()
+
+    def opener(model):
+        if model == "a":
+            blocked = threading.Event()
+            on_cancel(lambda: (closed.set(), blocked.set()))
+            blocked.wait(5)
+            return
+        yield "from b"
+
+    router = ModelRouter(["a", "b"], ttft_deadline=5.0, hedge_after=0.05)
+    assert list(router.stream(opener)) == ["from b"]
+    assert closed.wait(1)
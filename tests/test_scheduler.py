@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from aequilex.scheduler import AdmissionRejected, ModelScheduler
+
+TIERS = {"free": {"weight": 1, "rate": 100.0, "burst": 100, "user_rate": 100.0, "user_burst": 100}}
+
+
+def test_waiter_whose_feedback_raises_leaves_the_queue():
+    sched = ModelScheduler(TIERS, max_concurrent=1, feedback_interval=0.01)
+    release, outcome = threading.Event(), {}
+
+    def holder():
+        with sched.slot("a"): release.wait(5)
+
+    def quitter(position, waited): raise RuntimeError("session closed")
+
+    def abandon():
+        try:
+            with sched.slot("b", on_wait=quitter): pass
+        except RuntimeError as e: outcome["error"] = str(e)
+
+    t1 = threading.Thread(target=holder); t1.start()
+    while sched.stats()["in_flight"] < 1: pass
+    t2 = threading.Thread(target=abandon); t2.start(); t2.join(5)
+    assert outcome["error"] == "session closed" and sched.queue_depth() == 0
+    release.set(); t1.join(5)
+    with sched.slot("c"): assert sched.stats()["in_flight"] == 1
+
+
+def test_tier_rejection_refunds_the_user_permit():
+    tiers = {"free": {"weight": 1, "rate": 0.001, "burst": 1, "user_rate": 0.001, "user_burst": 2}}
+    sched = ModelScheduler(tiers, max_wait=0)
+    with sched.slot("a"): pass
+    with pytest.raises(AdmissionRejected, match="free tier"):
+        with sched.slot("a"): pass
+    assert sched._user_buckets[("free", "a")].tokens == pytest.approx(1, abs=0.01)
+
+
+def test_multi_chunk_job_finishes_quickly_under_default_tiers():
+    sched = ModelScheduler(max_concurrent=8)
+    done, lock = [0], threading.Lock()
+
+    def chunk(slot):
+        with slot():
+            time.sleep(0.01)
+            with lock: done[0] += 1
+
+    started = time.monotonic()
+    with sched.job("free@x", "free") as slot:
+        workers = [threading.Thread(target=chunk, args=(slot,)) for _ in range(40)]
+        for w in workers: w.start()
+        for w in workers: w.join(10)
+    assert done[0] == 40 and time.monotonic() - started < 2.0
+    assert sched._user_buckets[("free", "free@x")].tokens == pytest.approx(3, abs=0.1)   # one permit for the whole job
+    assert sched.stats()["tiers"]["free"]["admitted"] == 40
+
+
+def test_job_admission_is_rejected_like_a_single_call():
+    tiers = {"free": {"weight": 1, "rate": 100.0, "burst": 100, "user_rate": 0.001, "user_burst": 1}}
+    sched = ModelScheduler(tiers, max_wait=0)
+    with sched.job("a"): pass
+    with pytest.raises(AdmissionRejected, match="your account"):
+        with sched.job("a"): pass
@@ -0,0 +1,41 @@
+import pytest
+
+from aequilex.storage import SQLiteStore
+
+
+@pytest.fixture(params=[True, False], ids=["fts5", "like"])
+def store(request):
+    store = SQLiteStore(":memory:")
+    if not store.fts_enabled and request.param: pytest.skip("sqlite built without FTS5")
+    store.fts_enabled = request.param
+    store.insert_rows("spaces", [{"email": "a@x", "category": "Research", "query": f"question {i}", "response": "anticipatory bail granted" if i % 3 == 0 else "cheque dishonour",
+                                  "workspace_id": 0} for i in range(12)])
+    return store
+
+
+def test_keyset_pages_walk_newest_first(store):
+    rows, cursor = store.get_space_page("a@x", "Research", limit=5)
+    assert [r["id"] for r in rows] == [12, 11, 10, 9, 8] and cursor == 8
+    rows, cursor = store.get_space_page("a@x", "Research", before_id=cursor, limit=5)
+    assert [r["id"] for r in rows] == [7, 6, 5, 4, 3]
+    rows, cursor = store.get_space_page("a@x", "Research", before_id=cursor, limit=5)
+    assert [r["id"] for r in rows] == [2, 1] and cursor is None
+
+
+def test_search_pages_only_matching_rows(store):
+    rows, cursor = store.get_space_page("a@x", "Research", limit=2, search="anticipatory bail")
+    assert [r["id"] for r in rows] == [10, 7] and cursor == 7
+    rows, cursor = store.get_space_page("a@x", "Research", before_id=cursor, limit=2, search="anticipatory bail")
+    assert [r["id"] for r in rows] == [4, 1] and cursor is None
+
+
+def test_search_is_scoped_to_owner_and_folder(store):
+    assert store.get_space_page("b@x", "Research", search="bail") == ([], None)
+    assert store.get_space_page("a@x", "Research", workspace_id=1, search="bail") == ([], None)
+
+
+def test_deletes_leave_tombstones_for_the_feed(store):
+    store.delete_space_item(4)
+    assert [r["id"] for r in store.get_space_page("a@x", "Research", limit=20, search="anticipatory")[0]] == [10, 7, 1]
+    changes = store.get_changes("a@x", 0, {"deletions": 0, "spaces": 12})
+    assert [(r["table_name"], r["row_id"]) for r in changes["deletions"]] == [("spaces", 4)]
@@ -0,0 +1,27 @@
+from aequilex.streaming import BlockSplitter, coalesce
+
+
+def test_coalesce_joins_small_pieces():
+    ticks = iter(range(100))
+    out = list(coalesce(["a"] * 10, interval=1000, max_chars=4, clock=lambda: next(ticks)))
+    assert out == ["aaaa", "aaaa", "aa"]
+
+
+def test_coalesce_flushes_slow_streams_piece_by_piece():
+    ticks = iter(range(0, 1000, 10))
+    assert list(coalesce(["a", "", "b"], interval=5, clock=lambda: next(ticks))) == ["a", "b"]
+
+
+def test_blocks_freeze_at_blank_lines():
+    splitter = BlockSplitter()
+    assert splitter.feed("# Title\n\nFirst para") == ("# Title\n\n", "First para")
+    assert splitter.feed("graph.\n\nSecond") == ("First paragraph.\n\n", "Second")
+    assert splitter.text == "# Title\n\nFirst paragraph.\n\nSecond"
+
+
+def test_blank_lines_inside_a_code_fence_do_not_split():
+    splitter = BlockSplitter()
+    block, tail = splitter.feed("Intro\n\n```\nline one\n\nline two\n")
+    assert block == "Intro\n\n" and tail.startswith("```")
+    block, tail = splitter.feed("```\n\nAfter")
+    assert block == "```\nline one\n\nline two\n```\n\n" and tail == "After"
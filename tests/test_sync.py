@@ -0,0 +1,68 @@
+from aequilex import storage
+from aequilex.storage import SQLiteStore
+from aequilex.sync import WorkspaceSync
+
+
+def archive(store, n, email="a@x", workspace_id=0, category="Research"):
+    store.insert_rows("spaces", [{"email": email, "category": category, "query": f"q{i}", "response": "r", "workspace_id": workspace_id} for i in range(n)])
+
+
+def pager(store, category="Research"):
+    calls = []
+    def load_page(before_id, limit):
+        calls.append(before_id)
+        return store.get_space_page("a@x", category, 0, before_id=before_id, limit=limit)
+    return load_page, calls
+
+
+def test_feed_reads_past_one_page(monkeypatch):
+    monkeypatch.setattr(storage, "FEED_PAGE_SIZE", 7)
+    store = SQLiteStore(":memory:")
+    archive(store, 30)
+    changes = store.get_changes("a@x", 0, {"spaces": 0})
+    assert [r["id"] for r in changes["spaces"]] == list(range(1, 31))
+    assert changes["cursors"]["spaces"] == 30
+
+
+def test_first_sync_starts_at_the_high_water_mark():
+    store = SQLiteStore(":memory:")
+    archive(store, 500)
+    sync = WorkspaceSync()
+    fetch = lambda cursors: store.get_changes("a@x", 0, cursors)
+    assert sync.sync("a@x", 0, fetch) == 0
+    assert sync.stats()["vault_rows"] == 0
+    archive(store, 2)
+    assert sync.sync("a@x", 0, fetch, force=True) == 2
+
+
+def test_vault_pages_seed_the_mirror_then_fall_back_to_the_database():
+    store = SQLiteStore(":memory:")
+    archive(store, 25)
+    sync = WorkspaceSync()
+    fetch = lambda cursors: store.get_changes("a@x", 0, cursors)
+    sync.sync("a@x", 0, fetch)
+    load_page, calls = pager(store)
+    rows, cursor = sync.vault_page("a@x", 0, "Research", load_page, limit=10)
+    assert [r["id"] for r in rows] == list(range(25, 15, -1)) and cursor == 16 and calls == [None]
+    archive(store, 3)
+    sync.sync("a@x", 0, fetch, force=True)
+    rows, cursor = sync.vault_page("a@x", 0, "Research", load_page, limit=10)
+    assert rows[0]["id"] == 28 and cursor == 19 and calls == [None]   # served from the mirror
+    rows, cursor = sync.vault_page("a@x", 0, "Research", load_page, before_id=cursor, limit=10)
+    assert [r["id"] for r in rows] == list(range(18, 8, -1)) and calls == [None, 19]
+    rows, cursor = sync.vault_page("a@x", 0, "Research", load_page, before_id=cursor, limit=10)
+    assert [r["id"] for r in rows] == list(range(8, 0, -1)) and cursor is None
+
+
+def test_small_category_is_served_entirely_from_the_mirror():
+    store = SQLiteStore(":memory:")
+    archive(store, 4)
+    sync = WorkspaceSync()
+    fetch = lambda cursors: store.get_changes("a@x", 0, cursors)
+    sync.sync("a@x", 0, fetch)
+    load_page, calls = pager(store)
+    assert sync.vault_page("a@x", 0, "Research", load_page, limit=10)[1] is None
+    store.delete_space_item(2)
+    sync.sync("a@x", 0, fetch, force=True)
+    rows, cursor = sync.vault_page("a@x", 0, "Research", load_page, limit=10)
+    assert [r["id"] for r in rows] == [4, 3, 1] and cursor is None and calls == [None]
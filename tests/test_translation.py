@@ -0,0 +1,38 @@
+from aequilex.translation import split_for_translation, split_paragraphs
+
+# Text as PyPDF2 returns it: hard line breaks wherever the PDF wrapped, including before words
+# that look like headings ("Section 3", "part of").
+WRAPPED = """AGREEMENT FOR SALE
+1. The Vendor agrees to sell and the Purchaser agrees to purchase the
+property described in the schedule hereto for a total consideration of
+Rs. 50,00,000 payable in the manner set out under
+Section 3 of this agreement and subject to the terms herein, the whole or
+part of which may be paid in advance.
+2. The Purchaser shall pay the balance within thirty days:
+(a) by demand draft drawn in favour of the Vendor; or
+(b) by electronic transfer to the account of the Vendor.
+SCHEDULE I
+all that piece and parcel of land bearing survey number 12
+situated at the village of Rampur in the district of Pune."""
+
+
+def test_wrapped_lines_stay_in_their_paragraph():
+    paras = split_paragraphs(WRAPPED)
+    assert paras[0] == "AGREEMENT FOR SALE"
+    assert paras[1].startswith("1. The Vendor") and paras[1].endswith("paid in advance.")
+    assert paras[2] == "2. The Purchaser shall pay the balance within thirty days:"
+    assert paras[3].startswith("(a) by demand draft") and paras[3].endswith("account of the Vendor.")
+    assert paras[4].startswith("SCHEDULE I") and paras[4].endswith("district of Pune.")
+    assert len(paras) == 5
+
+
+def test_plain_wrapped_prose_is_one_paragraph():
+    text = "the parties agree that the goods\nshall be delivered within seven\ndays of the date of this order"
+    assert split_paragraphs(text) == [text]
+
+
+def test_chunks_break_only_between_paragraphs():
+    paras = split_paragraphs(WRAPPED)
+    chunks = split_for_translation(WRAPPED, chunk_tokens=80)
+    assert len(chunks) > 1
+    for chunk in chunks: assert set(chunk.split("\n\n")) <= set(paras)
@@ -0,0 +1,54 @@
+import threading
+
+from aequilex.storage import WriteOutcomeUnknown
+from aequilex.writer import WriteBehindQueue
+
+
+def test_rows_are_grouped_per_table_into_batches():
+    batches = []
+    writer = WriteBehindQueue(lambda table, rows: batches.append((table, list(rows))), max_delay=0.05)
+    for i in range(5): writer.submit("chats", {"n": i})
+    writer.submit("spaces", {"n": 9})
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert sorted(r["n"] for t, rows in batches if t == "chats" for r in rows) == list(range(5))
+    assert [rows for t, rows in batches if t == "spaces"] == [[{"n": 9}]]
+    assert writer.stats()["written"] == 6
+
+
+def test_transient_failures_are_retried():
+    calls = []
+    def flaky(table, rows):
+        calls.append(rows)
+        if len(calls) < 3: raise ConnectionError("reset")
+    writer = WriteBehindQueue(flaky, backoff=0.01, max_delay=0.01)
+    writer.submit("chats", {"n": 1})
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert len(calls) == 3 and writer.stats()["retries"] == 2 and not writer.dead_letters
+
+
+def test_unknown_outcome_is_dead_lettered_without_retry():
+    calls = []
+    def ambiguous(table, rows):
+        calls.append(rows)
+        raise WriteOutcomeUnknown("read timed out after send")
+    writer = WriteBehindQueue(ambiguous, backoff=0.01, max_delay=0.01)
+    writer.submit("spaces", {"n": 1})
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert len(calls) == 1 and list(writer.dead_letters) == [("spaces", {"n": 1})]
+    assert writer.stats()["failed"] == 1
+
+
+def test_close_drains_the_queue_and_later_writes_go_inline():
+    written, gate = [], threading.Event()
+    def slow(table, rows):
+        gate.wait(5)
+        written.extend(rows)
+    writer = WriteBehindQueue(slow, max_delay=0.01)
+    for i in range(3): writer.submit("chats", {"n": i})
+    gate.set()
+    writer.close()
+    writer.submit("chats", {"n": 3})
+    assert [r["n"] for r in written] == [0, 1, 2, 3]